@@ -1,101 +1,196 @@
 import os
 import re
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-from docx import Document
-from docx.shared import Inches
 import PyPDF2
+from misc.document_store import DocumentStore, ProcessedLedger
+from misc.text_cache import PageTextCache
+from Data_Analyzer.holdings_store import metrics_path_for, write_frame
+from Data_Analyzer.report_templates import FUND_PDF_REPORT_LAYOUT
+from Data_Analyzer.report_renderers import DEFAULT_REPORT_FORMATS, ReportRenderer
+from Data_Analyzer.charts import histogram, render_charts, scatter_chart
+
+NUMERICAL_COLUMNS = ['Max of Local Price', 'Shares/Par', 'Base Value']
+HOLDINGS_ROW_PATTERN = re.compile(
+    r"(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s+(\d{1,3}(?:,\d{3})*)\s+(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)"
+)
+
+
+def iter_pdf_page_texts(pdf_path: str):
+    """Yields the PyPDF2 text of each page of a PDF."""
+    with open(pdf_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        for page in pdf_reader.pages:
+            yield page.extract_text() or ""
+
 
 class LGPSDataAnalysis:
-    def __init__(self, input_directory: str, output_directory: str, images_directory: str):
+    def __init__(self, input_directory: str, output_directory: str, images_directory: str,
+                 report_formats=DEFAULT_REPORT_FORMATS):
         self.input_directory = input_directory
         self.output_directory = output_directory
         self.images_directory = images_directory
+        self.text_cache = PageTextCache(extractor='pypdf2')
+        self.report = ReportRenderer('btc_fund_report', FUND_PDF_REPORT_LAYOUT, formats=report_formats, table_options={
+            'formats': {'Value': '{:.2f}'},
+            'autofit': True,
+        })
         os.makedirs(self.output_directory, exist_ok=True)
         os.makedirs(self.images_directory, exist_ok=True)
 
     def extract_text_from_pdf(self, pdf_path: str) -> str:
-        pdf_text = ""
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            for page in pdf_reader.pages:
-                pdf_text += page.extract_text() if page.extract_text() else ""
-        return pdf_text
+        # Page text comes from the persistent cache when this file's content was seen before
+        return "".join(text for _, text in self.text_cache.iter_pages(pdf_path, iter_pdf_page_texts))
+
+    @staticmethod
+    def iter_holdings_pages(page_texts):
+        """
+        Streams holdings rows out of (page number, text) pairs, one page at a time.
+        Yields (page, prices, shares, base values) with each column already parsed into a
+        float64 array, so no more than one page of text is held at once. Shares/Par is float64
+        too: share counts can exceed int64 and par amounts can carry decimals.
+        """
+        for page, text in page_texts:
+            matches = HOLDINGS_ROW_PATTERN.findall(text)
+            if not matches:
+                continue
+            count = len(matches)
+            prices, shares, base_values = zip(*matches)
+            yield (
+                page,
+                np.fromiter((float(value.replace(',', '')) for value in prices), np.float64, count),
+                np.fromiter((float(value.replace(',', '')) for value in shares), np.float64, count),
+                np.fromiter((float(value.replace(',', '')) for value in base_values), np.float64, count),
+            )
+
+    def parse_holdings(self, page_texts) -> pd.DataFrame:
+        """Builds the typed holdings frame, tagging every row with its source page."""
+        columns = {name: [np.empty(0, dtype)] for name, dtype in
+                   zip(NUMERICAL_COLUMNS + ['Page'], [np.float64, np.float64, np.float64, np.int64])}
+        for page, prices, shares, base_values in self.iter_holdings_pages(page_texts):
+            columns['Max of Local Price'].append(prices)
+            columns['Shares/Par'].append(shares)
+            columns['Base Value'].append(base_values)
+            columns['Page'].append(np.full(len(prices), page, dtype=np.int64))
+        return pd.DataFrame({name: np.concatenate(chunks) for name, chunks in columns.items()})
+
+    def extract_holdings(self, pdf_path: str) -> pd.DataFrame:
+        """Parses a PDF page by page (through the text cache) into the typed holdings frame."""
+        page_texts = ((page + 1, text) for page, text in self.text_cache.iter_pages(pdf_path, iter_pdf_page_texts))
+        return self.parse_holdings(page_texts)
 
     def extract_numerical_data(self, pdf_text: str) -> pd.DataFrame:
-        pattern = r"(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s+(\d{1,3}(?:,\d{3})*)\s+(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)"
-        matches = re.findall(pattern, pdf_text)
-        numerical_columns = ['Max of Local Price', 'Shares/Par', 'Base Value']
-        numerical_data = pd.DataFrame(matches, columns=numerical_columns)
-        numerical_data['Max of Local Price'] = pd.to_numeric(numerical_data['Max of Local Price'].str.replace(',', ''), errors='coerce')
-        numerical_data['Shares/Par'] = pd.to_numeric(numerical_data['Shares/Par'].str.replace(',', ''), errors='coerce')
-        numerical_data['Base Value'] = pd.to_numeric(numerical_data['Base Value'].str.replace(',', ''), errors='coerce')
-        return numerical_data
+        return self.parse_holdings([(1, pdf_text)])[NUMERICAL_COLUMNS]
 
     def generate_report(self, filename: str, numerical_data: pd.DataFrame):
+        # The source page tag is bookkeeping, not a metric
+        numerical_data = numerical_data[NUMERICAL_COLUMNS]
         numerical_summary = numerical_data.describe().T
         numerical_summary['Sum'] = numerical_data.sum()
         numerical_summary['Median'] = numerical_data.median()
         numerical_summary['Standard Deviation'] = numerical_data.std()
         numerical_summary['Variance'] = numerical_data.var()
-        doc = Document()
-        doc.add_heading(f'LGPS Data Analysis - {filename}', level=1)
-        doc.add_heading('Detailed Numerical Analysis', level=2)
-        doc.add_paragraph('The following table provides detailed statistics of the numerical data:')
-        table = doc.add_table(rows=1, cols=2)
-        table.autofit = True
-        hdr_cells = table.rows[0].cells
-        hdr_cells[0].text = 'Metric'
-        hdr_cells[1].text = 'Value'
-        for index, row in numerical_summary.iterrows():
-            row_cells = table.add_row().cells
-            row_cells[0].text = str(index)
-            row_cells[1].text = f"{row['Sum']:.2f}"
-
-        # Generate and save the histogram for 'Max of Local Price'
-        plt.figure(figsize=(8, 6))
-        plt.hist(numerical_data['Max of Local Price'], bins=50, color='blue', alpha=0.7)
-        plt.xlabel('Max of Local Price')
-        plt.ylabel('Frequency')
-        plt.title('Distribution of Max of Local Price')
+        metrics = pd.DataFrame({'Metric': numerical_summary.index.astype(str), 'Value': numerical_summary['Sum'].astype('float64').values})
+
+        # Histogram of 'Max of Local Price' and scatter plot of 'Shares/Par' vs 'Base Value';
+        # images whose data has not changed since the last run are not redrawn
         histogram_path = os.path.join(self.images_directory, f'{os.path.splitext(filename)[0]}_histogram.png')
-        plt.savefig(histogram_path)
-        plt.close()
-        doc.add_picture(histogram_path, width=Inches(6))
-
-        # Generate and save the scatter plot for 'Shares/Par' vs 'Base Value'
-        plt.figure(figsize=(8, 6))
-        plt.scatter(numerical_data['Shares/Par'], numerical_data['Base Value'], alpha=0.6, color='green')
-        plt.xlabel('Shares/Par')
-        plt.ylabel('Base Value')
-        plt.title('Shares/Par vs Base Value')
         scatter_plot_path = os.path.join(self.images_directory, f'{os.path.splitext(filename)[0]}_scatter.png')
-        plt.savefig(scatter_plot_path)
-        plt.close()
-        doc.add_picture(scatter_plot_path, width=Inches(6))
+        render_charts({
+            histogram_path: histogram(numerical_data['Max of Local Price'], 'Distribution of Max of Local Price',
+                                      'Max of Local Price'),
+            scatter_plot_path: scatter_chart(numerical_data['Shares/Par'], numerical_data['Base Value'],
+                                             'Shares/Par vs Base Value', 'Shares/Par', 'Base Value'),
+        })
 
-        # Save the document to the output directory
+        # Write the report to the output directory in every selected format
         output_file_path = os.path.join(self.output_directory, f'{os.path.splitext(filename)[0]}_Analysis_Report.docx')
-        doc.save(output_file_path)
-        print(f"Analysis report generated: {output_file_path}")
+        report_paths = self.report.render(
+            output_file_path,
+            values={'filename': filename},
+            tables={'metrics': metrics},
+            figures={'histogram': histogram_path, 'scatter': scatter_plot_path},
+        )
+        print(f"Analysis report generated: {', '.join(report_paths)}")
+
+        # Columnar copy of the metric table for the compile stage
+        metrics_path = write_frame(metrics, metrics_path_for(output_file_path))
+        return [*report_paths, histogram_path, scatter_plot_path, metrics_path]
+
+    def process_pdf(self, filename: str) -> list:
+        """Extracts, parses and reports on a single PDF; returns the output paths."""
+        pdf_path = os.path.join(self.input_directory, filename)
+        numerical_data = self.extract_holdings(pdf_path)
+        return self.generate_report(filename, numerical_data)
 
-    def process_all_pdfs(self):
-        for filename in os.listdir(self.input_directory):
+    def _safe_process_pdf(self, filename: str) -> dict:
+        # Cache counters are returned per file so pooled workers can report them too
+        hits, misses = self.text_cache.hits, self.text_cache.misses
+        try:
+            result = {'filename': filename, 'outputs': self.process_pdf(filename), 'error': None}
+        except Exception as e:
+            result = {'filename': filename, 'outputs': [], 'error': f'{type(e).__name__}: {e}'}
+        result['cache_hits'] = self.text_cache.hits - hits
+        result['cache_misses'] = self.text_cache.misses - misses
+        return result
+
+    def process_all_pdfs(self, force: bool = False, workers: int = 1) -> list:
+        """
+        Analyses every PDF in the input directory.
+        With workers > 1 the files are processed independently in a process pool; results
+        are collected per file and reported in filename order, whatever order they finish in.
+        The pool spawns its workers, so it is safe to start from a pipeline stage thread.
+        Returns one {'filename', 'outputs', 'error'} dict per processed file.
+        """
+        # Documents are identified by content hash: duplicates and already analysed files are skipped
+        store = DocumentStore(self.input_directory)
+        ledger = ProcessedLedger(os.path.join(self.output_directory, 'processed_documents.json'),
+                                 key=self.report.signature)
+        seen_hashes = set()
+        pending = []
+        for filename in sorted(os.listdir(self.input_directory)):
             if filename.lower().endswith('.pdf'):
                 pdf_path = os.path.join(self.input_directory, filename)
-                pdf_text = self.extract_text_from_pdf(pdf_path)
-                numerical_data = self.extract_numerical_data(pdf_text)
-                self.generate_report(filename, numerical_data)
-        print("Processing complete!")
+                sha256 = store.sha256_of(pdf_path)
+                if sha256 in seen_hashes:
+                    print(f"Skipping {filename}: duplicate of an earlier document")
+                    continue
+                seen_hashes.add(sha256)
+                if not force and ledger.is_done(sha256):
+                    print(f"Skipping {filename}: already analysed")
+                    continue
+                pending.append((filename, sha256))
+
+        filenames = [filename for filename, _ in pending]
+        if workers > 1 and len(filenames) > 1:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+                results = list(executor.map(self._safe_process_pdf, filenames))
+        else:
+            results = [self._safe_process_pdf(filename) for filename in filenames]
+
+        for (filename, sha256), result in zip(pending, results):
+            if result['error']:
+                print(f"Failed to process {filename}: {result['error']}")
+            else:
+                ledger.mark(sha256, result['outputs'])
+        ledger.save()
+        failed = sum(1 for result in results if result['error'])
+        hits = sum(result['cache_hits'] for result in results)
+        misses = sum(result['cache_misses'] for result in results)
+        print(f"Text cache: {hits} page hits, {misses} page misses")
+        print(f"Processing complete! {len(results) - failed} processed, {failed} failed.")
+        return results
 
 
 # Runs the core program functions
-def run():
+def run(workers=None, report_formats=DEFAULT_REPORT_FORMATS):
     input_directory = 'Data/raw_data/bordertocoast_data/pdf'
     output_directory = 'Data/processed_data/bordertocoast_data/documents/'
     images_directory = 'Data/processed_data/bordertocoast_data/supporting_files/'
-    analyzer = LGPSDataAnalysis(input_directory, output_directory, images_directory)
-    analyzer.process_all_pdfs()
+    analyzer = LGPSDataAnalysis(input_directory, output_directory, images_directory, report_formats)
+    analyzer.process_all_pdfs(workers=workers or os.cpu_count() or 1)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,237 @@
+"""
+Chart rendering for the analysis reports.
+
+Charts are described by plain specs (bar_chart, pie_chart, histogram, scatter_chart) and
+drawn on reused Agg figures, without pyplot or any interactive backend. Each PNG carries
+the sha256 of its spec and data in its metadata, so render_charts skips charts whose
+inputs have not changed since the image was written and renders the rest, optionally in
+a process pool. Pool workers are spawned rather than forked: render_charts is called from
+the pipeline's stage threads, and forking a multi-threaded process can deadlock the child.
+
+Histograms and scatter plots with more than DENSE_THRESHOLD rows are pre-aggregated with
+NumPy when the spec is built (bin counts, 2-D binning on log-scaled bins for data spanning
+several orders of magnitude), so hashing, pickling and drawing them costs per bin rather
+than per holding.
+"""
+import os
+import json
+import struct
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import matplotlib
+from matplotlib.colors import LogNorm
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+# Bump when the drawing code changes so existing images are redrawn
+CHART_STYLE_VERSION = 1
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+DIGEST_KEY = "Comment"
+DIGEST_PREFIX = "lgps-chart-sha256:"
+
+# Above this many rows histograms and scatter plots are drawn from pre-computed bins
+DENSE_THRESHOLD = 5000
+DENSITY_BINS = 100
+# Positive data spanning at least this ratio (max / min) gets log-scaled bins
+LOG_SCALE_RATIO = 1e3
+
+# One figure per size per thread, cleared and reused between charts
+_local = threading.local()
+
+
+def _chart(kind, title, figsize, series, **options):
+    return {"kind": kind, "title": title, "figsize": tuple(figsize), "series": series, **options}
+
+
+def bar_chart(labels, values, title, xlabel, ylabel, figsize=(8, 6), rotate_labels=True, tight_layout=True):
+    """Spec for a bar chart of values per label."""
+    return _chart("bar", title, figsize, {"labels": _labels(labels), "values": _values(values)},
+                  xlabel=xlabel, ylabel=ylabel, rotate_labels=rotate_labels, tight_layout=tight_layout)
+
+
+def pie_chart(labels, values, title, figsize=(8, 6), tight_layout=False):
+    """Spec for a pie chart with percentage labels."""
+    return _chart("pie", title, figsize, {"labels": _labels(labels), "values": _values(values)},
+                  tight_layout=tight_layout)
+
+
+def histogram(values, title, xlabel, ylabel="Frequency", bins=50, color="blue", alpha=0.7, figsize=(8, 6)):
+    """Spec for a histogram of values; large inputs are binned here, on log bins where they fit."""
+    values = _values(values)
+    if len(values) <= DENSE_THRESHOLD:
+        return _chart("hist", title, figsize, {"values": values},
+                      xlabel=xlabel, ylabel=ylabel, bins=bins, color=color, alpha=alpha)
+    values = values[np.isfinite(values)]
+    log_scale = _use_log_scale(values)
+    counts, edges = np.histogram(values, bins=_bin_edges(values, bins, log_scale))
+    return _chart("binned", title, figsize, {"counts": counts.astype("float64"), "edges": edges},
+                  xlabel=xlabel, ylabel=ylabel, color=color, alpha=alpha, xscale="log" if log_scale else "linear")
+
+
+def scatter_chart(x, y, title, xlabel, ylabel, color="green", alpha=0.6, figsize=(8, 6)):
+    """Spec for a scatter plot of y against x; large inputs become a 2-D density plot."""
+    x, y = _values(x), _values(y)
+    if len(x) <= DENSE_THRESHOLD:
+        return _chart("scatter", title, figsize, {"x": x, "y": y},
+                      xlabel=xlabel, ylabel=ylabel, color=color, alpha=alpha)
+    finite = np.isfinite(x) & np.isfinite(y)
+    x, y = x[finite], y[finite]
+    x_log, y_log = _use_log_scale(x), _use_log_scale(y)
+    counts, x_edges, y_edges = np.histogram2d(
+        x, y, bins=[_bin_edges(x, DENSITY_BINS, x_log), _bin_edges(y, DENSITY_BINS, y_log)]
+    )
+    return _chart("density", title, figsize, {"counts": counts, "x_edges": x_edges, "y_edges": y_edges},
+                  xlabel=xlabel, ylabel=ylabel, xscale="log" if x_log else "linear",
+                  yscale="log" if y_log else "linear")
+
+
+def _use_log_scale(values):
+    return len(values) > 0 and values.min() > 0 and values.max() / values.min() >= LOG_SCALE_RATIO
+
+
+def _bin_edges(values, bins, log_scale):
+    if len(values) == 0:
+        return np.linspace(0.0, 1.0, bins + 1)
+    low, high = values.min(), values.max()
+    if low == high:
+        low, high = low - 0.5, high + 0.5
+    if log_scale:
+        return np.geomspace(low, high, bins + 1)
+    return np.linspace(low, high, bins + 1)
+
+
+def _labels(labels):
+    return [str(label) for label in labels]
+
+
+def _values(values):
+    return np.asarray(values, dtype="float64")
+
+
+def chart_digest(spec):
+    """Returns the sha256 of a chart spec and its data."""
+    sha256 = hashlib.sha256()
+    options = {key: value for key, value in spec.items() if key != "series"}
+    options["style"] = [CHART_STYLE_VERSION, matplotlib.__version__]
+    sha256.update(json.dumps(options, sort_keys=True, default=list).encode("utf-8"))
+    for name in sorted(spec["series"]):
+        series = spec["series"][name]
+        sha256.update(name.encode("utf-8") + b"\0")
+        if isinstance(series, np.ndarray):
+            sha256.update(np.ascontiguousarray(series).tobytes())
+        else:
+            sha256.update("\x1f".join(series).encode("utf-8"))
+        sha256.update(b"\0")
+    return sha256.hexdigest()
+
+
+def stored_digest(path):
+    """Returns the digest recorded in a PNG written by this module, else None."""
+    try:
+        with open(path, "rb") as f:
+            if f.read(8) != PNG_SIGNATURE:
+                return None
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    return None
+                length, chunk_type = struct.unpack(">I4s", header)
+                if chunk_type == b"IDAT":
+                    # Text chunks are written before the image data
+                    return None
+                data = f.read(length)
+                f.seek(4, os.SEEK_CUR)
+                if chunk_type == b"tEXt":
+                    key, _, value = data.partition(b"\0")
+                    value = value.decode("latin-1")
+                    if key.decode("latin-1") == DIGEST_KEY and value.startswith(DIGEST_PREFIX):
+                        return value[len(DIGEST_PREFIX):]
+    except OSError:
+        return None
+
+
+def _figure(figsize):
+    figures = _local.__dict__.setdefault("figures", {})
+    figure = figures.get(figsize)
+    if figure is None:
+        figure = Figure(figsize=figsize)
+        FigureCanvasAgg(figure)
+        figures[figsize] = figure
+    figure.clear()
+    return figure
+
+
+def draw(spec, path, digest=None):
+    """Draws a chart spec to a PNG (atomic replace) and records its digest in the file."""
+    figure = _figure(spec["figsize"])
+    ax = figure.add_subplot()
+    series = spec["series"]
+    kind = spec["kind"]
+    if kind == "bar":
+        ax.bar(series["labels"], series["values"])
+    elif kind == "pie":
+        ax.pie(series["values"], labels=series["labels"], autopct='%1.1f%%')
+    elif kind == "hist":
+        ax.hist(series["values"], bins=spec["bins"], color=spec["color"], alpha=spec["alpha"])
+    elif kind == "scatter":
+        ax.scatter(series["x"], series["y"], alpha=spec["alpha"], color=spec["color"])
+    elif kind == "binned":
+        ax.stairs(series["counts"], series["edges"], fill=True, color=spec["color"], alpha=spec["alpha"])
+        ax.set_xscale(spec["xscale"])
+    elif kind == "density":
+        counts = np.ma.masked_equal(series["counts"].T, 0)
+        mesh = ax.pcolormesh(series["x_edges"], series["y_edges"], counts, cmap="Greens",
+                             norm=LogNorm(vmin=1, vmax=max(counts.max() or 1, 1)))
+        ax.set_xscale(spec["xscale"])
+        ax.set_yscale(spec["yscale"])
+        figure.colorbar(mesh, ax=ax, label="Holdings per bin")
+    else:
+        raise ValueError(f"Unknown chart kind: {kind}")
+
+    if "xlabel" in spec:
+        ax.set_xlabel(spec["xlabel"])
+        ax.set_ylabel(spec["ylabel"])
+    ax.set_title(spec["title"])
+    if spec.get("rotate_labels"):
+        for label in ax.get_xticklabels():
+            label.set_rotation(45)
+            label.set_horizontalalignment("right")
+    if spec.get("tight_layout"):
+        figure.tight_layout()
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    figure.savefig(tmp_path, format="png", metadata={DIGEST_KEY: DIGEST_PREFIX + (digest or chart_digest(spec))})
+    os.replace(tmp_path, path)
+    return path
+
+
+def _draw_task(task):
+    spec, path, digest = task
+    return draw(spec, path, digest)
+
+
+def render_charts(charts, workers=1):
+    """
+    Renders charts whose image is missing or was drawn from different inputs.
+    :param charts: Dictionary of output path -> chart spec
+    :param workers: Processes to render with; 1 renders in this process
+    :return: Dictionary with the number of charts 'rendered' and 'skipped'
+    """
+    stale = []
+    for path, spec in charts.items():
+        digest = chart_digest(spec)
+        if stored_digest(path) != digest:
+            stale.append((spec, path, digest))
+
+    if workers > 1 and len(stale) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(stale)), mp_context=multiprocessing.get_context("spawn")) as executor:
+            list(executor.map(_draw_task, stale))
+    else:
+        for task in stale:
+            _draw_task(task)
+    return {"rendered": len(stale), "skipped": len(charts) - len(stale)}
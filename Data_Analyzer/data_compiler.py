@@ -1,7 +1,19 @@
+import os
+import json
+import multiprocessing
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
-from docx import Document
-from docx.shared import Inches
+from Data_Analyzer.docx_tables import iter_docx_tables
+from Data_Analyzer.holdings_store import ARROW_SUFFIX, METRICS_SUBDIR, arrow_path_for, metrics_path_for, read_frame, write_frame
+from Data_Analyzer.report_templates import COMPILED_REPORT_LAYOUT
+from Data_Analyzer.report_renderers import DEFAULT_REPORT_FORMATS, ReportRenderer, parse_formats
+from misc.document_store import file_sha256
+
+# Sidecar files of a compiled report, next to it: '<report>.index.json' and '<report>.rows.arrow'
+COMPILE_INDEX_SUFFIX = ".index.json"
+COMPILE_ROWS_SUFFIX = ".rows.arrow"
+REPORT_COLUMN = "Report"
 
 def extract_fund_name_and_market(filename):
     """Extracts the fund name and market from the filename."""
@@ -11,68 +23,224 @@ def extract_fund_name_and_market(filename):
     return fund_name.strip(), market.strip()
 
 def extract_table_from_docx(file_path):
-    """Extracts the numerical data table from a Word document."""
-    doc = Document(file_path)
-    for table in doc.tables:
-        data = []
-        for row in table.rows:
-            data.append([cell.text.strip() for cell in row.cells])
-        df = pd.DataFrame(data)
-        if df.shape[1] == 2:  # Ensures it's a metric-value table
-            return df
+    """
+    Extracts the numerical data table (the first two-column table) from a Word document.
+    Streams word/document.xml out of the .docx with iterparse, without loading the whole
+    document, and stops reading at the first matching table.
+    """
+    for rows in iter_docx_tables(file_path):
+        if max((len(row) for row in rows), default=0) == 2:  # Ensures it's a metric-value table
+            return pd.DataFrame(rows)
     return None
 
-def compile_financial_data(input_folder, output_file):
-    """Compiles financial data from multiple Word reports into a structured summary document."""
+def load_report_metrics(file_path):
+    """
+    Loads the Metric/Value table of a per-fund report.
+    Prefers the columnar metrics file written by the analysis stage and only falls back to
+    parsing the Word table for reports produced before those files existed.
+    """
+    metrics_file = Path(metrics_path_for(file_path))
+    if metrics_file.exists():
+        return read_frame(metrics_file)
+
+    df = extract_table_from_docx(file_path)
+    if df is None:
+        return None
+    df.columns = ["Metric", "Value"]
+    df = df[df["Metric"] != "Metric"]  # Header row of the Word table
+    df["Value"] = pd.to_numeric(df["Value"].str.replace(",", ""), errors="coerce")
+    return df.reset_index(drop=True)
+
+def find_reports(input_path):
+    """
+    Lists the per-fund reports of a folder as their .docx paths, sorted by name.
+    Reports written without a Word copy are found through their metrics file.
+    """
+    reports = {file.name: file for file in input_path.glob("*.docx")}
+    for metrics_file in (input_path / METRICS_SUBDIR).glob(f"*{ARROW_SUFFIX}"):
+        name = metrics_file.stem + ".docx"
+        reports.setdefault(name, input_path / name)
+    return [reports[name] for name in sorted(reports)]
+
+def report_source(file):
+    """Returns the file a report's rows are read from: its metrics file when present, else the .docx."""
+    metrics_file = Path(metrics_path_for(file))
+    return metrics_file if metrics_file.exists() else Path(file)
+
+class CompileIndex:
+    """
+    Sidecar index of a compiled report.
+
+    Records, per per-fund report, the hash of the file its rows were read from and keeps the
+    extracted rows themselves, so a rerun only re-reads reports that are new or changed and
+    drops the rows of reports that were removed.
+    """
+
+    def __init__(self, output_path):
+        """
+        Loads the index of a compiled report, starting empty if there is none yet.
+        :param output_path: Path of the compiled report
+        """
+        stem = os.path.splitext(str(output_path))[0]
+        self.index_path = stem + COMPILE_INDEX_SUFFIX
+        self.rows_path = stem + COMPILE_ROWS_SUFFIX
+        self.reports = {}
+        self.formats = []
+        self.outputs = []
+        self.rows = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.reports = data.get("reports", {})
+            self.formats = data.get("formats", [])
+            self.outputs = data.get("outputs", [])
+        if os.path.exists(self.rows_path):
+            rows = read_frame(self.rows_path)
+            for name, group in rows.groupby(REPORT_COLUMN, sort=False):
+                self.rows[name] = group.drop(columns=REPORT_COLUMN).reset_index(drop=True)
+
+    def is_current(self, name, source):
+        """
+        True if the report was read from the same, unchanged file.
+        The hash is only computed when the file's size or modification time differ.
+        """
+        entry = self.reports.get(name)
+        if entry is None or entry["source"] != str(source) or (entry["rows"] and name not in self.rows):
+            return False
+        stat = os.stat(source)
+        if entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            return True
+        if entry["sha256"] != file_sha256(source):
+            return False
+        entry["size"], entry["mtime"] = stat.st_size, stat.st_mtime
+        return True
+
+    def update(self, name, source, rows):
+        """Records the rows read from a report (None when it has no data table)."""
+        stat = os.stat(source)
+        self.reports[name] = {
+            "source": str(source),
+            "sha256": file_sha256(source),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "rows": rows is not None,
+        }
+        if rows is None:
+            self.rows.pop(name, None)
+        else:
+            self.rows[name] = rows
+
+    def prune(self, names):
+        """Forgets reports not in names; returns the names removed."""
+        removed = sorted(set(self.reports) - set(names))
+        for name in removed:
+            del self.reports[name]
+            self.rows.pop(name, None)
+        return removed
+
+    def is_rendered(self, formats):
+        """True if the compiled outputs were written in these formats and all still exist."""
+        return (
+            self.formats == list(formats)
+            and bool(self.outputs)
+            and all(os.path.exists(output) for output in self.outputs)
+        )
+
+    def save(self, names, formats, outputs):
+        """
+        Writes the index and the rows of the given reports, in that order.
+        :param names: Report names in compile order
+        :param formats: Formats the compiled report was rendered in
+        :param outputs: Paths of the compiled outputs
+        """
+        self.formats = list(formats)
+        self.outputs = [str(output) for output in outputs]
+        frames = [self.rows[name].assign(**{REPORT_COLUMN: name}) for name in names if name in self.rows]
+        if frames:
+            write_frame(pd.concat(frames, ignore_index=True), self.rows_path)
+        elif os.path.exists(self.rows_path):
+            os.remove(self.rows_path)
+        self.save_index()
+
+    def save_index(self):
+        """Writes only the index, for runs where no rows changed."""
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"formats": self.formats, "outputs": self.outputs, "reports": self.reports},
+                      f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+def load_reports(files, workers=1):
+    """
+    Loads the metric tables of several reports, in a process pool when workers > 1.
+    Returns one DataFrame (or None) per file, in the order of files.
+    Workers are spawned, not forked, as the pipeline calls this from a stage thread.
+    """
+    if workers > 1 and len(files) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(files)), mp_context=multiprocessing.get_context("spawn")) as executor:
+            return list(executor.map(load_report_metrics, files, chunksize=max(1, len(files) // (workers * 4))))
+    return [load_report_metrics(file) for file in files]
+
+def compile_financial_data(input_folder, output_file, report_formats=DEFAULT_REPORT_FORMATS, workers=None):
+    """
+    Compiles financial data from multiple per-fund reports into a structured summary document.
+    Compilation is incremental: a sidecar CompileIndex keeps the rows of every report, so only
+    new or changed reports are read (concurrently over workers processes, default one per CPU).
+    """
     input_path = Path(input_folder)
     output_path = Path(output_file)
+    report_formats = parse_formats(report_formats)
     
     # Ensure the output directory exists
     output_path.parent.mkdir(parents=True, exist_ok=True)
     
-    compiled_data = []
-    
     if not any(input_path.iterdir()):
         print(f"No Word documents found in {input_folder}")
         return
     
-    for file in input_path.glob("*.docx"):
+    # Only new or changed reports are read; the rows of the others come from the index
+    index = CompileIndex(output_path)
+    files = find_reports(input_path)
+    names = [file.name for file in files]
+    sources = {file.name: report_source(file) for file in files}
+    changed = [file for file in files if not index.is_current(file.name, sources[file.name])]
+    removed = index.prune(names)
+    print(f"Compile index: {len(files) - len(changed)} unchanged, {len(changed)} new or changed, {len(removed)} removed")
+    
+    for file, df in zip(changed, load_reports(changed, workers or os.cpu_count() or 1)):
         fund_name, market = extract_fund_name_and_market(file.name)
-        df = extract_table_from_docx(file)
         
         if df is not None:
-            df.columns = ["Metric", "Value"]
             df.insert(0, "Market", market)
             df.insert(0, "Fund Name", fund_name)
-            compiled_data.append(df)
         else:
             print(f"No valid data table found in {file.name}, skipping.")
+        index.update(file.name, sources[file.name], df)
+    
+    compiled_arrow = arrow_path_for(output_path)
+    if not changed and not removed and os.path.exists(compiled_arrow) and index.is_rendered(report_formats):
+        index.save_index()
+        print(f"Compiled report is up to date: {output_file}")
+        return
     
     # Merge all extracted data
+    compiled_data = [index.rows[name] for name in names if name in index.rows]
     if not compiled_data:
+        index.save(names, report_formats, [])
         print("No valid data extracted from documents.")
         return
     final_df = pd.concat(compiled_data, ignore_index=True)
+
+    # Columnar copy read by the restructure stage; the report below is for people
+    write_frame(final_df, compiled_arrow)
     
-    # Create a new Word document
-    output_doc = Document()
-    output_doc.add_heading('LGPS Compiled Financial Report', level=1)
-    
-    table = output_doc.add_table(rows=1, cols=len(final_df.columns))
-    table.autofit = True
-    
-    hdr_cells = table.rows[0].cells
-    for i, column_name in enumerate(final_df.columns):
-        hdr_cells[i].text = str(column_name)
-    
-    for _, row in final_df.iterrows():
-        row_cells = table.add_row().cells
-        for i, value in enumerate(row):
-            row_cells[i].text = str(value)
-    
-    # Save the output document
-    output_doc.save(output_path)
-    print(f"Compiled report saved as: {output_file}")
+    report = ReportRenderer('lgps_compiled_report', COMPILED_REPORT_LAYOUT, formats=report_formats, table_options={
+        'autofit': True,
+        'default_format': lambda value: f"{value:.2f}" if isinstance(value, float) else str(value),
+    })
+    report_paths = report.render(str(output_path), tables={'compiled': final_df})
+    index.save(names, report_formats, [compiled_arrow, *report_paths])
+    print(f"Compiled report saved as: {', '.join(report_paths)}")
 
 # Run the script
 if __name__ == "__main__":
@@ -0,0 +1,165 @@
+"""
+Bulk Word table writer and streaming table reader.
+
+python-docx's table.add_row().cells rebuilds the cell collection of the whole table on
+every call, so filling a table row by row is quadratic. add_dataframe_table formats each
+column of a DataFrame once, builds the table XML in a single string (the same markup
+python-docx produces for add_table plus cell.text) and parses it once.
+build_dataframe_table returns the table unplaced, for callers that insert it at a
+specific point such as a template placeholder.
+
+iter_docx_tables reads tables back without python-docx: it streams word/document.xml out
+of the .docx with lxml iterparse, one table at a time, so callers looking for one table
+stop reading as soon as they find it.
+"""
+import zipfile
+from xml.sax.saxutils import escape
+
+from lxml import etree
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+from docx.shared import Emu
+from docx.table import Table
+
+ALIGNMENTS = {"left": "left", "center": "center", "right": "right"}
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+W_TBL = f"{{{W_NS}}}tbl"
+W_TR = f"{{{W_NS}}}tr"
+W_TC = f"{{{W_NS}}}tc"
+W_P = f"{{{W_NS}}}p"
+W_T = f"{{{W_NS}}}t"
+# Run content that python-docx's cell.text turns into characters
+W_CHARACTERS = {f"{{{W_NS}}}tab": "\t", f"{{{W_NS}}}br": "\n", f"{{{W_NS}}}cr": "\n"}
+
+
+def _run_xml(text):
+    # Same run content as python-docx's cell.text: tabs and line breaks become elements
+    parts = []
+    buffer = []
+
+    def flush():
+        if buffer:
+            chunk = "".join(buffer)
+            space = ' xml:space="preserve"' if chunk.strip() != chunk else ""
+            parts.append(f"<w:t{space}>{escape(chunk)}</w:t>")
+            buffer.clear()
+
+    for char in text:
+        if char == "\t":
+            flush()
+            parts.append("<w:tab/>")
+        elif char in "\r\n":
+            flush()
+            parts.append("<w:br/>")
+        else:
+            buffer.append(char)
+    flush()
+    return "".join(parts)
+
+
+def _cell_xml(text, width, alignment):
+    paragraph_properties = f'<w:pPr><w:jc w:val="{alignment}"/></w:pPr>' if alignment else ""
+    return (
+        f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{width}"/></w:tcPr>'
+        f"<w:p>{paragraph_properties}<w:r>{_run_xml(text)}</w:r></w:p></w:tc>"
+    )
+
+
+def format_columns(df, formats=None, default_format=str):
+    """
+    Formats a DataFrame column by column for display.
+    :param df: DataFrame to format
+    :param formats: Dictionary of column name -> callable or format string (e.g. '{:,.2f}')
+    :param default_format: Callable used for columns without an entry in formats
+    :return: One list of strings per column, in column order
+    """
+    formats = formats or {}
+    formatted = []
+    for column_index, column in enumerate(df.columns):
+        fmt = formats.get(column, default_format)
+        if isinstance(fmt, str):
+            fmt = fmt.format
+        # Positional access keeps duplicate column names working
+        formatted.append([fmt(value) for value in df.iloc[:, column_index].tolist()])
+    return formatted
+
+
+def build_dataframe_table(doc, df, formats=None, default_format=str, alignments=None, style=None, header=True,
+                          autofit=None):
+    """
+    Builds a table holding a DataFrame for a document, without placing it yet.
+    :param doc: python-docx Document the table will be part of
+    :param df: DataFrame to write; column names form the header row
+    :param formats: Dictionary of column name -> callable or format string (e.g. '{:,.2f}')
+    :param default_format: Callable used for columns without an entry in formats
+    :param alignments: Dictionary of column name -> 'left', 'center' or 'right'
+    :param style: Table style name, None keeps the document's default table style
+    :param header: Whether to write the column names as the first row
+    :param autofit: Sets table.autofit when given
+    :return: The new docx.table.Table
+    """
+    alignments = alignments or {}
+    columns = list(df.columns)
+    col_count = len(columns)
+    width = Emu(doc._block_width // col_count).twips if col_count else 0
+
+    formatted = format_columns(df, formats, default_format)
+    column_alignments = [ALIGNMENTS.get(alignments.get(column)) for column in columns]
+
+    rows = []
+    if header:
+        rows.append("".join(_cell_xml(str(column), width, None) for column in columns))
+    for row in zip(*formatted):
+        rows.append("".join(
+            _cell_xml(text, width, alignment) for text, alignment in zip(row, column_alignments)
+        ))
+
+    xml = (
+        f"<w:tbl {nsdecls('w')}>"
+        '<w:tblPr><w:tblW w:type="auto" w:w="0"/>'
+        '<w:tblLook w:firstColumn="1" w:firstRow="1" w:lastColumn="0" w:lastRow="0" '
+        'w:noHBand="0" w:noVBand="1" w:val="04A0"/></w:tblPr>'
+        "<w:tblGrid>" + f'<w:gridCol w:w="{width}"/>' * col_count + "</w:tblGrid>"
+        + "".join(f"<w:tr>{row}</w:tr>" for row in rows)
+        + "</w:tbl>"
+    )
+    table = Table(parse_xml(xml), doc._body)
+    table.style = style
+    if autofit is not None:
+        table.autofit = autofit
+    return table
+
+
+def add_dataframe_table(doc, df, **options):
+    """
+    Appends a table holding a DataFrame to the end of a document in one step.
+    Takes the same options as build_dataframe_table.
+    :return: The new docx.table.Table
+    """
+    table = build_dataframe_table(doc, df, **options)
+    doc.element.body._insert_tbl(table._tbl)
+    return table
+
+
+def _cell_text(cell):
+    # Same text as python-docx's cell.text: paragraphs joined by newlines
+    paragraphs = []
+    for paragraph in cell.iter(W_P):
+        text = []
+        for node in paragraph.iter(W_T, *W_CHARACTERS):
+            text.append((node.text or "") if node.tag == W_T else W_CHARACTERS[node.tag])
+        paragraphs.append("".join(text))
+    return "\n".join(paragraphs)
+
+
+def iter_docx_tables(path):
+    """
+    Yields the tables of a .docx in document order, streaming.
+    :param path: Path of the .docx
+    :return: Iterator of tables, each a list of rows of stripped cell texts
+    """
+    with zipfile.ZipFile(path) as archive, archive.open("word/document.xml") as document_xml:
+        for _, table in etree.iterparse(document_xml, events=("end",), tag=W_TBL):
+            yield [[_cell_text(cell).strip() for cell in row.iterfind(W_TC)] for row in table.iterfind(W_TR)]
+            table.clear()
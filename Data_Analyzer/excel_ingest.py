@@ -0,0 +1,217 @@
+"""
+Single-open, projected ingestion of Brunel holdings workbooks.
+
+Each workbook is opened once with a read-only openpyxl reader and its sheets are streamed
+row by row, keeping only the columns the holdings metrics use. Parsed sheets are cached as
+Arrow files keyed by the workbook's content hash, so an unchanged workbook is never parsed
+twice.
+"""
+import os
+import json
+import hashlib
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from misc.document_store import file_sha256
+from Data_Analyzer.holdings_store import ARROW_SUFFIX, read_frame, write_frame
+from Data_Analyzer.holdings_schema import SHARED_CATEGORIES, normalise_holdings
+
+EXCEL_CACHE_DIR = "Data/cache/excel_frames"
+HOLDINGS_COLUMNS = (
+    "Base Market Value",
+    "Issue Country Name",
+    "Incorporated Country Name",
+    "Investment Type Name",
+    "Major Industry Name",
+)
+NUMERIC_COLUMNS = ("Base Market Value",)
+
+
+def read_sheet_columns(worksheet, columns):
+    """
+    Reads the requested columns of a worksheet into a DataFrame.
+    The first row is the header; header names are stripped before matching and columns
+    missing from the sheet are left out.
+    :param worksheet: Read-only openpyxl worksheet
+    :param columns: Column names to keep
+    """
+    # Read-only sheets trust the stored dimensions, which some exporters get wrong
+    worksheet.reset_dimensions()
+    rows = worksheet.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return pd.DataFrame()
+
+    positions = {}
+    for index, name in enumerate(header):
+        name = str(name).strip() if name is not None else ""
+        if name in columns and name not in positions:
+            positions[name] = index
+    wanted = [(name, positions[name]) for name in columns if name in positions]
+
+    values = {name: [] for name, _ in wanted}
+    for row in rows:
+        if not any(cell is not None for cell in row):
+            continue
+        for name, index in wanted:
+            values[name].append(row[index] if index < len(row) else None)
+
+    for name in values:
+        if name in NUMERIC_COLUMNS:
+            values[name] = pd.to_numeric(pd.Series(values[name], dtype=object), errors="coerce")
+        else:
+            # Name columns occasionally hold numbers; keep them as text so each column has one type
+            values[name] = [value if value is None or isinstance(value, str) else str(value) for value in values[name]]
+    return pd.DataFrame(values)
+
+
+class HoldingsWorkbookReader:
+    """
+    Reads holdings workbooks sheet by sheet, keeping only HOLDINGS_COLUMNS.
+    Every frame is returned in the normalised holdings schema, encoded against one shared
+    CategoryDictionary.
+
+    Parsed sheets are cached under '<cache_dir>/<columns key>/<sha[:2]>/<sha256>/<sheet>.arrow'
+    and a 'sheets.json' marker listing the sheet names in workbook order; the columns key
+    changes whenever the projected columns do.
+    """
+
+    def __init__(self, columns=HOLDINGS_COLUMNS, cache_dir=EXCEL_CACHE_DIR, categories=SHARED_CATEGORIES):
+        """
+        Initializes the reader.
+        :param columns: Column names to load from every sheet
+        :param cache_dir: Root folder of the parsed-sheet cache, None disables caching
+        :param categories: CategoryDictionary the dimension columns are encoded against
+        """
+        self.columns = tuple(columns)
+        self.cache_dir = cache_dir
+        self.categories = categories
+        self.columns_key = hashlib.sha1("\n".join(self.columns).encode("utf-8")).hexdigest()[:8]
+        self.hits = 0
+        self.misses = 0
+
+    def _workbook_dir(self, sha256):
+        return os.path.join(self.cache_dir, self.columns_key, sha256[:2], sha256)
+
+    def _marker_sheet_names(self, sha256):
+        if self.cache_dir is None:
+            return None
+        marker = os.path.join(self._workbook_dir(sha256), "sheets.json")
+        if not os.path.exists(marker):
+            return None
+        with open(marker, "r", encoding="utf-8") as f:
+            return json.load(f)["sheets"]
+
+    def _cached_sheet_names(self, sha256):
+        """Returns the sheet names if every sheet of the workbook is cached, else None."""
+        sheet_names = self._marker_sheet_names(sha256)
+        if sheet_names is None:
+            return None
+        sheet_paths = [self._sheet_path(sha256, index) for index in range(len(sheet_names))]
+        return sheet_names if all(os.path.exists(path) for path in sheet_paths) else None
+
+    def _sheet_path(self, sha256, index):
+        return os.path.join(self._workbook_dir(sha256), f"{index}{ARROW_SUFFIX}")
+
+    def _write_marker(self, sha256, sheet_names):
+        if self.cache_dir is None:
+            return
+        os.makedirs(self._workbook_dir(sha256), exist_ok=True)
+        marker = os.path.join(self._workbook_dir(sha256), "sheets.json")
+        tmp_path = f"{marker}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"sheets": sheet_names}, f)
+        os.replace(tmp_path, marker)
+
+    def _open(self, file_path, sha256):
+        workbook = load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+        self._write_marker(sha256, list(workbook.sheetnames))
+        return workbook
+
+    def _parse_sheet(self, workbook, sha256, index, sheet_name):
+        self.misses += 1
+        data = normalise_holdings(read_sheet_columns(workbook[sheet_name], self.columns), self.categories)
+        if self.cache_dir is not None:
+            write_frame(data, self._sheet_path(sha256, index))
+        return data
+
+    def _read_cached_sheet(self, sha256, index):
+        if self.cache_dir is None or not os.path.exists(self._sheet_path(sha256, index)):
+            return None
+        self.hits += 1
+        return normalise_holdings(read_frame(self._sheet_path(sha256, index)), self.categories)
+
+    def sheet_names(self, file_path, sha256=None):
+        """Returns the sheet names of a workbook, from the cache when it has been opened before."""
+        sha256 = sha256 or file_sha256(file_path)
+        sheet_names = self._marker_sheet_names(sha256)
+        if sheet_names is not None:
+            return sheet_names
+        workbook = self._open(file_path, sha256)
+        try:
+            return list(workbook.sheetnames)
+        finally:
+            workbook.close()
+
+    def iter_sheets(self, file_path, sha256=None, skip_errors=False):
+        """
+        Yields (sheet name, DataFrame) for every sheet of a workbook, one sheet at a time.
+        The workbook is opened once; cached sheets are read back without opening it at all.
+        :param file_path: Path to the .xlsx file
+        :param sha256: Content hash of the workbook if already known
+        :param skip_errors: Yield (sheet name, exception) for a sheet that cannot be read and
+                            go on with the next one, instead of raising
+        """
+        sha256 = sha256 or file_sha256(file_path)
+        cached = self._cached_sheet_names(sha256)
+        if cached is not None:
+            for index, sheet_name in enumerate(cached):
+                yield sheet_name, self._read_sheet(skip_errors, self._read_cached_sheet, sha256, index)
+            return
+
+        workbook = self._open(file_path, sha256)
+        try:
+            for index, sheet_name in enumerate(workbook.sheetnames):
+                yield sheet_name, self._read_sheet(skip_errors, self._load_open_sheet, workbook, sha256, index, sheet_name)
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _read_sheet(skip_errors, read, *args):
+        if not skip_errors:
+            return read(*args)
+        try:
+            return read(*args)
+        except Exception as e:
+            return e
+
+    def _load_open_sheet(self, workbook, sha256, index, sheet_name):
+        data = self._read_cached_sheet(sha256, index)
+        if data is None:
+            data = self._parse_sheet(workbook, sha256, index, sheet_name)
+        return data
+
+    def load_sheet(self, file_path, sheet_name, sha256=None):
+        """
+        Returns the projected DataFrame of a single sheet.
+        Only that sheet is parsed, so workers can load the sheets of one workbook independently.
+        """
+        sha256 = sha256 or file_sha256(file_path)
+        sheet_names = self.sheet_names(file_path, sha256)
+        if sheet_name not in sheet_names:
+            raise ValueError(f"Worksheet named '{sheet_name}' not found in {file_path}")
+        index = sheet_names.index(sheet_name)
+        data = self._read_cached_sheet(sha256, index)
+        if data is not None:
+            return data
+        workbook = self._open(file_path, sha256)
+        try:
+            return self._parse_sheet(workbook, sha256, index, sheet_name)
+        finally:
+            workbook.close()
+
+    def report(self):
+        """Prints and returns the sheet hit/miss counts."""
+        print(f"📗 Excel cache: {self.hits} sheet hits, {self.misses} sheet misses")
+        return {"hits": self.hits, "misses": self.misses}
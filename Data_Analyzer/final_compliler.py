@@ -1,9 +1,25 @@
 import os
 import pandas as pd
-import matplotlib.pyplot as plt
 from docx import Document
 from docx.shared import Inches
 from pathlib import Path
+from Data_Analyzer.holdings_store import arrow_path_for, read_frame
+from Data_Analyzer.metrics_engine import Breakdown, MetricSet, Sum, column_contains
+from Data_Analyzer.fund_classifier import default_classifier
+from Data_Analyzer.docx_tables import add_dataframe_table
+from Data_Analyzer.charts import bar_chart, pie_chart, render_charts
+
+# Summary metrics of the final report, computed in one pass over the organized table
+FINAL_REPORT_METRICS = MetricSet(
+    masks={'uk': column_contains("Fund", "UK")},
+    metrics=[
+        Sum("Total Assets", "Base Value"),
+        Sum("UK Investments", "Base Value", mask='uk'),
+        Breakdown("Asset Class Breakdown", "Asset Class", "Base Value"),
+        Breakdown("Investment Type Breakdown", "Investment Type", "Base Value"),
+        Breakdown("Sector Breakdown", "Sector", "Base Value"),
+    ],
+)
 
 def read_docx_table(docx_path):
     """
@@ -27,125 +43,58 @@ def convert_numeric_columns(df, numeric_cols):
     Convert the specified columns to numeric values (removing commas if needed).
     """
     for col in numeric_cols:
-        if col in df.columns:
+        if col in df.columns and df[col].dtype == object:
             df[col] = pd.to_numeric(df[col].str.replace(',', ''), errors='coerce')
     return df
 
-def classify_asset(fund_name):
-    """
-    Heuristically classifies a fund into an asset class.
-    Adjust keywords as needed.
-    """
-    name = fund_name.lower()
-    if "equity" in name or "stocks" in name or "listed" in name:
-        return "Public Stocks"
-    elif "bond" in name or "credit" in name:
-        return "Bonds"
-    elif "private-market" in name or "private equity" in name:
-        return "Private Equity"
-    elif "alternatives" in name:
-        return "Alternatives"
-    elif "multi-asset" in name:
-        return "Multi-Asset"
-    else:
-        return "Other"
-
-def classify_investment_type(fund_name):
-    """
-    Classifies a fund as Direct or Indirect.
-    Heuristic: if the fund name contains the word 'fund' then it is held indirectly via an investment manager,
-    otherwise it is a direct investment.
-    """
-    if "fund" in fund_name.lower():
-        return "Indirect"
-    else:
-        return "Direct"
-
-def classify_sector(fund_name):
-    """
-    Heuristically assigns a sector to a fund.
-    Since the raw data does not include a sector field,
-    this function uses keywords in the fund name.
-    You can adjust or extend this mapping as needed.
-    """
-    name = fund_name.lower()
-    # Example mapping (adjust as appropriate):
-    if "emerging" in name:
-        return "Emerging Markets"
-    elif "global" in name:
-        return "Global Equities"
-    elif "uk" in name:
-        return "Public Stocks"
-    elif "credit" in name or "bond" in name:
-        return "Bonds"
-    elif "private-market" in name:
-        return "Private Equity"
-    else:
-        return "Other"
-
-def generate_charts(df, output_dir):
+def generate_charts(df, output_dir, summary=None, workers=4):
     """
     Generate and save four charts:
       1. Bar chart for asset class breakdown.
       2. Pie chart for direct vs indirect investments.
       3. Bar chart for Base Value by Fund.
       4. Pie chart for sector breakdown.
+    The breakdowns are taken from summary (FINAL_REPORT_METRICS results) when given.
     Returns a dictionary with paths to the generated images.
     """
     os.makedirs(output_dir, exist_ok=True)
     charts = {}
+    specs = {}
+    if summary is None:
+        summary = FINAL_REPORT_METRICS.compute(df)
 
     # 1. Asset Class Breakdown (Bar Chart)
-    asset_class_summary = df.groupby("Asset Class")["Base Value"].sum().reset_index()
-    plt.figure(figsize=(8,6))
-    plt.bar(asset_class_summary["Asset Class"], asset_class_summary["Base Value"])
-    plt.xlabel("Asset Class")
-    plt.ylabel("Total Base Value (GBP)")
-    plt.title("Asset Class Breakdown")
-    plt.xticks(rotation=45, ha='right')
-    plt.tight_layout()
-    asset_class_chart_path = os.path.join(output_dir, "asset_class_breakdown.png")
-    plt.savefig(asset_class_chart_path)
-    plt.close()
-    charts["asset_class"] = asset_class_chart_path
+    asset_class_summary = summary["Asset Class Breakdown"]
+    charts["asset_class"] = os.path.join(output_dir, "asset_class_breakdown.png")
+    specs[charts["asset_class"]] = bar_chart(asset_class_summary["Asset Class"], asset_class_summary["Base Value"],
+                                             "Asset Class Breakdown", "Asset Class", "Total Base Value (GBP)")
 
     # 2. Direct vs Indirect Investments (Pie Chart)
-    investment_type_summary = df.groupby("Investment Type")["Base Value"].sum().reset_index()
-    plt.figure(figsize=(8,6))
-    plt.pie(investment_type_summary["Base Value"], labels=investment_type_summary["Investment Type"], autopct='%1.1f%%')
-    plt.title("Direct vs Indirect Investments")
-    plt.tight_layout()
-    investment_type_chart_path = os.path.join(output_dir, "direct_vs_indirect.png")
-    plt.savefig(investment_type_chart_path)
-    plt.close()
-    charts["investment_type"] = investment_type_chart_path
+    investment_type_summary = summary["Investment Type Breakdown"]
+    charts["investment_type"] = os.path.join(output_dir, "direct_vs_indirect.png")
+    specs[charts["investment_type"]] = pie_chart(investment_type_summary["Investment Type"], investment_type_summary["Base Value"],
+                                                 "Direct vs Indirect Investments", tight_layout=True)
 
     # 3. Previous Bar Graph: Base Value by Fund
-    plt.figure(figsize=(10,6))
-    plt.bar(df["Fund"], df["Base Value"])
-    plt.xlabel("Fund")
-    plt.ylabel("Base Value")
-    plt.title("Base Value by Fund")
-    plt.xticks(rotation=45, ha="right")
-    plt.tight_layout()
-    base_value_chart_path = os.path.join(output_dir, "base_value_by_fund.png")
-    plt.savefig(base_value_chart_path)
-    plt.close()
-    charts["base_value_by_fund"] = base_value_chart_path
+    charts["base_value_by_fund"] = os.path.join(output_dir, "base_value_by_fund.png")
+    specs[charts["base_value_by_fund"]] = bar_chart(df["Fund"], df["Base Value"], "Base Value by Fund", "Fund", "Base Value",
+                                                    figsize=(10, 6))
 
     # 4. Sector Breakdown (Pie Chart)
-    sector_summary = df.groupby("Sector")["Base Value"].sum().reset_index()
-    plt.figure(figsize=(8,6))
-    plt.pie(sector_summary["Base Value"], labels=sector_summary["Sector"], autopct='%1.1f%%')
-    plt.title("Sector Breakdown")
-    plt.tight_layout()
-    sector_chart_path = os.path.join(output_dir, "sector_breakdown.png")
-    plt.savefig(sector_chart_path)
-    plt.close()
-    charts["sector_breakdown"] = sector_chart_path
+    sector_summary = summary["Sector Breakdown"]
+    charts["sector_breakdown"] = os.path.join(output_dir, "sector_breakdown.png")
+    specs[charts["sector_breakdown"]] = pie_chart(sector_summary["Sector"], sector_summary["Base Value"],
+                                                  "Sector Breakdown", tight_layout=True)
 
+    # Unchanged charts are skipped; the rest are drawn in parallel
+    render_charts(specs, workers=workers)
     return charts
 
+def add_breakdown_table(doc, breakdown, label):
+    """Adds a two-column table of a breakdown: label and total Base Value in GBP."""
+    table_df = breakdown[[label, "Base Value"]].rename(columns={"Base Value": "Total Base Value (GBP)"})
+    return add_dataframe_table(doc, table_df, formats={"Total Base Value (GBP)": "{:.2f}"})
+
 def generate_report(enhanced_summary, charts, output_docx):
     """
     Generates a DOCX report that includes summary numbers, tables, charts,
@@ -162,28 +111,14 @@ def generate_report(enhanced_summary, charts, output_docx):
     # Asset Class Breakdown Table & Chart
     doc.add_heading("Asset Class Breakdown", level=2)
     asset_class_data = enhanced_summary['Asset Class Breakdown']
-    table = doc.add_table(rows=1, cols=2)
-    hdr_cells = table.rows[0].cells
-    hdr_cells[0].text = "Asset Class"
-    hdr_cells[1].text = "Total Base Value (GBP)"
-    for _, row in asset_class_data.iterrows():
-        row_cells = table.add_row().cells
-        row_cells[0].text = str(row["Asset Class"])
-        row_cells[1].text = f"{row['Base Value']:.2f}"
+    add_breakdown_table(doc, asset_class_data, "Asset Class")
     doc.add_paragraph("Chart: Asset Class Breakdown")
     doc.add_picture(charts["asset_class"], width=Inches(6))
     
     # Direct vs Indirect Investments Table & Chart
     doc.add_heading("Direct vs Indirect Investments", level=2)
     investment_data = enhanced_summary['Investment Type Breakdown']
-    table2 = doc.add_table(rows=1, cols=2)
-    hdr_cells = table2.rows[0].cells
-    hdr_cells[0].text = "Investment Type"
-    hdr_cells[1].text = "Total Base Value (GBP)"
-    for _, row in investment_data.iterrows():
-        row_cells = table2.add_row().cells
-        row_cells[0].text = str(row["Investment Type"])
-        row_cells[1].text = f"{row['Base Value']:.2f}"
+    add_breakdown_table(doc, investment_data, "Investment Type")
     doc.add_paragraph("Chart: Direct vs Indirect Investments")
     doc.add_picture(charts["investment_type"], width=Inches(6))
     
@@ -195,14 +130,7 @@ def generate_report(enhanced_summary, charts, output_docx):
     # Sector Breakdown Table & Chart
     doc.add_heading("Sector Breakdown", level=2)
     sector_data = enhanced_summary['Sector Breakdown']
-    table3 = doc.add_table(rows=1, cols=2)
-    hdr_cells = table3.rows[0].cells
-    hdr_cells[0].text = "Sector"
-    hdr_cells[1].text = "Total Base Value (GBP)"
-    for _, row in sector_data.iterrows():
-        row_cells = table3.add_row().cells
-        row_cells[0].text = str(row["Sector"])
-        row_cells[1].text = f"{row['Base Value']:.2f}"
+    add_breakdown_table(doc, sector_data, "Sector")
     doc.add_paragraph("Chart: Sector Breakdown")
     doc.add_picture(charts["sector_breakdown"], width=Inches(6))
     
@@ -211,43 +139,32 @@ def generate_report(enhanced_summary, charts, output_docx):
     doc.save(output_docx)
     print(f"Enhanced report generated: {output_docx}")
 
-def main(input_path, output_path):
+def main(input_path, output_path, charts_dir=None):
+    # Charts go to 'enhanced_charts' next to the final report unless charts_dir is given
+    charts_dir = charts_dir or os.path.join(output_path, "enhanced_charts")
     # Path to the organized report DOCX from your earlier processing
     input_docx = f"{input_path}LGPS_Compiled_Financial_Report_Organized.docx"
-    df = read_docx_table(input_docx)
+    organized_arrow = arrow_path_for(input_docx)
+    if os.path.exists(organized_arrow):
+        df = read_frame(organized_arrow)
+    else:
+        df = read_docx_table(input_docx)
     
     # Convert numeric columns to numbers
-    numeric_cols = ["Base Value", "Max of Local Price", "Private-Market-June", "Private-Markets-December", "Shares/Par"]
+    numeric_cols = ["Base Value", "Max of Local Price", "Shares/Par"]
     df = convert_numeric_columns(df, numeric_cols)
     
-    # Calculate total assets invested (sum of Base Value)
-    total_assets = df["Base Value"].sum()
-    
-    # Calculate UK investments: filter funds with "UK" in their name
-    uk_mask = df["Fund"].str.contains("UK", case=False, na=False)
-    uk_investments = df.loc[uk_mask, "Base Value"].sum()
-    
-    # Classify funds by asset class, investment type, and add a sector classification
-    df["Asset Class"] = df["Fund"].apply(classify_asset)
-    df["Investment Type"] = df["Fund"].apply(classify_investment_type)
-    df["Sector"] = df["Fund"].apply(classify_sector)
-    
-    # Group by asset class, investment type, and sector
-    asset_class_breakdown = df.groupby("Asset Class")["Base Value"].sum().reset_index()
-    investment_type_breakdown = df.groupby("Investment Type")["Base Value"].sum().reset_index()
-    sector_breakdown = df.groupby("Sector")["Base Value"].sum().reset_index()
+    # Classify funds by asset class, investment type and sector in one pass over the
+    # distinct fund names (rules in Data/config/fund_classification_rules.json)
+    classes = default_classifier().classify(df["Fund"], ["Asset Class", "Investment Type", "Sector"])
+    df[classes.columns] = classes
     
-    # Prepare enhanced summary data dictionary
-    enhanced_summary = {
-        "Total Assets": total_assets,
-        "UK Investments": uk_investments,
-        "Asset Class Breakdown": asset_class_breakdown,
-        "Investment Type Breakdown": investment_type_breakdown,
-        "Sector Breakdown": sector_breakdown
-    }
+    # Total assets (sum of Base Value), UK investments (funds with "UK" in their name) and
+    # the asset class, investment type and sector breakdowns, in one pass
+    enhanced_summary = FINAL_REPORT_METRICS.compute(df)
     
     # Generate charts (including the previous base value chart) and save them to an output folder
-    charts = generate_charts(df, output_dir="enhanced_charts")
+    charts = generate_charts(df, output_dir=charts_dir, summary=enhanced_summary)
     
     # Generate the final enhanced DOCX report
     output_docx = f"{output_path}Final_Report.docx"
@@ -1,129 +1,169 @@
 import os
-import pandas as pd
-import matplotlib.pyplot as plt
-from docx import Document
-from docx.shared import Inches
+import re
+import multiprocessing
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from Data_Analyzer.excel_ingest import HoldingsWorkbookReader
+from Data_Analyzer.metrics_engine import analyze_holdings
+from Data_Analyzer.report_templates import HOLDINGS_REPORT_LAYOUT
+from Data_Analyzer.report_renderers import DEFAULT_REPORT_FORMATS, ReportRenderer
+from Data_Analyzer.charts import bar_chart, pie_chart, render_charts
+
+# Set in each pool worker: bounds how many workbooks are being read at the same time
+_workbook_load_slots = None
+
+
+def _init_worker(load_slots):
+    global _workbook_load_slots
+    _workbook_load_slots = load_slots
+
+
+def _thousands(val):
+    return f"{val:,}" if isinstance(val, (int, float)) else str(val)
 
 class BrunelDataAnalyzer:
-    def __init__(self, input_directory, output_directory, supporting_files_directory):
+    def __init__(self, input_directory, output_directory, supporting_files_directory, report_formats=DEFAULT_REPORT_FORMATS):
         self.input_directory = input_directory
         self.output_directory = output_directory
         self.supporting_files_directory = supporting_files_directory
         os.makedirs(self.output_directory, exist_ok=True)
         os.makedirs(self.supporting_files_directory, exist_ok=True)
+        # Opens each workbook once and loads only the columns analyze_data uses
+        self.reader = HoldingsWorkbookReader()
+        # Numbers get thousands separators
+        self.report = ReportRenderer('brunel_holdings_report', HOLDINGS_REPORT_LAYOUT, formats=report_formats, table_options={
+            'autofit': True,
+            'default_format': _thousands,
+        })
+
+    def get_excel_files(self):
+        return sorted(
+            os.path.join(self.input_directory, file_name)
+            for file_name in os.listdir(self.input_directory)
+            if file_name.endswith('.xlsx')
+        )
 
     def get_excel_files_and_sheets(self):
         file_sheet_map = {}
-        for file_name in os.listdir(self.input_directory):
-            if file_name.endswith('.xlsx'):
-                file_path = os.path.join(self.input_directory, file_name)
-                try:
-                    excel_data = pd.ExcelFile(file_path)
-                    file_sheet_map[file_path] = excel_data.sheet_names
-                except Exception as e:
-                    print(f'Error reading {file_name}: {e}')
+        for file_path in self.get_excel_files():
+            try:
+                file_sheet_map[file_path] = self.reader.sheet_names(file_path)
+            except Exception as e:
+                print(f'Error reading {os.path.basename(file_path)}: {e}')
         return file_sheet_map
 
     def load_data(self, file_path, sheet_name):
-        data = pd.read_excel(file_path, sheet_name=sheet_name)
-        data.columns = data.columns.str.strip()  # Clean column names
-        return data
+        # Column names are stripped and projected by the reader
+        return self.reader.load_sheet(file_path, sheet_name)
 
     def analyze_data(self, data):
-        # Total AUM across the holdings
-        total_aum = data['Base Market Value'].sum()
-
-        # UK Investment Exposure: sum if either Issue or Incorporated Country is 'UNITED KINGDOM'
-        uk_investment = data[
-            (data['Issue Country Name'] == 'UNITED KINGDOM') |
-            (data['Incorporated Country Name'] == 'UNITED KINGDOM')
-        ]['Base Market Value'].sum()
-
-        # Breakdown by asset class (using 'Investment Type Name')
-        asset_class_breakdown = data.groupby('Investment Type Name')['Base Market Value'].sum().reset_index()
-
-        # Breakdown by sector (using 'Major Industry Name')
-        sector_breakdown = data.groupby('Major Industry Name')['Base Market Value'].sum().reset_index()
-
-        # Direct vs Indirect Investments:
-        # Direct: individual investments not made via funds
-        direct_investments = data[
-            ~data['Investment Type Name'].str.contains('FUND', na=False, case=False)
-        ]['Base Market Value'].sum()
-        # Indirect: investments through funds
-        indirect_investments = data[
-            data['Investment Type Name'].str.contains('FUND', na=False, case=False)
-        ]['Base Market Value'].sum()
-
-        # Create a summary DataFrame of key metrics
-        summary_data = pd.DataFrame({
-            'Metric': ['Total AUM (GBP)', 'UK Investment Exposure (GBP)', 
-                       'Direct Investments (GBP)', 'Indirect Investments (GBP)'],
-            'Value': [total_aum, uk_investment, direct_investments, indirect_investments]
-        })
-        return summary_data, asset_class_breakdown, sector_breakdown
-
-    def add_table_to_doc(self, doc, df, title):
-        doc.add_heading(title, level=2)
-        table = doc.add_table(rows=1, cols=len(df.columns))
-        table.autofit = True
-        hdr_cells = table.rows[0].cells
-        for i, col in enumerate(df.columns):
-            hdr_cells[i].text = str(col)
-        for _, row in df.iterrows():
-            row_cells = table.add_row().cells
-            for i, val in enumerate(row):
-                row_cells[i].text = f"{val:,}" if isinstance(val, (int, float)) else str(val)
-
-    def generate_report(self, file_path, sheet_name, summary_data, asset_class_breakdown, sector_breakdown):
-        base_name = os.path.splitext(os.path.basename(file_path))[0]
-        doc = Document()
-        doc.add_heading(f'{base_name} - Brunel LGPS Data Analysis Report', level=1)
+        # Declared once in HOLDINGS_METRICS and computed in a single pass
+        return analyze_holdings(data)
 
-        # Insert summary table
-        self.add_table_to_doc(doc, summary_data, 'Summary Metrics')
-
-        # Insert asset class breakdown table
-        self.add_table_to_doc(doc, asset_class_breakdown, 'Asset Class Breakdown')
-
-        # Insert sector breakdown table
-        self.add_table_to_doc(doc, sector_breakdown, 'Sector Breakdown')
-
-        # Create a pie chart for asset class breakdown
+    def generate_report(self, file_path, sheet_name, summary_data, asset_class_breakdown, sector_breakdown, base_name=None):
+        base_name = base_name or os.path.splitext(os.path.basename(file_path))[0]
+        # Pie chart for the asset class breakdown, bar chart for the sector breakdown
         asset_class_chart_path = os.path.join(self.supporting_files_directory, f'{base_name}_asset_class_breakdown.png')
-        plt.figure(figsize=(8, 6))
-        plt.pie(asset_class_breakdown['Base Market Value'], labels=asset_class_breakdown['Investment Type Name'], autopct='%1.1f%%')
-        plt.title('Asset Class Breakdown')
-        plt.savefig(asset_class_chart_path)
-        plt.close()
-        doc.add_picture(asset_class_chart_path, width=Inches(5.5))
-
-        # Create a bar chart for sector breakdown
         sector_chart_path = os.path.join(self.supporting_files_directory, f'{base_name}_sector_breakdown.png')
-        plt.figure(figsize=(10, 6))
-        plt.bar(sector_breakdown['Major Industry Name'], sector_breakdown['Base Market Value'])
-        plt.xticks(rotation=45, ha='right')
-        plt.title('Sector Breakdown')
-        plt.xlabel('Sector')
-        plt.ylabel('Base Market Value (GBP)')
-        plt.tight_layout()
-        plt.savefig(sector_chart_path)
-        plt.close()
-        doc.add_picture(sector_chart_path, width=Inches(5.5))
-
-        # Save the report
-        output_path = os.path.join(self.output_directory, f'{base_name}_Brunel_LGPS_Data_Analysis_Report.docx')
-        doc.save(output_path)
-        print(f'Report generated: {output_path}')
+        render_charts({
+            asset_class_chart_path: pie_chart(asset_class_breakdown['Investment Type Name'],
+                                              asset_class_breakdown['Base Market Value'], 'Asset Class Breakdown'),
+            sector_chart_path: bar_chart(sector_breakdown['Major Industry Name'], sector_breakdown['Base Market Value'],
+                                         'Sector Breakdown', 'Sector', 'Base Market Value (GBP)', figsize=(10, 6)),
+        })
 
-    def run_analysis(self):
-        file_sheet_map = self.get_excel_files_and_sheets()
+        # Write the report with the tables and charts in every selected format
+        output_path = os.path.join(self.output_directory, f'{base_name}_Brunel_LGPS_Data_Analysis_Report.docx')
+        report_paths = self.report.render(
+            output_path,
+            values={'title': f'{base_name} - Brunel LGPS Data Analysis Report'},
+            tables={'summary': summary_data, 'asset_class': asset_class_breakdown, 'sector': sector_breakdown},
+            figures={'asset_class_chart': asset_class_chart_path, 'sector_chart': sector_chart_path},
+        )
+        print(f"Report generated: {', '.join(report_paths)}")
+        return [*report_paths, asset_class_chart_path, sector_chart_path]
+
+    @staticmethod
+    def report_base_name(file_path, sheet_name, sheet_count):
+        # Sheets of a multi-sheet workbook get their own reports instead of overwriting each other
+        base_name = os.path.splitext(os.path.basename(file_path))[0]
+        if sheet_count > 1:
+            base_name = f"{base_name}_{re.sub(r'[^A-Za-z0-9-]+', '-', sheet_name).strip('-')}"
+        return base_name
+
+    def process_sheet(self, file_path, sheet_name, base_name, data):
+        print(f'Processing {file_path} - {sheet_name}')
+        summary_data, asset_class_breakdown, sector_breakdown = self.analyze_data(data)
+        return self.generate_report(file_path, sheet_name, summary_data, asset_class_breakdown, sector_breakdown, base_name)
+
+    def _safe_process_sheet(self, task):
+        file_path, sheet_name, base_name = task
+        result = {'file_path': file_path, 'sheet_name': sheet_name, 'outputs': [], 'error': None}
+        try:
+            with _workbook_load_slots or nullcontext():
+                data = self.reader.load_sheet(file_path, sheet_name)
+            result['outputs'] = self.process_sheet(file_path, sheet_name, base_name, data)
+        except Exception as e:
+            result['error'] = f'{type(e).__name__}: {e}'
+        return result
+
+    def _run_serial(self, file_sheet_map):
+        # One open per workbook; sheets are analysed as they are streamed, and a sheet that
+        # cannot be read is reported on its own while the next ones are still read
+        results = []
         for file_path, sheet_names in file_sheet_map.items():
-            for sheet_name in sheet_names:
-                print(f'Processing {file_path} - {sheet_name}')
-                data = self.load_data(file_path, sheet_name)
-                summary_data, asset_class_breakdown, sector_breakdown = self.analyze_data(data)
-                self.generate_report(file_path, sheet_name, summary_data, asset_class_breakdown, sector_breakdown)
+            pending = list(sheet_names)
+            try:
+                for sheet_name, data in self.reader.iter_sheets(file_path, skip_errors=True):
+                    if sheet_name in pending:
+                        pending.remove(sheet_name)
+                    result = {'file_path': file_path, 'sheet_name': sheet_name, 'outputs': [], 'error': None}
+                    try:
+                        if isinstance(data, Exception):
+                            raise data
+                        base_name = self.report_base_name(file_path, sheet_name, len(sheet_names))
+                        result['outputs'] = self.process_sheet(file_path, sheet_name, base_name, data)
+                    except Exception as e:
+                        result['error'] = f'{type(e).__name__}: {e}'
+                    results.append(result)
+            except Exception as e:
+                # The workbook itself could not be opened: its unread sheets fail with that error
+                results.extend(
+                    {'file_path': file_path, 'sheet_name': sheet_name, 'outputs': [], 'error': f'{type(e).__name__}: {e}'}
+                    for sheet_name in pending
+                )
+        return results
+
+    def run_analysis(self, workers=1, max_workbook_loads=4):
+        """
+        Analyses every sheet of every workbook in the input directory.
+        With workers > 1 sheets are fanned out over a process pool, with at most
+        max_workbook_loads sheets being read from their workbooks at once to bound memory.
+        Workers are spawned (not forked from the calling, possibly multi-threaded, process).
+        A failing sheet is reported and does not stop the others.
+        Returns one {'file_path', 'sheet_name', 'outputs', 'error'} dict per sheet.
+        """
+        file_sheet_map = self.get_excel_files_and_sheets()
+        if workers > 1 and sum(len(sheet_names) for sheet_names in file_sheet_map.values()) > 1:
+            tasks = [
+                (file_path, sheet_name, self.report_base_name(file_path, sheet_name, len(sheet_names)))
+                for file_path, sheet_names in file_sheet_map.items()
+                for sheet_name in sheet_names
+            ]
+            context = multiprocessing.get_context("spawn")
+            load_slots = context.BoundedSemaphore(max(1, max_workbook_loads))
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                     initargs=(load_slots,)) as executor:
+                results = list(executor.map(self._safe_process_sheet, tasks))
+        else:
+            results = self._run_serial(file_sheet_map)
+            self.reader.report()
+
+        failed = [result for result in results if result['error']]
+        for result in failed:
+            print(f"Failed to process {result['file_path']} - {result['sheet_name']}: {result['error']}")
+        print(f'Processing complete! {len(results) - len(failed)} sheets processed, {len(failed)} failed.')
+        return results
 
 if __name__ == '__main__':
     input_dir = 'Data/raw_data/brunel_data/'  # Adjust this path to your Brunel data location
@@ -131,4 +171,4 @@ if __name__ == '__main__':
     supporting_files_dir = 'Data/processed_data/brunel_data/reports/supporting_files/'
     
     analyzer = BrunelDataAnalyzer(input_dir, output_dir, supporting_files_dir)
-    analyzer.run_analysis()
+    analyzer.run_analysis(workers=os.cpu_count() or 1)
@@ -1,132 +1,128 @@
 import os
-import re
 import pandas as pd
-import matplotlib.pyplot as plt
 from docx import Document
 from docx.shared import Inches
+from Data_Analyzer.holdings_store import arrow_path_for, read_frame, write_frame
+from Data_Analyzer.docx_tables import add_dataframe_table, iter_docx_tables
+from Data_Analyzer.charts import bar_chart, render_charts
 
-# ---------------------------
-# Step 1: Extract lines from DOCX
-# ---------------------------
-def extract_lines_from_docx(file_path):
-    doc = Document(file_path)
-    lines = []
-    # Extract paragraphs
-    for para in doc.paragraphs:
-        text = para.text.strip()
-        if text:
-            lines.append(text)
-    # Also extract text from tables (if any)
-    for table in doc.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                cell_text = cell.text.strip()
-                if cell_text:
-                    lines.append(cell_text)
-    return lines
+# Columns of the compiled report table, and the record columns they are read into
+COMPILED_COLUMNS = ["Fund Name", "Market", "Metric", "Value"]
+RECORD_COLUMNS = ["Fund", "Market", "Metric", "Value"]
+ERROR_COLUMNS = ["Row", *RECORD_COLUMNS, "Error"]
 
 # ---------------------------
-# Step 2: Filter out repeated header labels
+# Step 1: Read the compiled table row-wise
 # ---------------------------
-# These labels appear in the document as headers – we remove them.
-HEADER_LABELS = {"LGPS Compiled Financial Report", "Fund Name", "Market", "Metric", "Value"}
+def read_compiled_table(input_docx):
+    """
+    Reads the compiled Fund Name/Market/Metric/Value table as typed columns.
+    Uses the columnar copy written by the compiler when it exists; older compiled reports
+    only have the Word document, whose table is read row by row.
+    Returns (records, errors): the records DataFrame (RECORD_COLUMNS plus 'Row', the row
+    number in the compiled table) and an error DataFrame for rows with the wrong shape.
+    """
+    compiled_arrow = arrow_path_for(input_docx)
+    if os.path.exists(compiled_arrow):
+        records = read_frame(compiled_arrow).rename(columns={"Fund Name": "Fund"})
+        records.insert(0, "Row", range(1, len(records) + 1))
+        return records, pd.DataFrame(columns=ERROR_COLUMNS)
 
-def filter_lines(lines):
-    return [line for line in lines if line not in HEADER_LABELS]
+    rows = next((table for table in iter_docx_tables(input_docx) if table and table[0] == COMPILED_COLUMNS), None)
+    if rows is None:
+        raise ValueError(f"No compiled table ({', '.join(COMPILED_COLUMNS)}) found in {input_docx}")
+    width = len(COMPILED_COLUMNS)
+    fitting = [(number, row) for number, row in enumerate(rows[1:], start=1) if len(row) == width]
+    misshapen = [
+        {"Row": number, **dict(zip(RECORD_COLUMNS, row)), "Error": f"expected {width} cells, found {len(row)}"}
+        for number, row in enumerate(rows[1:], start=1) if len(row) != width
+    ]
+    records = pd.DataFrame([row for _, row in fitting], columns=RECORD_COLUMNS)
+    records.insert(0, "Row", [number for number, _ in fitting])
+    records["Value"] = pd.to_numeric(records["Value"].str.replace(",", ""), errors="coerce")
+    return records, pd.DataFrame(misshapen, columns=ERROR_COLUMNS)
 
 # ---------------------------
-# Step 3: Parse the lines into records using a state machine
+# Step 2: Validate the records
 # ---------------------------
-def is_fund_header(line):
-    # A simple heuristic: if the line contains a hyphen and either 'Report' or 'Fund'
-    return '-' in line and (("Report" in line) or ("Fund" in line))
+def validate_records(records):
+    """
+    Splits records into rows that can be pivoted and rows that cannot.
+    A row needs a fund, a metric and a numeric value; later duplicates of a fund's metric
+    are reported and the first value is kept.
+    Returns (valid, errors).
+    """
+    fund = records["Fund"].fillna("").astype(str).str.strip()
+    metric = records["Metric"].fillna("").astype(str).str.strip()
+    value = pd.to_numeric(records["Value"], errors="coerce")
+    problems = [
+        (fund == "", "missing fund name"),
+        (metric == "", "missing metric"),
+        (value.isna(), "value is not a number"),
+    ]
+    error = pd.Series("", index=records.index)
+    for mask, message in problems:
+        error = error.mask(mask & (error == ""), message)
+    # Duplicates are only looked for among rows that are otherwise valid
+    usable = error == ""
+    duplicate = pd.DataFrame({"Fund": fund[usable], "Metric": metric[usable]}).duplicated()
+    error = error.mask(duplicate.reindex(records.index, fill_value=False), "duplicate metric for fund, first value kept")
 
-def is_market(line):
-    # If the line is a year (digits) or equals "Fund" (used in some cases)
-    return line.isdigit() or line.lower() == "fund"
-
-def parse_records(lines):
-    records = []
-    current_fund = None
-    current_market = None
-    i = 0
-    while i < len(lines):
-        # If the current line looks like a header and (either we have no current fund or it's different)
-        if is_fund_header(lines[i]) and (current_fund is None or lines[i] != current_fund):
-            # Expect next line to be market info if available
-            if i + 1 < len(lines) and is_market(lines[i+1]):
-                current_fund = lines[i]
-                current_market = lines[i+1]
-                i += 2
-                continue
-        # If the current line is a duplicate header (same as current_fund), skip it with its following market info
-        if current_fund is not None and lines[i] == current_fund:
-            if i + 1 < len(lines) and is_market(lines[i+1]):
-                i += 2
-                continue
-        # Otherwise, assume the next two lines are metric and value (if available)
-        if i + 1 < len(lines):
-            metric = lines[i]
-            value = lines[i+1]
-            # Only add a record if we already have a current fund header set
-            if current_fund is not None:
-                records.append({
-                    "Fund": current_fund,
-                    "Market": current_market,
-                    "Metric": metric,
-                    "Value": value
-                })
-            i += 2
-        else:
-            break
-    return records
+    valid = records[error == ""].assign(Fund=fund, Metric=metric, Value=value)
+    errors = records[error != ""].assign(Error=error[error != ""])
+    return valid, errors.reindex(columns=ERROR_COLUMNS)
 
 # ---------------------------
-# Step 4: Build DataFrame and pivot
+# Step 3: Pivot to one row per fund
 # ---------------------------
-def build_pivot_dataframe(records):
-    df = pd.DataFrame(records)
-    # Convert the Value column to numeric, removing commas and coercing errors
-    df['Value'] = pd.to_numeric(df['Value'].str.replace(',', ''), errors='coerce')
-    # Use pivot_table with an aggregation function to handle duplicates (using 'first' here)
-    pivot_df = df.pivot_table(index="Fund", columns="Metric", values="Value", aggfunc='first').reset_index()
+def pivot_records(df):
+    """Pivots Fund/Metric/Value records to one row per fund and one column per metric."""
+    df = df.drop_duplicates(["Fund", "Metric"])
+    pivot_df = df.pivot(index="Fund", columns="Metric", values="Value").reset_index()
+    pivot_df.columns.name = None
     return pivot_df
 
+def load_pivot_dataframe(input_docx):
+    """
+    Builds the Fund x Metric table from the compiled report.
+    Returns (pivot_df, errors); pivot_df is None when no row could be used.
+    """
+    records, errors = read_compiled_table(input_docx)
+    valid, invalid = validate_records(records)
+    errors = pd.concat([errors, invalid], ignore_index=True).sort_values("Row", ignore_index=True)
+    if valid.empty:
+        return None, errors
+    return pivot_records(valid), errors
+
+def write_parse_errors(errors, path):
+    """Writes the rows that could not be used to a CSV; removes a stale one when there are none."""
+    if errors.empty:
+        if os.path.exists(path):
+            os.remove(path)
+        return None
+    errors.to_csv(path, index=False)
+    print(f"{len(errors)} compiled rows could not be used, see '{path}'")
+    return path
+
 
 # ---------------------------
-# Step 5: Create a graph (e.g., bar chart for Base Value)
+# Step 4: Create a graph (e.g., bar chart for Base Value)
 # ---------------------------
 def create_base_value_chart(pivot_df, output_image="base_value_bar_chart.png"):
     if "Base Value" not in pivot_df.columns:
         print("No 'Base Value' metric found. Skipping graph creation.")
         return None
-    plt.figure(figsize=(8, 6))
-    plt.bar(pivot_df['Fund'], pivot_df['Base Value'])
-    plt.xlabel('Fund')
-    plt.ylabel('Base Value')
-    plt.title('Base Value by Fund')
-    plt.xticks(rotation=45, ha='right')
-    plt.tight_layout()
-    plt.savefig(output_image)
-    plt.close()
+    render_charts({output_image: bar_chart(pivot_df['Fund'], pivot_df['Base Value'], 'Base Value by Fund', 'Fund', 'Base Value')})
     return output_image
 
 # ---------------------------
-# Step 6: Generate a new DOCX report with table and graph
+# Step 5: Generate a new DOCX report with table and graph
 # ---------------------------
 def add_table_to_doc(doc, df, title):
     doc.add_heading(title, level=2)
-    # Create table with a header row
-    table = doc.add_table(rows=1, cols=len(df.columns))
-    table.autofit = True
-    hdr_cells = table.rows[0].cells
-    for idx, col_name in enumerate(df.columns):
-        hdr_cells[idx].text = str(col_name)
-    # Add rows
-    for _, row in df.iterrows():
-        row_cells = table.add_row().cells
-        for idx, value in enumerate(row):
-            row_cells[idx].text = str(value)
+    # Create table with a header row and one row per fund; metric values to 2 decimals, as in the compiled report
+    add_dataframe_table(doc, df, autofit=True,
+                        default_format=lambda value: f"{value:.2f}" if isinstance(value, float) else str(value))
     doc.add_paragraph("")  # add spacing
 
 def generate_report(pivot_df, graph_path, output_docx="LGPS_Compiled_Financial_Report_Organized.docx"):
@@ -152,21 +148,17 @@ def main(input_path, output_path):
     input_docx = f"{input_path}LGPS_Compiled_Financial_Report.docx"  # your input file
     output_docx = f"{output_path}LGPS_Compiled_Financial_Report_Organized.docx"
     graph_image = f"{output_path}base_value_bar_chart.png"
+    errors_csv = f"{output_path}LGPS_Compiled_Financial_Report_Organized_parse_errors.csv"
     
-    # 1. Extract and filter lines from the DOCX
-    raw_lines = extract_lines_from_docx(input_docx)
-    filtered_lines = filter_lines(raw_lines)
-    
-    # 2. Parse records using header detection and metric-value pairing
-    records = parse_records(filtered_lines)
-    if not records:
-        print("No records parsed. Check the document format and header definitions.")
+    # 1-3. Read the compiled records, set aside rows that do not fit and pivot the rest into one row per fund
+    pivot_df, errors = load_pivot_dataframe(input_docx)
+    write_parse_errors(errors, errors_csv)
+    if pivot_df is None:
+        print("No records parsed. Check the compiled report and its parse error report.")
         return
-    
-    # 3. Build pivot DataFrame
-    pivot_df = build_pivot_dataframe(records)
     print("Pivot DataFrame:")
     print(pivot_df)
+    write_frame(pivot_df, arrow_path_for(output_docx))
     
     # 4. Create a graph (bar chart for 'Base Value')
     chart_path = create_base_value_chart(pivot_df, graph_image)
@@ -0,0 +1,106 @@
+"""
+Rule-table classification of funds and holdings by name.
+
+The rules live in 'Data/config/fund_classification_rules.json': for each dimension (asset
+class, investment type, sector) an ordered list of labels with the keywords (plain,
+case-insensitive substrings) or regex patterns that select them, plus a default label.
+Earlier rules win, like the branches of an if/elif chain.
+
+All dimensions are compiled into one regex. Each dimension is an optional lookahead at the
+start of the name, whose alternatives are tried in rule order, so a single match per name
+yields every label. Names are classified once per distinct value (memoised across calls)
+and the labels broadcast back over the column.
+"""
+import re
+import json
+
+import numpy as np
+import pandas as pd
+
+CLASSIFICATION_RULES_PATH = "Data/config/fund_classification_rules.json"
+
+
+def _rule_pattern(rule):
+    alternatives = [re.escape(keyword) for keyword in rule.get("keywords", [])]
+    if rule.get("pattern"):
+        alternatives.append(f"(?:{rule['pattern']})")
+    if not alternatives:
+        raise ValueError(f"Classification rule for '{rule.get('label')}' has no keywords or pattern")
+    return "|".join(alternatives)
+
+
+class FundClassifier:
+    """
+    Classifies names along several dimensions from a declarative rule table.
+    """
+
+    def __init__(self, dimensions):
+        """
+        Compiles the rule table into one matcher.
+        :param dimensions: Dictionary of dimension -> {'default': label, 'rules': [{'label', 'keywords', 'pattern'}]}
+        """
+        self.dimensions = list(dimensions)
+        self.defaults = {dimension: spec.get("default") for dimension, spec in dimensions.items()}
+        self._groups = {}
+        lookaheads = []
+        for dimension_index, (dimension, spec) in enumerate(dimensions.items()):
+            alternatives = []
+            for rule_index, rule in enumerate(spec.get("rules", [])):
+                group = f"d{dimension_index}_r{rule_index}"
+                self._groups[group] = (dimension, rule["label"])
+                alternatives.append(f"(?=.*?(?:{_rule_pattern(rule)}))(?P<{group}>)")
+            if alternatives:
+                lookaheads.append(f"(?=(?:{'|'.join(alternatives)})?)")
+        self._matcher = re.compile("".join(lookaheads), re.IGNORECASE | re.DOTALL)
+        self._memo = {}
+
+    @classmethod
+    def from_config(cls, path=CLASSIFICATION_RULES_PATH):
+        """Loads the rule table from a JSON config file."""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def classify_name(self, name):
+        """Returns {dimension: label} for one name (memoised)."""
+        labels = self._memo.get(name)
+        if labels is None:
+            labels = dict(self.defaults)
+            if isinstance(name, str):
+                for group, value in self._matcher.match(name).groupdict().items():
+                    if value is not None:
+                        dimension, label = self._groups[group]
+                        labels[dimension] = label
+            self._memo[name] = labels
+        return labels
+
+    def classify(self, names, dimensions=None):
+        """
+        Classifies a column of names.
+        :param names: Series of names (object or categorical)
+        :param dimensions: Dimensions to return, default all
+        :return: DataFrame with one column per dimension, on the index of names
+        """
+        dimensions = list(dimensions or self.dimensions)
+        codes, uniques = pd.factorize(names)
+        classified = [self.classify_name(name) for name in uniques]
+        result = {}
+        for dimension in dimensions:
+            # Missing names (code -1) pick the trailing default
+            labels = np.array([labels[dimension] for labels in classified] + [self.defaults[dimension]], dtype=object)
+            result[dimension] = labels[codes]
+        return pd.DataFrame(result, index=names.index)
+
+    def label_hits(self, names, dimension, label):
+        """Returns a boolean per name: classified as label in dimension."""
+        return np.array([self.classify_name(name)[dimension] == label for name in names], dtype=bool)
+
+
+_default_classifier = None
+
+
+def default_classifier():
+    """Returns the classifier of the shared config file, loaded on first use."""
+    global _default_classifier
+    if _default_classifier is None:
+        _default_classifier = FundClassifier.from_config()
+    return _default_classifier
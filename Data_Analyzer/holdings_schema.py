@@ -0,0 +1,92 @@
+"""
+Normalised in-memory schema for holdings frames.
+
+Dimension columns (countries, industry, investment type) are held as categoricals encoded
+against one shared CategoryDictionary, so comparisons and group-bys work on integer codes
+and frames loaded from different workbooks or quarters concatenate without re-encoding.
+Integer columns are downcast; money columns stay float64 because they are summed and
+float32 totals would drift.
+"""
+import pandas as pd
+from pandas.api.types import CategoricalDtype
+
+DIMENSION_COLUMNS = (
+    "Issue Country Name",
+    "Incorporated Country Name",
+    "Investment Type Name",
+    "Major Industry Name",
+)
+
+
+class CategoryDictionary:
+    """
+    Shared, append-only category lists per dimension column.
+
+    New values are appended, never inserted, so codes handed out earlier stay valid and a
+    frame encoded before the dictionary grew only needs its categories widened (no string
+    hashing) to line up with newer frames.
+    """
+
+    def __init__(self):
+        self.categories = {}
+        self._known = {}
+        self._dtypes = {}
+
+    def dtype(self, column):
+        """Returns the current CategoricalDtype of a column."""
+        if column not in self._dtypes:
+            self._dtypes[column] = CategoricalDtype(self.categories.get(column, []))
+        return self._dtypes[column]
+
+    def encode(self, column, values):
+        """
+        Encodes a Series against the shared categories of a column, adding unseen values.
+        :param column: Dimension column name
+        :param values: Series of strings (object or categorical)
+        :return: Categorical Series using the shared categories
+        """
+        if isinstance(values.dtype, CategoricalDtype):
+            uniques = values.cat.remove_unused_categories().cat.categories
+        else:
+            uniques = pd.unique(values.dropna())
+        known = self._known.setdefault(column, set())
+        new_values = sorted(str(value) for value in uniques if value not in known)
+        if new_values:
+            self.categories.setdefault(column, []).extend(new_values)
+            known.update(new_values)
+            self._dtypes.pop(column, None)
+        return values.astype(self.dtype(column))
+
+    def align(self, data):
+        """Widens the categories of an already encoded frame to the current dictionary."""
+        for column in DIMENSION_COLUMNS:
+            if column in data.columns and data[column].dtype != self.dtype(column):
+                data[column] = data[column].cat.set_categories(self.categories.get(column, []))
+        return data
+
+    def concat(self, frames):
+        """Concatenates encoded frames; matching categories keep the result categorical."""
+        return pd.concat([self.align(frame) for frame in frames], ignore_index=True)
+
+
+SHARED_CATEGORIES = CategoryDictionary()
+
+
+def downcast_numeric(data):
+    """Downcasts integer columns to the smallest integer type that holds them."""
+    for column in data.select_dtypes(include="integer").columns:
+        data[column] = pd.to_numeric(data[column], downcast="integer")
+    return data
+
+
+def normalise_holdings(data, categories=SHARED_CATEGORIES):
+    """
+    Applies the holdings schema to a frame in place and returns it.
+    :param data: Holdings DataFrame as loaded from a workbook
+    :param categories: CategoryDictionary shared by every frame that may be combined
+    """
+    for column in DIMENSION_COLUMNS:
+        if column in data.columns:
+            data[column] = categories.encode(column, data[column])
+    return downcast_numeric(data)
+
@@ -0,0 +1,61 @@
+"""
+Columnar inter-stage store for holdings metrics.
+
+Analysis stages write their tables once as Arrow IPC files next to the DOCX they render;
+the compile, restructure and final-report stages memory-map those files instead of parsing
+Word tables back into text. DOCX stays a rendering output only.
+"""
+import os
+import pyarrow as pa
+import pyarrow.ipc
+import pandas as pd
+
+METRICS_SUBDIR = "metrics"
+ARROW_SUFFIX = ".arrow"
+
+
+def arrow_path_for(docx_path):
+    """Returns the Arrow file that sits next to a rendered .docx."""
+    return os.path.splitext(str(docx_path))[0] + ARROW_SUFFIX
+
+
+def metrics_path_for(docx_path):
+    """Returns the per-document metrics file for a report: '<folder>/metrics/<report name>.arrow'."""
+    folder, name = os.path.split(str(docx_path))
+    return os.path.join(folder, METRICS_SUBDIR, os.path.splitext(name)[0] + ARROW_SUFFIX)
+
+
+def write_frame(df, path):
+    """
+    Writes a DataFrame as an uncompressed Arrow IPC file (atomic replace).
+    Uncompressed buffers are what lets readers memory-map the file without copying.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_table(path):
+    """Memory-maps an Arrow IPC file and returns its pyarrow.Table (zero-copy)."""
+    return pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+
+
+def read_frame(path):
+    """Reads an Arrow IPC file into a DataFrame."""
+    return read_table(path).to_pandas()
+
+
+def read_frames(paths):
+    """
+    Reads several Arrow IPC files with the same schema into one DataFrame.
+    Tables are concatenated on the Arrow side so pandas conversion happens once.
+    """
+    tables = [read_table(path) for path in paths]
+    if not tables:
+        return pd.DataFrame()
+    return pa.concat_tables(tables).to_pandas()
@@ -0,0 +1,188 @@
+"""
+Declarative metrics over holdings frames.
+
+A MetricSet names its row masks and metrics once and computes all of them in one
+vectorised pass: each value column is converted to a float array once, each dimension
+column is turned into integer codes once, masks are evaluated on the (few) distinct labels
+and broadcast through the codes, and breakdowns are grouped sums over those codes.
+Adding a metric is one entry in a list and costs one extra reduction.
+"""
+import numpy as np
+import pandas as pd
+from pandas.api.types import CategoricalDtype
+
+from Data_Analyzer.fund_classifier import default_classifier
+
+
+class _Pass:
+    """Column conversions shared by every metric computed over one frame."""
+
+    def __init__(self, data, masks):
+        self.data = data
+        self.masks = masks
+        self._values = {}
+        self._codes = {}
+        self._mask_cache = {}
+
+    def values(self, column):
+        # NaN counts as zero, matching pandas' skipna sums
+        if column not in self._values:
+            self._values[column] = np.nan_to_num(self.data[column].to_numpy(dtype="float64"), nan=0.0)
+        return self._values[column]
+
+    def codes(self, column):
+        """Returns (codes, labels) for a dimension column; missing values have code -1."""
+        if column not in self._codes:
+            series = self.data[column]
+            if isinstance(series.dtype, CategoricalDtype):
+                self._codes[column] = (series.cat.codes.to_numpy(), series.cat.categories)
+            else:
+                codes, labels = pd.factorize(series)
+                self._codes[column] = (codes, pd.Index(labels))
+        return self._codes[column]
+
+    def label_mask(self, column, label_hits):
+        """Broadcasts a boolean per label to a boolean per row."""
+        codes, _ = self.codes(column)
+        hits = np.append(np.asarray(label_hits, dtype=bool), False)  # code -1 picks the trailing False
+        return hits[codes]
+
+    def mask(self, name):
+        if name not in self._mask_cache:
+            self._mask_cache[name] = self.masks[name](self)
+        return self._mask_cache[name]
+
+
+def column_equals(*columns, value):
+    """Mask: any of the columns equals value."""
+    def evaluate(state):
+        mask = np.zeros(len(state.data), dtype=bool)
+        for column in columns:
+            _, labels = state.codes(column)
+            mask |= state.label_mask(column, labels == value)
+        return mask
+    return evaluate
+
+
+def column_contains(column, pattern, case=False):
+    """Mask: the column contains pattern (plain substring)."""
+    def evaluate(state):
+        _, labels = state.codes(column)
+        hits = labels.astype(str).str.contains(pattern, case=case, regex=False)
+        return state.label_mask(column, hits)
+    return evaluate
+
+
+def column_classified(column, dimension, label, classifier=None):
+    """Mask: the column's value is classified as label in dimension by the fund classifier rules."""
+    def evaluate(state):
+        _, labels = state.codes(column)
+        hits = (classifier or default_classifier()).label_hits(labels, dimension, label)
+        return state.label_mask(column, hits)
+    return evaluate
+
+
+class Sum:
+    """Sum of a value column, optionally restricted to a mask (or its complement)."""
+
+    def __init__(self, name, value, mask=None, invert=False):
+        self.name = name
+        self.value = value
+        self.mask = mask
+        self.invert = invert
+
+    def compute(self, state):
+        values = state.values(self.value)
+        if self.mask is None:
+            return values.sum()
+        mask = state.mask(self.mask)
+        return values[~mask if self.invert else mask].sum()
+
+
+class Breakdown:
+    """Sum of a value column per label of a dimension column, ordered by label."""
+
+    def __init__(self, name, by, value):
+        self.name = name
+        self.by = by
+        self.value = value
+
+    def compute(self, state):
+        codes, labels = state.codes(self.by)
+        present = codes >= 0
+        # Grouped over the integer codes, but summed like DataFrame.groupby(by)[value].sum()
+        # (compensated, in row order), so the totals match it to the last digit
+        sums = pd.Series(state.values(self.value)[present]).groupby(codes[present]).sum()
+        breakdown = pd.DataFrame({
+            self.by: np.asarray(labels, dtype=object)[sums.index.to_numpy()],
+            self.value: sums.to_numpy(),
+        })
+        return breakdown.sort_values(self.by, ignore_index=True)
+
+
+class TopShare:
+    """Share of the total value held by the n largest rows (concentration)."""
+
+    def __init__(self, name, value, n=10):
+        self.name = name
+        self.value = value
+        self.n = n
+
+    def compute(self, state):
+        values = state.values(self.value)
+        total = values.sum()
+        if not total:
+            return 0.0
+        n = min(self.n, len(values))
+        return np.partition(values, len(values) - n)[len(values) - n:].sum() / total if n else 0.0
+
+
+class MetricSet:
+    """A named set of masks and metrics computed together over one frame."""
+
+    def __init__(self, metrics, masks=None):
+        """
+        :param metrics: Metric objects (Sum, Breakdown, TopShare, ...) in report order
+        :param masks: Dictionary of mask name -> mask function (column_equals, column_contains, column_classified)
+        """
+        self.metrics = list(metrics)
+        self.masks = dict(masks or {})
+
+    def compute(self, data):
+        """Returns a dictionary of metric name -> value (scalars) or DataFrame (breakdowns)."""
+        state = _Pass(data, self.masks)
+        return {metric.name: metric.compute(state) for metric in self.metrics}
+
+    def summary(self, results):
+        """Returns the scalar results as a Metric/Value DataFrame in declaration order."""
+        names = [metric.name for metric in self.metrics if not isinstance(results[metric.name], pd.DataFrame)]
+        return pd.DataFrame({'Metric': names, 'Value': [results[name] for name in names]})
+
+
+# Metrics of the Brunel holdings reports, shared by both Brunel analyzers
+HOLDINGS_METRICS = MetricSet(
+    masks={
+        'uk': column_equals('Issue Country Name', 'Incorporated Country Name', value='UNITED KINGDOM'),
+        # Same Direct/Indirect rule as the final report's Investment Type
+        'fund': column_classified('Investment Type Name', 'Investment Type', 'Indirect'),
+    },
+    metrics=[
+        Sum('Total AUM (GBP)', 'Base Market Value'),
+        Sum('UK Investment Exposure (GBP)', 'Base Market Value', mask='uk'),
+        # Direct: individual investments not made via funds; indirect: through funds
+        Sum('Direct Investments (GBP)', 'Base Market Value', mask='fund', invert=True),
+        Sum('Indirect Investments (GBP)', 'Base Market Value', mask='fund'),
+        Breakdown('Asset Class Breakdown', 'Investment Type Name', 'Base Market Value'),
+        Breakdown('Sector Breakdown', 'Major Industry Name', 'Base Market Value'),
+    ],
+)
+
+
+def analyze_holdings(data):
+    """Returns (summary_data, asset_class_breakdown, sector_breakdown) for a holdings frame."""
+    results = HOLDINGS_METRICS.compute(data)
+    return (
+        HOLDINGS_METRICS.summary(results),
+        results['Asset Class Breakdown'],
+        results['Sector Breakdown'],
+    )
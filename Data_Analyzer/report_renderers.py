@@ -0,0 +1,248 @@
+"""
+Pluggable output formats for the analysis reports.
+
+A ReportRenderer renders one report layout (see report_templates) to every format selected
+for the run:
+
+    docx    Word document filled from the pre-built template (client-facing deliverables)
+    html    standalone HTML page, figures linked relative to the page
+    md      Markdown, figures linked relative to the file
+    csv     one raw-valued CSV per table: '<report>_<table key>.csv'
+    json    values, raw-valued table records and figure paths in one file
+
+All formats are written next to each other from the same values, tables and figures, so a
+run that only needs machine-readable or quick-to-read output can skip Word entirely.
+"""
+import os
+import io
+import json
+import math
+from html import escape
+
+import numpy as np
+
+from Data_Analyzer.docx_tables import format_columns
+from Data_Analyzer.report_templates import PLACEHOLDER, TEMPLATE_DIR, ReportTemplate, layout_digest
+
+DEFAULT_REPORT_FORMATS = ("docx",)
+
+# Table options that only apply to Word tables
+DOCX_ONLY_OPTIONS = ("style", "autofit", "header")
+
+
+def parse_formats(formats):
+    """
+    Normalises a format selection: a comma-separated string ('html,json') or an iterable.
+    :raises ValueError: For formats without a renderer
+    """
+    if isinstance(formats, str):
+        formats = formats.split(",")
+    selected = []
+    for name in formats:
+        name = name.strip().lower().lstrip(".")
+        if name == "markdown":
+            name = "md"
+        if name not in RENDERERS:
+            raise ValueError(f"Unknown report format '{name}', expected one of: {', '.join(RENDERERS)}")
+        if name not in selected:
+            selected.append(name)
+    return tuple(selected)
+
+
+def _fill_values(text, values):
+    return PLACEHOLDER.sub(
+        lambda match: str(values[match.group(2)]) if match.group(1) == "value" else match.group(0), text
+    )
+
+
+def _slot(text):
+    """Returns (kind, key, width) for a table or figure placeholder block, else None."""
+    match = PLACEHOLDER.fullmatch(text.strip())
+    if match and match.group(1) in ("table", "figure"):
+        return match.group(1), match.group(2), float(match.group(3) or 6)
+    return None
+
+
+def _text_options(table_options):
+    return {key: value for key, value in table_options.items() if key not in DOCX_ONLY_OPTIONS}
+
+
+def _atomic_write(path, text):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _relative_link(image_path, output_path):
+    return os.path.relpath(image_path, os.path.dirname(os.path.abspath(output_path))).replace(os.sep, "/")
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return _json_safe(value.item())
+    return str(value)
+
+
+def _json_safe(value):
+    """Replaces NaN and infinities (not valid JSON) with None, through dicts and lists."""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(item) for item in value]
+    return value
+
+
+class ReportRenderer:
+    """
+    Renders one report layout to the formats selected for the run.
+    """
+
+    def __init__(self, name, layout, formats=DEFAULT_REPORT_FORMATS, template_dir=TEMPLATE_DIR, table_options=None):
+        """
+        :param name: Report name; also the name of the DOCX template
+        :param layout: Blocks of the report (heading, paragraph, table_slot, figure_slot)
+        :param formats: Formats to write, e.g. ('docx',) or 'html,json'
+        :param template_dir: Folder holding the .docx templates
+        :param table_options: Options for build_dataframe_table; formats, default_format and
+                              alignments also apply to the HTML and Markdown tables
+        """
+        self.name = name
+        self.layout = layout
+        self.formats = parse_formats(formats)
+        self.table_options = table_options or {}
+        # The Word template is only loaded (or built) when DOCX output is wanted
+        self.template = (
+            ReportTemplate(name, layout, template_dir, self.table_options) if "docx" in self.formats else None
+        )
+
+    @property
+    def signature(self):
+        """Formats and layout digest of this renderer; reports match it only if written the same way."""
+        return {"formats": sorted(self.formats), "layout": layout_digest(self.layout)}
+
+    def render(self, output_path, values=None, tables=None, figures=None):
+        """
+        Writes the report in every selected format.
+        :param output_path: Report path; its extension is replaced per format
+        :return: The paths written
+        """
+        stem = os.path.splitext(output_path)[0]
+        context = {"values": values or {}, "tables": tables or {}, "figures": figures or {}}
+        paths = []
+        for name in self.formats:
+            written = RENDERERS[name](self, stem, **context)
+            paths.extend(written if isinstance(written, list) else [written])
+        return paths
+
+    def _blocks(self, values):
+        """Yields ('heading', text, level), ('paragraph', text) or the slot tuples of the layout."""
+        for block in self.layout:
+            slot = _slot(block[1])
+            if slot:
+                yield slot
+            else:
+                yield (block[0], _fill_values(block[1], values)) + tuple(block[2:])
+
+    def render_docx(self, stem, values, tables, figures):
+        return self.template.render(f"{stem}.docx", values, tables, figures)
+
+    def render_html(self, stem, values, tables, figures):
+        path = f"{stem}.html"
+        options = _text_options(self.table_options)
+        alignments = options.pop("alignments", None) or {}
+        title = self.name
+        body = []
+        for block in self._blocks(values):
+            kind = block[0]
+            if kind == "heading":
+                if block[2] == 1:
+                    title = block[1]
+                body.append(f"<h{block[2]}>{escape(block[1])}</h{block[2]}>")
+            elif kind == "paragraph":
+                body.append(f"<p>{escape(block[1])}</p>")
+            elif kind == "table":
+                df = tables[block[1]]
+                columns = [str(column) for column in df.columns]
+                cell_styles = [
+                    f' style="text-align:{alignments[column]}"' if column in alignments else "" for column in df.columns
+                ]
+                rows = ["<tr>" + "".join(f"<th>{escape(column)}</th>" for column in columns) + "</tr>"]
+                for row in zip(*format_columns(df, **options)):
+                    rows.append("<tr>" + "".join(
+                        f"<td{style}>{escape(text)}</td>" for text, style in zip(row, cell_styles)
+                    ) + "</tr>")
+                body.append("<table>\n" + "\n".join(rows) + "\n</table>")
+            elif figures.get(block[1]) is not None:
+                link = escape(_relative_link(figures[block[1]], path), quote=True)
+                body.append(f'<p><img src="{link}" alt="{escape(block[1], quote=True)}" style="width:{block[2]}in"></p>')
+        page = (
+            "<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n"
+            f"<title>{escape(title)}</title>\n"
+            "<style>table{border-collapse:collapse}th,td{border:1px solid #999;padding:2px 6px}</style>\n"
+            "</head>\n<body>\n" + "\n".join(body) + "\n</body>\n</html>\n"
+        )
+        return _atomic_write(path, page)
+
+    def render_md(self, stem, values, tables, figures):
+        path = f"{stem}.md"
+        options = _text_options(self.table_options)
+        alignments = options.pop("alignments", None) or {}
+        rules = {"left": ":---", "center": ":---:", "right": "---:"}
+        parts = []
+        for block in self._blocks(values):
+            kind = block[0]
+            if kind == "heading":
+                parts.append(f"{'#' * block[2]} {block[1]}")
+            elif kind == "paragraph":
+                if block[1].strip():
+                    parts.append(block[1])
+            elif kind == "table":
+                df = tables[block[1]]
+                lines = [
+                    "| " + " | ".join(_md_cell(column) for column in df.columns) + " |",
+                    "| " + " | ".join(rules.get(alignments.get(column), "---") for column in df.columns) + " |",
+                ]
+                for row in zip(*format_columns(df, **options)):
+                    lines.append("| " + " | ".join(_md_cell(text) for text in row) + " |")
+                parts.append("\n".join(lines))
+            elif figures.get(block[1]) is not None:
+                parts.append(f"![{block[1]}]({_relative_link(figures[block[1]], path)})")
+        return _atomic_write(path, "\n\n".join(parts) + "\n")
+
+    def render_csv(self, stem, values, tables, figures):
+        # Raw values, not display strings, so the files load straight back into pandas
+        paths = []
+        for block in self._blocks(values):
+            if block[0] == "table":
+                buffer = io.StringIO()
+                tables[block[1]].to_csv(buffer, index=False)
+                paths.append(_atomic_write(f"{stem}_{block[1]}.csv", buffer.getvalue()))
+        return paths
+
+    def render_json(self, stem, values, tables, figures):
+        document = {
+            "report": self.name,
+            "values": values,
+            "tables": {key: df.to_dict(orient="records") for key, df in tables.items()},
+            "figures": {key: path for key, path in figures.items() if path is not None},
+        }
+        text = json.dumps(_json_safe(document), indent=2, default=_json_default, allow_nan=False)
+        return _atomic_write(f"{stem}.json", text)
+
+
+def _md_cell(text):
+    return str(text).replace("|", "\\|").replace("\n", " ")
+
+
+RENDERERS = {
+    "docx": ReportRenderer.render_docx,
+    "html": ReportRenderer.render_html,
+    "md": ReportRenderer.render_md,
+    "csv": ReportRenderer.render_csv,
+    "json": ReportRenderer.render_json,
+}
@@ -0,0 +1,188 @@
+"""
+Template-based Word reports.
+
+A layout is a list of blocks (headings, paragraphs, table and figure slots). It is built
+once into 'Data/templates/<name>.docx', which can then be restyled in Word, and every
+report is a copy of that template with its placeholders filled. The template records the
+sha256 of the layout it was built from in its core properties; when the layout in code
+changes the template is rebuilt, replacing any Word restyling of the old one:
+
+    {{value:key}}       replaced inline by values['key'] (headings and paragraphs)
+    {{table:key}}       paragraph replaced by a table of the DataFrame tables['key']
+    {{figure:key:6}}    paragraph replaced by the image figures['key'], 6 inches wide
+
+The template file is read once per ReportTemplate and each report is opened from those
+bytes, so batches of fund reports share one loaded skeleton.
+"""
+import io
+import os
+import re
+import json
+import hashlib
+
+from docx import Document
+from docx.shared import Inches
+
+from Data_Analyzer.docx_tables import build_dataframe_table
+
+TEMPLATE_DIR = "Data/templates"
+PLACEHOLDER = re.compile(r"\{\{(value|table|figure):(\w+)(?::([0-9.]+))?\}\}")
+LAYOUT_DIGEST_PREFIX = "lgps-layout-sha256:"
+
+
+def heading(text, level=1):
+    return ("heading", text, level)
+
+
+def paragraph(text):
+    return ("paragraph", text)
+
+
+def table_slot(key):
+    return ("paragraph", f"{{{{table:{key}}}}}")
+
+
+def figure_slot(key, width):
+    return ("paragraph", f"{{{{figure:{key}:{width}}}}}")
+
+
+def layout_digest(layout):
+    """Returns the sha256 of a layout's blocks."""
+    return hashlib.sha256(json.dumps([list(block) for block in layout]).encode("utf-8")).hexdigest()
+
+
+def template_digest(data):
+    """Returns the layout digest recorded in a template's bytes, else None."""
+    comments = Document(io.BytesIO(data)).core_properties.comments or ""
+    return comments[len(LAYOUT_DIGEST_PREFIX):] if comments.startswith(LAYOUT_DIGEST_PREFIX) else None
+
+
+def build_template(layout, path):
+    """Writes a layout as a .docx template (atomic replace), recording the layout digest."""
+    doc = Document()
+    doc.core_properties.comments = LAYOUT_DIGEST_PREFIX + layout_digest(layout)
+    for block in layout:
+        if block[0] == "heading":
+            doc.add_heading(block[1], level=block[2])
+        else:
+            doc.add_paragraph(block[1])
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    doc.save(tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+class ReportTemplate:
+    """
+    A loaded report template that renders filled copies of itself.
+    """
+
+    def __init__(self, name, layout, template_dir=TEMPLATE_DIR, table_options=None):
+        """
+        Loads the template, building it from the layout if the file does not exist yet or was
+        built from a different layout.
+        :param name: Template file name without extension
+        :param layout: Blocks the template is built from (heading, paragraph, table_slot, figure_slot)
+        :param template_dir: Folder holding the .docx templates
+        :param table_options: Options passed to build_dataframe_table for every table slot
+        """
+        self.path = os.path.join(template_dir, f"{name}.docx")
+        self.layout_digest = layout_digest(layout)
+        self._data = None
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                self._data = f.read()
+        if self._data is None or template_digest(self._data) != self.layout_digest:
+            build_template(layout, self.path)
+            with open(self.path, "rb") as f:
+                self._data = f.read()
+        self.table_options = table_options or {}
+
+    def new_document(self):
+        """Returns an unfilled copy of the template."""
+        return Document(io.BytesIO(self._data))
+
+    def fill(self, doc, values=None, tables=None, figures=None):
+        """
+        Fills the placeholders of a template copy in place.
+        Figures given as None drop their paragraph, for optional images.
+        """
+        values = values or {}
+        tables = tables or {}
+        figures = figures or {}
+        for para in list(doc.paragraphs):
+            text = para.text
+            if "{{" not in text:
+                continue
+            slot = PLACEHOLDER.fullmatch(text.strip())
+            if slot and slot.group(1) == "table":
+                table = build_dataframe_table(doc, tables[slot.group(2)], **self.table_options)
+                para._p.addprevious(table._tbl)
+                para._p.getparent().remove(para._p)
+            elif slot and slot.group(1) == "figure":
+                image_path = figures[slot.group(2)]
+                if image_path is None:
+                    para._p.getparent().remove(para._p)
+                    continue
+                for run in para.runs:
+                    run._r.getparent().remove(run._r)
+                para.add_run().add_picture(image_path, width=Inches(float(slot.group(3) or 6)))
+            else:
+                # Placeholders edited in Word can be split over several runs: keep the first run
+                text = PLACEHOLDER.sub(
+                    lambda match: str(values[match.group(2)]) if match.group(1) == "value" else match.group(0), text
+                )
+                runs = para.runs
+                runs[0].text = text
+                for run in runs[1:]:
+                    run._r.getparent().remove(run._r)
+        return doc
+
+    def render(self, output_path, values=None, tables=None, figures=None):
+        """Fills a copy of the template and saves it to output_path."""
+        doc = self.fill(self.new_document(), values, tables, figures)
+        doc.save(output_path)
+        return output_path
+
+    def render_many(self, reports):
+        """
+        Renders a batch of reports from the one loaded template.
+        :param reports: Iterable of (output_path, {'values': ..., 'tables': ..., 'figures': ...})
+        :return: The output paths
+        """
+        return [self.render(output_path, **context) for output_path, context in reports]
+
+
+# Per-fund layouts
+
+# Brunel holdings workbooks (Brunel_LGPS_data_analysis and fix_LGPS_b_report)
+HOLDINGS_REPORT_LAYOUT = [
+    heading("{{value:title}}", 1),
+    heading("Summary Metrics", 2),
+    table_slot("summary"),
+    heading("Asset Class Breakdown", 2),
+    table_slot("asset_class"),
+    heading("Sector Breakdown", 2),
+    table_slot("sector"),
+    figure_slot("asset_class_chart", 5.5),
+    figure_slot("sector_chart", 5.5),
+]
+
+# Border to Coast holdings PDFs (Bordertocoast_LGPS_data_analysis)
+FUND_PDF_REPORT_LAYOUT = [
+    heading("LGPS Data Analysis - {{value:filename}}", 1),
+    heading("Detailed Numerical Analysis", 2),
+    paragraph("The following table provides detailed statistics of the numerical data:"),
+    table_slot("metrics"),
+    figure_slot("histogram", 6),
+    figure_slot("scatter", 6),
+]
+
+# Compiled reports
+
+# All per-fund metrics in one table (data_compiler)
+COMPILED_REPORT_LAYOUT = [
+    heading("LGPS Compiled Financial Report", 1),
+    table_slot("compiled"),
+]
@@ -6,97 +6,144 @@ from web_scrapers import brunel_data_webscraping
 from Data_Analyzer.Brunel_LGPS_data_analysis import run as Brunel_DA_run
 from Data_Analyzer.Bordertocoast_LGPS_data_analysis import run as Bordertocoast_DA_run
 from Data_Analyzer.data_compiler import compile_financial_data # 1st Report
-from Data_Analyzer.fix_LGPS_btc_report import main as restructure_report # 2nd Report 
+from Data_Analyzer.fix_LGPS_btc_report import main as restructure_report # 2nd Report
 from Data_Analyzer.fix_LGPS_b_report import BrunelDataAnalyzer # 2nd Report
 from Data_Analyzer.final_compliler import main as final_report # Final Report
+from Data_Analyzer.report_renderers import DEFAULT_REPORT_FORMATS, parse_formats
+from Data_Analyzer.fund_classifier import CLASSIFICATION_RULES_PATH
 
 # Misc Library Import
 from misc.complete_file_del import run as del_unecessary_files
 from misc.pdf_to_txt import PDFToTXTConverter
 from misc.data_explaination import run as explain_data_run
+from misc.pipeline import Pipeline, Stage
 
 import os
+import argparse
+from functools import partial
+
+# Raw data
+BRUNEL_RAW = "Data/raw_data/brunel_data/"
+BTC_RAW = "Data/raw_data/bordertocoast_data/pdf"
+
+# Bordertocoast chain
+BTC_DOCUMENTS = "Data/processed_data/bordertocoast_data/documents/"
+BTC_SUPPORTING = "Data/processed_data/bordertocoast_data/reports/supporting_documents/"
+BTC_COMPILED = f"{BTC_SUPPORTING}LGPS_Compiled_Financial_Report.docx"
+BTC_OUTPUT = "Data/processed_data/bordertocoast_data/reports/Output/"
+BTC_CHARTS = f"{BTC_OUTPUT}enhanced_charts/"
+
+# Brunel chain
+BRUNEL_DOCUMENTS = "Data/processed_data/brunel_data/documents/"
+BRUNEL_COMPILED = "Data/processed_data/brunel_data/reports/supporting_documents/LGPS_Compiled_Financial_Report.docx"
+BRUNEL_OUTPUT = "Data/processed_data/brunel_data/reports/Output/"
+BRUNEL_SUPPORTING_FILES = 'Data/processed_data/brunel_data/reports/supporting_files/'
 
 
 # Used for webscraping Data
+### Each scraper keeps a download manifest (URL, ETag, Last-Modified, size, sha256),
+### so re-runs only send conditional requests and fetch new or changed documents.
 def check_raw_data():
-    # Define the path to the data folder
-    data_folder_1 = "Data/raw_data/bordertocoast_data/pdf"
-    data_folder_2 = "Data/raw_data/brunel_data"
-    #data_folder_3 = "Data/raw_data/lgpscentral_data/pdf"
+    # Do bordertocoast_data web scraping
+    bordercoast_data_webscraping.webscraper()
 
-    # Check if the folder exists
-    if not os.path.exists(data_folder_1):
-        # Do bordertocoast_data web scraping
-        bordercoast_data_webscraping.webscraper()
+    # Do brunel_data web scraping
+    brunel_data_webscraping.webscraper()
 
-    if not os.path.exists(data_folder_2):
-        # Do brunel_data web scraping
-        brunel_data_webscraping.webscraper()
+    """# Do lgpscentral_data web scraping
+    lgpscenral_data_webscraping.webscraper()"""
 
-    """if not os.path.exists(data_folder_3):
-        # Do lgpscentral_data web scraping
-        lgpscenral_data_webscraping.webscraper()"""
-        
 
+def brunel_final_reports(report_formats):
+    BrunelDataAnalyzer(BRUNEL_RAW, BRUNEL_OUTPUT, BRUNEL_SUPPORTING_FILES, report_formats).run_analysis(workers=os.cpu_count() or 1)
 
 
 # Processing and analysing data files
-def lgps_data_analyzer():
-    # Data Analysis for Brunel
-    Brunel_DA_run()   
-
-    # Data Analysis for Boardertocoast 
-    Bordertocoast_DA_run()
-
-    # Reports for Bordertocoast
-    ## Compilling data together
-    input_folderbtc1 = "Data/processed_data/bordertocoast_data/documents/"  # Adjusted path
-    output_filebtc1 = "Data/processed_data/bordertocoast_data/reports/supporting_documents/LGPS_Compiled_Financial_Report.docx"
-    compile_financial_data(input_folderbtc1, output_filebtc1)
-    ## Restructuring Report
-    input_folderbtc2 = "Data/processed_data/bordertocoast_data/reports/supporting_documents/"
-    output_filebtc2 = "Data/processed_data/bordertocoast_data/reports/supporting_documents/"
-    restructure_report(input_folderbtc2, output_filebtc2)
-    ## Final Report
-    input_folderbtc3 = "Data/processed_data/bordertocoast_data/reports/supporting_documents/"
-    output_filebtc3 = "Data/processed_data/bordertocoast_data/reports/Output/"
-    final_report(input_folderbtc3, output_filebtc3)
-
-    
-    # Reports for Brunel
-    ## Compilling data together
-    input_folderb1 = "Data/processed_data/brunel_data/documents/"  # Adjusted path
-    output_fileb1 = "Data/processed_data/brunel_data/reports/supporting_documents/LGPS_Compiled_Financial_Report.docx"
-    compile_financial_data(input_folderb1, output_fileb1)
-    ## Final Report
-    input_folderb2 = "Data/raw_data/brunel_data/"
-    output_fileb2 = "Data/processed_data/brunel_data/reports/Output/"
-    supporting_files_dir1 = 'Data/processed_data/brunel_data/reports/supporting_files/'
-    BrunelDataAnalyzer(input_folderb2, output_fileb2, supporting_files_dir1).run_analysis()
+### The pipeline is a DAG of stages with declared inputs and outputs. A stage is skipped when
+### its inputs are unchanged since its last successful run; the Bordertocoast and Brunel
+### chains run concurrently.
+### report_formats picks the per-fund and compiled report formats: 'docx', 'html', 'md', 'csv', 'json'
+### (e.g. ('html', 'json') for internal refreshes); the organized and final reports are always DOCX
+def build_pipeline(report_formats=DEFAULT_REPORT_FORMATS):
+    report_formats = parse_formats(report_formats)
+    formats = {"report_formats": list(report_formats)}
+    return Pipeline([
+        # [1] Gathering data and [2] Delete Unecessary Files
+        Stage("scrape", check_raw_data, outputs=[BRUNEL_RAW, BTC_RAW], always_run=True),
+        ### Kept apart from scrape, which always runs: the clean-up is skipped when the raw folders are
+        ### unchanged since it last ran, and still runs with --skip-scrape on raw data copied in by hand
+        ### (so it is not in a 'scrape' group). It deletes files from its own inputs, so it is recorded
+        ### with the digest taken after it runs
+        Stage("clean_raw", del_unecessary_files, inputs=[BRUNEL_RAW, BTC_RAW], after=["scrape"],
+              rewrites_inputs=True),
+
+        # [3] Data Analysis for Boardertocoast: per-fund reports, compiled, restructured, final report
+        Stage("btc_analysis", partial(Bordertocoast_DA_run, report_formats=report_formats),
+              inputs=[BTC_RAW], outputs=[BTC_DOCUMENTS], after=["clean_raw"], params=formats,
+              groups=["analysis", "btc"]),
+        Stage("btc_compile", partial(compile_financial_data, BTC_DOCUMENTS, BTC_COMPILED, report_formats),
+              inputs=[BTC_DOCUMENTS], outputs=[BTC_COMPILED.replace(".docx", ".arrow")], after=["btc_analysis"],
+              params=formats, groups=["compile", "btc"]),
+        Stage("btc_restructure", partial(restructure_report, BTC_SUPPORTING, BTC_SUPPORTING),
+              inputs=[BTC_COMPILED.replace(".docx", ".arrow")],
+              outputs=[f"{BTC_SUPPORTING}LGPS_Compiled_Financial_Report_Organized.arrow"], after=["btc_compile"],
+              groups=["btc"]),
+        Stage("btc_final", partial(final_report, BTC_SUPPORTING, BTC_OUTPUT, BTC_CHARTS),
+              inputs=[f"{BTC_SUPPORTING}LGPS_Compiled_Financial_Report_Organized.arrow", CLASSIFICATION_RULES_PATH],
+              outputs=[f"{BTC_OUTPUT}Final_Report.docx", BTC_CHARTS], after=["btc_restructure"], groups=["final", "btc"]),
+
+        # [3] Data Analysis for Brunel: per-fund reports, compiled, final reports
+        ### The Brunel stages share the workbook cache, so they run one after another
+        Stage("brunel_analysis", partial(Brunel_DA_run, report_formats=report_formats),
+              inputs=[BRUNEL_RAW, CLASSIFICATION_RULES_PATH], outputs=[BRUNEL_DOCUMENTS], after=["clean_raw"],
+              params=formats, groups=["analysis", "brunel"]),
+        Stage("brunel_compile", partial(compile_financial_data, BRUNEL_DOCUMENTS, BRUNEL_COMPILED, report_formats),
+              inputs=[BRUNEL_DOCUMENTS], outputs=[BRUNEL_COMPILED.replace(".docx", ".arrow")],
+              after=["brunel_analysis"], params=formats, groups=["compile", "brunel"]),
+        Stage("brunel_final", partial(brunel_final_reports, report_formats),
+              inputs=[BRUNEL_RAW, CLASSIFICATION_RULES_PATH], outputs=[BRUNEL_OUTPUT], after=["brunel_compile"],
+              params=formats, groups=["final", "brunel"]),
+
+        # [4] Generate an explaination of the data
+        Stage("explain", explain_data_run, inputs=[BTC_OUTPUT, BRUNEL_OUTPUT],
+              outputs=["LGPS_Insights_WriteUp_new.docx"], after=["btc_final", "brunel_final"]),
+    ])
+
 
 # Main Function of Program
 ### If there has been no webscraping raw_data_generated = False
 ### If there has been webscraping raw_data_generated = True
-
-def main(raw_data_generated=False):
+def main(raw_data_generated=False, report_formats=DEFAULT_REPORT_FORMATS, targets=None, upstream=True, force=False, jobs=2):
     # Webscrapes if there's no data
-    if raw_data_generated == False: # No Webscraping Done
-        # [1] Gathering data
-        check_raw_data()
-
-        # [2] Delete Unecessary Files
-        del_unecessary_files()
-
-        
-
-    # [3] Data Analysis
-    lgps_data_analyzer()
-
-
-    # [4] Generate an explaination of the data
-    explain_data_run()
-
-
-
-main()
\ No newline at end of file
+    exclude = ["scrape"] if raw_data_generated else []
+    return build_pipeline(report_formats).run(targets, upstream=upstream, exclude=exclude, force=force, jobs=jobs)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Runs the LGPS pipeline; stages whose inputs are unchanged since their last run are skipped.",
+        epilog="Stages: scrape, clean_raw, btc_analysis, btc_compile, btc_restructure, btc_final, brunel_analysis, "
+               "brunel_compile, brunel_final, explain. Groups: analysis, compile, final, btc, brunel.",
+    )
+    parser.add_argument("targets", nargs="*", help="Stages or groups to bring up to date (default: all)")
+    parser.add_argument("--only", action="store_true", help="Run only the named stages, not the stages they depend on")
+    parser.add_argument("--skip-scrape", action="store_true", help="Use the raw data already on disk")
+    parser.add_argument("--force", action="store_true", help="Run the selected stages even if they are up to date")
+    parser.add_argument("--formats", default=",".join(DEFAULT_REPORT_FORMATS),
+                        help="Per-fund and compiled report formats, e.g. 'docx' or 'html,json'")
+    parser.add_argument("--jobs", type=int, default=2, help="Stages run at the same time")
+    parser.add_argument("--status", action="store_true", help="Show which selected stages are up to date and exit")
+    return parser.parse_args(argv)
+
+
+# Guarded so process-pool workers (spawned on Windows) do not re-run the pipeline
+### e.g. 'python main.py final --only' rebuilds only the final reports
+if __name__ == '__main__':
+    args = parse_args()
+    if args.status:
+        pipeline = build_pipeline(args.formats)
+        exclude = ["scrape"] if args.skip_scrape else []
+        for name, state in pipeline.status(args.targets or None, not args.only, exclude).items():
+            print(f"{name}: {state}")
+    else:
+        main(args.skip_scrape, args.formats, args.targets or None, upstream=not args.only, force=args.force, jobs=args.jobs)
@@ -1,34 +1,38 @@
 from misc.file_filter import delete_unwanted_files
+from web_scrapers.link_rules import POOL_RULES
+
+
+# The scrapers apply the same POOL_RULES before downloading, so this clean-up only
+# removes files left over from older runs and is otherwise a no-op.
+def delete_by_rules(folder_path, rules):
+    delete_unwanted_files(folder_path, rules.include, list(rules.extensions), rules.exclude)
 
 
 def run():
     # Brunel Delete
     try: 
         folder_path1 = "Data/raw_data/brunel_data"
-        keywords1 = ["Equities", "Portfolio", "Emerging"]
-        delete_unwanted_files(folder_path1, keywords1)
+        delete_by_rules(folder_path1, POOL_RULES["brunel"])
     except Exception as e:
         print(f"Error: {e}")
 
     
     # Bordertocoast Delete
     try: 
-        folder_path2 = "Data/raw_data/bordertocoast_data"
-        keywords2 = ["Equities", "Portfolio", "Emerging", "Equity"]
-        delete_unwanted_files(folder_path2, keywords2)
+        folder_path2 = "Data/raw_data/bordertocoast_data/pdf"
+        delete_by_rules(folder_path2, POOL_RULES["bordertocoast"])
     except Exception as e:
         print(f"Error: {e}")
 
 
     # lgpscentral Delete
     try: 
-        folder_path3 = "Data/raw_data/lgpscentral_data"
-        keywords3 = ["Equities", "Portfolio", "Emerging", "Equity"]
-        delete_unwanted_files(folder_path3, keywords3)
+        folder_path3 = "Data/raw_data/lgpscentral_data/pdf"
+        delete_by_rules(folder_path3, POOL_RULES["lgpscentral"])
     except Exception as e:
         print(f"Error: {e}")
 
 
 
 if __name__ == '__main__':
-    run()  # run the function when the script is executed directly
\ No newline at end of file
+    run()  # run the function when the script is executed directly
@@ -45,15 +45,31 @@ class LGPSDataAnalyzer:
             print(f"Error reading {file_path}: {e}")
             return ""
 
+    def extract_text_from_markdown(self, file_path: str) -> str:
+        # Markdown reports are already text; no document parsing needed
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return f.read().strip()
+        except OSError as e:
+            print(f"Error reading {file_path}: {e}")
+            return ""
+
     def load_data_from_folder(self, folder_path: str) -> None:
         for root, _, files in os.walk(folder_path):
+            stems = {os.path.splitext(filename)[0] for filename in files if filename.lower().endswith('.md')}
             for filename in files:
-                if filename.lower().endswith('.docx'):
-                    file_path = os.path.join(root, filename)
+                file_path = os.path.join(root, filename)
+                stem, extension = os.path.splitext(filename)
+                # A report written as both Markdown and Word is read from the Markdown copy
+                if extension.lower() == '.md':
+                    extracted_text = self.extract_text_from_markdown(file_path)
+                elif extension.lower() == '.docx' and stem not in stems:
                     extracted_text = self.extract_text_from_docx(file_path)
-                    if extracted_text:
-                        self.all_text.append(extracted_text)
-                        print(f"Loaded {filename}")
+                else:
+                    continue
+                if extracted_text:
+                    self.all_text.append(extracted_text)
+                    print(f"Loaded {filename}")
 
     def generate_insights(self, combined_text: str, prompt_template: str) -> str:
         full_prompt = prompt_template.format(combined_text=combined_text)
@@ -0,0 +1,147 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+
+OBJECTS_DIR = "Data/raw_data/objects"
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """Returns the hex sha256 of a file, read in chunks."""
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def _link_or_copy(source, target):
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+class DocumentStore:
+    """
+    Content-addressed store for raw pool documents.
+
+    Every document is kept once under 'Data/raw_data/objects/<sha[:2]>/<sha256>'. The pool
+    folder keeps its named working copies as hard links to those objects (copies where
+    links are not supported) and 'document_index.json' maps each name to its hash, so the
+    same holdings file published under two URLs is stored and analysed only once.
+    """
+
+    def __init__(self, pool_folder, objects_dir=OBJECTS_DIR):
+        """
+        Opens the store for one pool.
+        :param pool_folder: Folder holding the pool's named documents and its index
+        :param objects_dir: Folder holding the shared content-addressed objects
+        """
+        self.pool_folder = pool_folder
+        self.objects_dir = objects_dir
+        self.index_path = os.path.join(pool_folder, "document_index.json")
+        self._lock = threading.Lock()
+        self.index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self.index = json.load(f)
+
+    def object_path(self, sha256):
+        return os.path.join(self.objects_dir, sha256[:2], sha256)
+
+    def add(self, path):
+        """
+        Adds a downloaded document to the store.
+        Content already in the store is not kept twice: the working copy is replaced by a
+        link to the existing object.
+        :param path: Path of the document inside the pool folder
+        :return: sha256 of the document
+        """
+        sha256 = file_sha256(path)
+        object_path = self.object_path(sha256)
+        if not os.path.exists(object_path):
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            _link_or_copy(path, object_path)
+        elif not os.path.samefile(path, object_path):
+            tmp_path = f"{path}.tmp"
+            try:
+                os.link(object_path, tmp_path)
+                os.replace(tmp_path, path)
+            except OSError:
+                pass
+
+        stat = os.stat(path)
+        with self._lock:
+            self.index[os.path.basename(path)] = {
+                "sha256": sha256,
+                "size": stat.st_size,
+                "mtime": stat.st_mtime,
+            }
+        return sha256
+
+    def sha256_of(self, path):
+        """
+        Returns the hash of a document, using the index when the file is unchanged.
+        :param path: Path of the document inside the pool folder
+        """
+        entry = self.index.get(os.path.basename(path))
+        stat = os.stat(path)
+        if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            return entry["sha256"]
+        return file_sha256(path)
+
+    def names_for(self, sha256):
+        """Returns every indexed document name with the given hash."""
+        return sorted(name for name, entry in self.index.items() if entry["sha256"] == sha256)
+
+    def save(self):
+        """Writes the name -> hash index to disk."""
+        with self._lock:
+            os.makedirs(self.pool_folder, exist_ok=True)
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.index, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.index_path)
+
+
+class ProcessedLedger:
+    """
+    Records which document hashes an analysis stage has already turned into outputs,
+    so reruns can skip documents whose content has not changed.
+    Each entry also records the key it was produced under (e.g. the report formats and
+    layout); a document only counts as done for the same key.
+    """
+
+    def __init__(self, path, key=None):
+        """
+        Loads the ledger, starting empty if it does not exist yet.
+        :param path: JSON file the ledger is stored in
+        :param key: JSON-serialisable description of how outputs are produced in this run
+        """
+        self.path = path
+        self.key = key
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def is_done(self, sha256):
+        """True if the hash was processed under this ledger's key and all of its outputs still exist."""
+        entry = self.entries.get(sha256)
+        # Entries from before keys were recorded are plain output lists and never match
+        if not isinstance(entry, dict) or entry.get("key") != self.key:
+            return False
+        return all(os.path.exists(output) for output in entry["outputs"])
+
+    def mark(self, sha256, outputs):
+        """Records the outputs produced for a hash under this ledger's key."""
+        self.entries[sha256] = {"key": self.key, "outputs": list(outputs)}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
@@ -1,15 +1,17 @@
 import os
 
 
-def delete_unwanted_files(folder_path, keywords, file_extensions  = ['.xls', '.xlsx', '.pdf']):
+def delete_unwanted_files(folder_path, keywords, file_extensions  = ['.xls', '.xlsx', '.pdf'], exclude_keywords=()):
     """
     Deletes all Excel files in the specified folder that do not contain any of the specified keywords in their filenames.
     :param folder_path: The path to the folder containing the Excel files.
     :param keywords: A list of keywords to look for in the filenames. If a filename does not contain any of these keywords, it will be deleted.
+    :param exclude_keywords: Filenames containing any of these keywords are deleted as well.
     """
     for filename in os.listdir(folder_path):
         if any(filename.lower().endswith(ext) for ext in file_extensions):
-            if not any(keyword.lower() in filename.lower() for keyword in keywords):
+            if (not any(keyword.lower() in filename.lower() for keyword in keywords)
+                    or any(keyword.lower() in filename.lower() for keyword in exclude_keywords)):
                 file_path = os.path.join(folder_path, filename)
                 try:
                     os.remove(file_path)
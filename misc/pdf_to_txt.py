@@ -1,5 +1,14 @@
 import os
 import pdfplumber
+from misc.text_cache import PageTextCache
+
+
+def iter_pdfplumber_page_texts(pdf_file_path: str):
+    """Yields the pdfplumber text of each page of a PDF."""
+    with pdfplumber.open(pdf_file_path) as pdf:
+        for page in pdf.pages:
+            yield page.extract_text() or ''
+
 
 class PDFToTXTConverter:
     def __init__(self, input_folder: str, output_folder: str):
@@ -11,6 +20,7 @@ class PDFToTXTConverter:
         """
         self.input_folder = input_folder
         self.output_folder = output_folder
+        self.text_cache = PageTextCache(extractor='pdfplumber')
         self._create_output_folder()
 
     def _create_output_folder(self):
@@ -25,12 +35,8 @@ class PDFToTXTConverter:
         ]
 
     def _extract_text_from_pdf(self, pdf_file_path: str) -> str:
-        """Extract text content from a PDF file using pdfplumber."""
-        all_text = ''
-        with pdfplumber.open(pdf_file_path) as pdf:
-            for page in pdf.pages:
-                all_text += page.extract_text() or ''
-        return all_text
+        """Extract text content from a PDF file using pdfplumber (via the page text cache)."""
+        return ''.join(text for _, text in self.text_cache.iter_pages(pdf_file_path, iter_pdfplumber_page_texts))
 
     def _save_text_to_file(self, text: str, txt_file_path: str):
         """Save the extracted text to a TXT file."""
@@ -54,6 +60,7 @@ class PDFToTXTConverter:
             self._save_text_to_file(text, txt_file_path)
             print(f"Saved as '{txt_file_path}'")
 
+        self.text_cache.report()
         print("All PDF files have been converted to TXT files.")
 
 
@@ -0,0 +1,256 @@
+"""
+Make-style pipeline of stages with declared inputs and outputs.
+
+Stages form a DAG through their 'after' dependencies. A stage is up to date, and skipped,
+when the content hashes of its inputs (and its parameters) match the last successful run
+and all of its outputs exist. File hashes are cached by size and modification time, so
+unchanged archives are not re-read. Stages whose dependencies are done run concurrently
+in threads, so independent branches of the DAG overlap; stages that start process pools
+must therefore spawn their workers rather than fork them.
+
+The input digest is taken before a stage runs, so an input edited while the stage was
+running makes it stale for the next run. Stages that rewrite their own inputs (the raw
+data clean-up) declare it and are recorded with the digest after the run instead.
+Bookkeeping files that stages keep inside input folders (indexes, ledgers, manifests,
+partial downloads) are not part of the digest, so writing them does not make a stage stale.
+"""
+import os
+import json
+import hashlib
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from misc.document_store import file_sha256
+
+PIPELINE_STATE_PATH = "Data/cache/pipeline_state.json"
+# Sidecar files left out of input digests: the DocumentStore index, the ProcessedLedger of
+# the analysis stages, the scrapers' DownloadManifest, the compile index and partial writes
+SIDECAR_NAMES = {"document_index.json", "processed_documents.json", "download_manifest.json"}
+SIDECAR_SUFFIXES = (".tmp", ".part", ".index.json", ".rows.arrow")
+
+
+class Stage:
+    """
+    One step of the pipeline.
+    """
+
+    def __init__(self, name, action, inputs=(), outputs=(), after=(), params=None, always_run=False, groups=(),
+                 rewrites_inputs=False):
+        """
+        Declares a stage.
+        :param name: Unique stage name, used on the command line
+        :param action: Callable run without arguments
+        :param inputs: Files or folders the stage reads; their content decides whether it is up to date
+        :param outputs: Files or folders the stage writes; a missing output makes it stale
+        :param after: Names of the stages that must finish first
+        :param params: JSON-serialisable settings that change the outputs (e.g. report formats)
+        :param always_run: For stages with inputs outside the tree (web scraping): never up to date
+        :param groups: Other names the stage can be selected by (e.g. 'final')
+        :param rewrites_inputs: The action edits or deletes its own inputs; its digest is taken after it runs
+        """
+        self.name = name
+        self.action = action
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.after = list(after)
+        self.params = params or {}
+        self.always_run = always_run
+        self.groups = list(groups)
+        self.rewrites_inputs = rewrites_inputs
+
+
+def _iter_files(path):
+    if os.path.isfile(path):
+        yield path
+        return
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for filename in sorted(files):
+            if filename not in SIDECAR_NAMES and not filename.endswith(SIDECAR_SUFFIXES):
+                yield os.path.join(root, filename)
+
+
+class Pipeline:
+    """
+    Runs a DAG of stages, skipping the ones that are up to date.
+    """
+
+    def __init__(self, stages, state_path=PIPELINE_STATE_PATH):
+        """
+        Checks the DAG and loads the state of earlier runs.
+        :param stages: Stage objects
+        :param state_path: JSON file recording the inputs of each stage's last successful run
+        :raises ValueError: For duplicate names, unknown dependencies or cycles
+        """
+        self.stages = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage '{stage.name}'")
+            self.stages[stage.name] = stage
+        for stage in stages:
+            for name in stage.after:
+                if name not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' runs after unknown stage '{name}'")
+        self.order = self._topological_order()
+        self.state_path = state_path
+        self._lock = threading.Lock()
+        self.state = {"stages": {}, "files": {}}
+        if os.path.exists(state_path):
+            with open(state_path, "r", encoding="utf-8") as f:
+                self.state = json.load(f)
+
+    def _topological_order(self):
+        order = []
+        marks = {}
+
+        def visit(name, path):
+            if marks.get(name) == "done":
+                return
+            if marks.get(name) == "visiting":
+                raise ValueError(f"Stage cycle: {' -> '.join(path + [name])}")
+            marks[name] = "visiting"
+            for dependency in self.stages[name].after:
+                visit(dependency, path + [name])
+            marks[name] = "done"
+            order.append(name)
+
+        for name in self.stages:
+            visit(name, [])
+        return order
+
+    def select(self, targets=None, upstream=True, exclude=()):
+        """
+        Resolves stage and group names to the stages to consider, in run order.
+        :param targets: Stage or group names, None for every stage
+        :param upstream: Also select the stages the targets depend on (make semantics)
+        :param exclude: Stage or group names to leave out
+        :raises ValueError: For unknown names, or targets that the exclusions would leave out
+        """
+        selected = set(self._expand(targets) if targets else self.stages)
+        excluded = self._expand(exclude)
+        conflicts = [name for name in self.order if targets and name in selected & excluded]
+        if conflicts:
+            raise ValueError(f"Selected stages are also excluded: {', '.join(conflicts)}")
+        if upstream:
+            pending = list(selected)
+            while pending:
+                for dependency in self.stages[pending.pop()].after:
+                    if dependency not in selected:
+                        selected.add(dependency)
+                        pending.append(dependency)
+        selected -= excluded
+        return [name for name in self.order if name in selected]
+
+    def _expand(self, names):
+        expanded = set()
+        for name in names:
+            matches = [stage.name for stage in self.stages.values() if name == stage.name or name in stage.groups]
+            if not matches:
+                raise ValueError(f"Unknown stage or group '{name}', expected one of: {', '.join(self.names())}")
+            expanded.update(matches)
+        return expanded
+
+    def names(self):
+        """Returns every stage and group name."""
+        groups = {group for stage in self.stages.values() for group in stage.groups}
+        return list(self.order) + sorted(groups - set(self.order))
+
+    def _file_hash(self, path):
+        stat = os.stat(path)
+        with self._lock:
+            cached = self.state["files"].get(path)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        sha256 = file_sha256(path)
+        with self._lock:
+            self.state["files"][path] = [stat.st_size, stat.st_mtime_ns, sha256]
+        return sha256
+
+    def input_digest(self, stage):
+        """Returns the sha256 over the stage's parameters and the content of its inputs."""
+        sha256 = hashlib.sha256(json.dumps(stage.params, sort_keys=True, default=list).encode("utf-8"))
+        for path in stage.inputs:
+            if not os.path.exists(path):
+                sha256.update(f"{path}\0missing\n".encode("utf-8"))
+                continue
+            for file_path in _iter_files(path):
+                sha256.update(f"{file_path}\0{self._file_hash(file_path)}\n".encode("utf-8"))
+        return sha256.hexdigest()
+
+    def is_up_to_date(self, stage):
+        """True if the stage's inputs are unchanged since its last successful run and its outputs exist."""
+        if stage.always_run:
+            return False
+        last = self.state["stages"].get(stage.name)
+        return (
+            last is not None
+            and all(os.path.exists(output) for output in stage.outputs)
+            and last["digest"] == self.input_digest(stage)
+        )
+
+    def _record(self, stage, digest):
+        with self._lock:
+            self.state["stages"][stage.name] = {"digest": digest}
+            os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+            tmp_path = f"{self.state_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.state, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.state_path)
+
+    def _run_stage(self, stage, force):
+        if not force and self.is_up_to_date(stage):
+            return "up to date"
+        print(f"▶️ Running stage {stage.name}")
+        digest = None if stage.rewrites_inputs else self.input_digest(stage)
+        stage.action()
+        self._record(stage, digest or self.input_digest(stage))
+        return "ran"
+
+    def status(self, targets=None, upstream=True, exclude=()):
+        """Returns {stage name: 'up to date' | 'stale'} for the selected stages, without running anything."""
+        return {
+            name: "up to date" if self.is_up_to_date(self.stages[name]) else "stale"
+            for name in self.select(targets, upstream, exclude)
+        }
+
+    def run(self, targets=None, upstream=True, exclude=(), force=False, jobs=2):
+        """
+        Runs the selected stages, each once its selected dependencies have finished.
+        A failing stage does not stop independent branches; the stages after it are skipped.
+        :param targets: Stage or group names, None for every stage
+        :param upstream: Also run (or check) the stages the targets depend on
+        :param exclude: Stage or group names to leave out
+        :param force: Run the selected stages even if they are up to date
+        :param jobs: Stages run at the same time
+        :return: Dictionary of stage name -> 'ran', 'up to date', 'failed: ...' or 'skipped: ...'
+        """
+        selected = self.select(targets, upstream, exclude)
+        results = {}
+        running = {}
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+            while len(results) < len(selected):
+                for name in selected:
+                    if name in results or name in running.values():
+                        continue
+                    dependencies = [dependency for dependency in self.stages[name].after if dependency in selected]
+                    if any(dependency not in results for dependency in dependencies):
+                        continue
+                    failed = [dependency for dependency in dependencies if results[dependency] not in ("ran", "up to date")]
+                    if failed:
+                        results[name] = f"skipped: {', '.join(failed)} did not succeed"
+                        continue
+                    running[executor.submit(self._run_stage, self.stages[name], force)] = name
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        results[name] = f"failed: {type(e).__name__}: {e}"
+
+        for name in selected:
+            icon = {"ran": "✅", "up to date": "⏭️"}.get(results[name], "❌")
+            print(f"{icon} {name}: {results[name]}")
+        return {name: results[name] for name in selected}
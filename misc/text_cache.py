@@ -0,0 +1,95 @@
+import os
+import json
+
+import lz4.frame
+
+from misc.document_store import file_sha256
+
+TEXT_CACHE_DIR = "Data/cache/pdf_text"
+
+
+class PageTextCache:
+    """
+    On-disk cache of text extracted from PDF pages.
+
+    Pages are stored lz4-compressed under '<cache_dir>/<extractor>/<sha[:2]>/<sha256>/<page>.lz4',
+    keyed by the file's content hash, the page number and the extractor that produced them
+    (PyPDF2 and pdfplumber lay text out differently). A 'pages.json' marker is written once
+    every page of a document is cached.
+    """
+
+    def __init__(self, extractor, cache_dir=TEXT_CACHE_DIR):
+        """
+        Initializes the cache.
+        :param extractor: Name of the text extractor, e.g. 'pypdf2' or 'pdfplumber'
+        :param cache_dir: Root folder of the cache
+        """
+        self.extractor = extractor
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+
+    def _document_dir(self, sha256):
+        return os.path.join(self.cache_dir, self.extractor, sha256[:2], sha256)
+
+    def _write(self, path, data):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def page_count(self, sha256):
+        """Returns the number of cached pages of a fully cached document, else None."""
+        marker = os.path.join(self._document_dir(sha256), "pages.json")
+        if not os.path.exists(marker):
+            return None
+        with open(marker, "r", encoding="utf-8") as f:
+            return json.load(f)["pages"]
+
+    def get_page(self, sha256, page):
+        path = os.path.join(self._document_dir(sha256), f"{page}.lz4")
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return lz4.frame.decompress(f.read()).decode("utf-8")
+
+    def put_page(self, sha256, page, text):
+        document_dir = self._document_dir(sha256)
+        os.makedirs(document_dir, exist_ok=True)
+        self._write(os.path.join(document_dir, f"{page}.lz4"), lz4.frame.compress(text.encode("utf-8")))
+
+    def iter_pages(self, pdf_path, page_extractor, sha256=None):
+        """
+        Yields (page number, text) for every page of a PDF, one page at a time.
+        Cached pages are read back; otherwise page_extractor(pdf_path) is run and each
+        page it yields is cached as it goes.
+        :param pdf_path: Path to the PDF
+        :param page_extractor: Callable yielding the text of each page in order
+        :param sha256: Content hash of the PDF if already known
+        """
+        sha256 = sha256 or file_sha256(pdf_path)
+        count = self.page_count(sha256)
+        if count is not None:
+            cached = [os.path.exists(os.path.join(self._document_dir(sha256), f"{page}.lz4")) for page in range(count)]
+            if all(cached):
+                for page in range(count):
+                    self.hits += 1
+                    yield page, self.get_page(sha256, page)
+                return
+
+        count = 0
+        for page, text in enumerate(page_extractor(pdf_path)):
+            self.misses += 1
+            self.put_page(sha256, page, text)
+            count += 1
+            yield page, text
+        os.makedirs(self._document_dir(sha256), exist_ok=True)
+        self._write(
+            os.path.join(self._document_dir(sha256), "pages.json"),
+            json.dumps({"pages": count}).encode("utf-8"),
+        )
+
+    def report(self):
+        """Prints and returns the page hit/miss counts."""
+        print(f"📄 Text cache ({self.extractor}): {self.hits} page hits, {self.misses} page misses")
+        return {"hits": self.hits, "misses": self.misses}
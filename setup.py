@@ -7,9 +7,13 @@ setup(
     include_package_data=True,  # Include non-code files specified in MANIFEST.in
     install_requires=[
         "requests",
+        "httpx",
         "beautifulsoup4",
+        "lxml",
         "pdfplumber",
         "pandas",
-        "openpyxl"
+        "openpyxl",
+        "lz4",
+        "pyarrow"
     ],  # Add any dependencies here 
 )
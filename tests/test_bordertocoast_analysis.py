@@ -0,0 +1,63 @@
+import os
+
+import numpy as np
+from matplotlib.backends.backend_pdf import FigureCanvasPdf
+from matplotlib.figure import Figure
+
+from Data_Analyzer.Bordertocoast_LGPS_data_analysis import LGPSDataAnalysis
+from Data_Analyzer.holdings_store import read_frame
+from misc.text_cache import PageTextCache
+
+
+def test_shares_beyond_int64_parse_as_float():
+    text = "12.50 10,000,000,000,000,000,000 1,234.00\n3.10 1,500 4,650.00"
+    pages = list(LGPSDataAnalysis.iter_holdings_pages([(1, text)]))
+    assert len(pages) == 1
+    page, prices, shares, base_values = pages[0]
+    assert page == 1
+    assert shares.dtype == np.float64
+    np.testing.assert_allclose(shares, [1e19, 1500.0])
+    np.testing.assert_allclose(prices, [12.5, 3.1])
+    np.testing.assert_allclose(base_values, [1234.0, 4650.0])
+
+
+def test_parse_holdings_columns_are_float64():
+    analysis = LGPSDataAnalysis.__new__(LGPSDataAnalysis)
+    frame = analysis.parse_holdings([(2, "1.00 10 10.00"), (3, "no rows here")])
+    assert list(frame.columns) == ["Max of Local Price", "Shares/Par", "Base Value", "Page"]
+    assert frame["Shares/Par"].dtype == np.float64
+    assert frame["Page"].tolist() == [2]
+
+
+def write_holdings_pdf(path, rows):
+    figure = Figure()
+    figure.text(0.1, 0.5, "\n".join(f"{price:.2f} {shares:,} {price * shares:,.2f}" for price, shares in rows))
+    FigureCanvasPdf(figure).print_pdf(str(path))
+
+
+def analyse(input_directory, root, workers):
+    analysis = LGPSDataAnalysis(str(input_directory), str(root / "documents"), str(root / "images"))
+    analysis.text_cache = PageTextCache("pypdf2", cache_dir=str(root / "cache"))
+    return analysis.process_all_pdfs(workers=workers)
+
+
+def test_pooled_results_match_serial_in_order(tmp_path):
+    pdfs = tmp_path / "pdf"
+    pdfs.mkdir()
+    # Written out of name order, with one file that has no holdings at all
+    for name, rows in [("c_fund.pdf", [(4.0, 250), (1.5, 1000)]), ("a_fund.pdf", [(12.5, 1500)]),
+                       ("d_fund.pdf", []), ("b_fund.pdf", [(3.1, 2000), (7.25, 40), (0.5, 8)])]:
+        write_holdings_pdf(pdfs / name, rows)
+
+    serial = analyse(pdfs, tmp_path / "serial", workers=1)
+    pooled = analyse(pdfs, tmp_path / "pooled", workers=2)
+
+    assert [result["filename"] for result in pooled] == ["a_fund.pdf", "b_fund.pdf", "c_fund.pdf", "d_fund.pdf"]
+    assert [result["filename"] for result in pooled] == [result["filename"] for result in serial]
+    assert [result["error"] for result in pooled] == [result["error"] for result in serial] == [None] * 4
+    assert [result["cache_misses"] for result in pooled] == [result["cache_misses"] for result in serial]
+    for serial_result, pooled_result in zip(serial, pooled):
+        assert [os.path.basename(path) for path in pooled_result["outputs"]] == \
+               [os.path.basename(path) for path in serial_result["outputs"]]
+        assert read_frame(pooled_result["outputs"][-1]).equals(read_frame(serial_result["outputs"][-1]))
+    assert read_frame(pooled[1]["outputs"][-1])["Value"].tolist()[-1] == 3.1 * 2000 + 7.25 * 40 + 0.5 * 8
@@ -0,0 +1,44 @@
+import os
+
+from openpyxl import Workbook
+
+from Data_Analyzer.Brunel_LGPS_data_analysis import LGPSDataAnalyzer
+from Data_Analyzer.excel_ingest import HoldingsWorkbookReader
+from Data_Analyzer.holdings_schema import CategoryDictionary
+
+
+def write_holdings_workbook(path):
+    workbook = Workbook()
+    worksheet = workbook.active
+    worksheet.title = "Holdings"
+    worksheet.append(["Base Market Value", "Issue Country Name", "Incorporated Country Name",
+                      "Investment Type Name", "Major Industry Name"])
+    worksheet.append([100.0, "UNITED KINGDOM", "UNITED KINGDOM", "Equity", "Financials"])
+    worksheet.append([40.0, "JAPAN", "JAPAN", "Unit Trust Fund", "Energy"])
+    workbook.save(path)
+
+
+def analyse(tmp_path, formats):
+    analyzer = LGPSDataAnalyzer(str(tmp_path / "raw"), str(tmp_path / "documents"), str(tmp_path / "supporting"),
+                                report_formats=formats)
+    analyzer.reader = HoldingsWorkbookReader(cache_dir=None, categories=CategoryDictionary())
+    analyzer.run_analysis()
+    return sorted(os.listdir(tmp_path / "documents"))
+
+
+def test_rerun_with_new_formats_writes_them(tmp_path):
+    os.makedirs(tmp_path / "raw")
+    write_holdings_workbook(tmp_path / "raw" / "fund.xlsx")
+    report = "fund_LGPS_Data_Analysis_Report"
+
+    assert f"{report}.docx" in analyse(tmp_path, "docx")
+    assert f"{report}.html" not in analyse(tmp_path, "docx")
+
+    written = analyse(tmp_path, "html,json")
+    assert {f"{report}.html", f"{report}.json"} <= set(written)
+    html_mtime = os.path.getmtime(tmp_path / "documents" / f"{report}.html")
+
+    # The same formats again: the workbook is skipped and nothing is rewritten
+    os.utime(tmp_path / "documents" / f"{report}.html", (html_mtime - 60, html_mtime - 60))
+    analyse(tmp_path, "json,html")
+    assert os.path.getmtime(tmp_path / "documents" / f"{report}.html") == html_mtime - 60
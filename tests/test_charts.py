@@ -0,0 +1,70 @@
+import numpy as np
+
+from Data_Analyzer.charts import (DENSE_THRESHOLD, DENSITY_BINS, bar_chart, chart_digest, histogram, pie_chart,
+                                  render_charts, scatter_chart, stored_digest)
+
+
+def test_unchanged_charts_are_skipped(tmp_path):
+    bar_path = str(tmp_path / "bar.png")
+    pie_path = str(tmp_path / "pie.png")
+    charts = {
+        bar_path: bar_chart(["A", "B"], [1.0, 2.0], "Bar", "Label", "Value"),
+        pie_path: pie_chart(["A", "B"], [3.0, 4.0], "Pie"),
+    }
+    assert render_charts(charts) == {"rendered": 2, "skipped": 0}
+    assert stored_digest(bar_path) == chart_digest(charts[bar_path])
+    assert render_charts(charts) == {"rendered": 0, "skipped": 2}
+
+    charts[pie_path] = pie_chart(["A", "B"], [3.0, 5.0], "Pie")
+    assert render_charts(charts) == {"rendered": 1, "skipped": 1}
+    assert stored_digest(pie_path) == chart_digest(charts[pie_path])
+
+
+def test_process_pool_renders_every_stale_chart(tmp_path):
+    values = np.arange(100, dtype=float)
+    charts = {str(tmp_path / f"hist_{bins}.png"): histogram(values, "Histogram", "Value", bins=bins) for bins in (5, 10, 20)}
+    assert render_charts(charts, workers=2) == {"rendered": 3, "skipped": 0}
+    assert all(stored_digest(path) == chart_digest(spec) for path, spec in charts.items())
+
+
+def test_large_histogram_is_binned_before_rendering(tmp_path):
+    rng = np.random.default_rng(5)
+    values = rng.uniform(-50.0, 100.0, DENSE_THRESHOLD + 1000)
+    values[:3] = np.nan
+    spec = histogram(values, "Histogram", "Value", bins=40)
+    assert spec["kind"] == "binned"
+    assert spec["xscale"] == "linear"
+    assert "values" not in spec["series"]
+    assert len(spec["series"]["counts"]) == 40
+    assert len(spec["series"]["edges"]) == 41
+    assert spec["series"]["counts"].sum() == len(values) - 3
+
+    # Positive values spanning many orders of magnitude get log-spaced bins
+    wide = histogram(rng.lognormal(10.0, 3.0, DENSE_THRESHOLD + 1), "Wide", "Value")
+    assert wide["xscale"] == "log"
+    ratios = wide["series"]["edges"][1:] / wide["series"]["edges"][:-1]
+    np.testing.assert_allclose(ratios, ratios[0])
+
+    path = str(tmp_path / "hist.png")
+    assert render_charts({path: spec}) == {"rendered": 1, "skipped": 0}
+    assert stored_digest(path) == chart_digest(spec)
+
+
+def test_large_scatter_becomes_a_density_grid(tmp_path):
+    rng = np.random.default_rng(6)
+    rows = DENSE_THRESHOLD * 2
+    x = rng.lognormal(8.0, 3.0, rows)
+    y = rng.normal(0.0, 1.0, rows)
+    y[0] = np.inf
+    spec = scatter_chart(x, y, "Scatter", "X", "Y")
+    assert spec["kind"] == "density"
+    assert (spec["xscale"], spec["yscale"]) == ("log", "linear")
+    assert set(spec["series"]) == {"counts", "x_edges", "y_edges"}
+    assert spec["series"]["counts"].shape == (DENSITY_BINS, DENSITY_BINS)
+    assert spec["series"]["counts"].sum() == rows - 1
+
+    path = str(tmp_path / "scatter.png")
+    assert render_charts({path: spec}) == {"rendered": 1, "skipped": 0}
+    assert stored_digest(path) == chart_digest(spec)
+    # Small inputs keep every point
+    assert scatter_chart(x[:DENSE_THRESHOLD], y[:DENSE_THRESHOLD], "Scatter", "X", "Y")["kind"] == "scatter"
@@ -0,0 +1,80 @@
+import os
+
+import pandas as pd
+
+from Data_Analyzer import data_compiler
+from Data_Analyzer.data_compiler import CompileIndex, compile_financial_data, load_reports
+from Data_Analyzer.holdings_store import metrics_path_for, read_frame, write_frame
+
+
+def write_report(folder, name, values):
+    """Writes the metrics file of a per-fund report (no Word copy)."""
+    docx_path = os.path.join(folder, f"{name}_Analysis_Report.docx")
+    write_frame(pd.DataFrame({"Metric": ["Base Value", "Shares/Par"], "Value": values}), metrics_path_for(docx_path))
+    return metrics_path_for(docx_path)
+
+
+def test_compile_only_rereads_new_or_changed_reports(tmp_path, monkeypatch):
+    documents = tmp_path / "documents"
+    output = tmp_path / "compiled" / "LGPS_Compiled_Financial_Report.docx"
+    write_report(documents, "Global-Equity-Fund-Global-2024", [10.0, 1.0])
+    second = write_report(documents, "UK-Listed-Equity-Fund-UK-2024", [20.0, 2.0])
+
+    reads = []
+    load_report_metrics = data_compiler.load_report_metrics
+
+    def counting_load(file_path):
+        reads.append(os.path.basename(str(file_path)))
+        return load_report_metrics(file_path)
+
+    monkeypatch.setattr(data_compiler, "load_report_metrics", counting_load)
+
+    def compile_and_read():
+        compile_financial_data(str(documents), str(output), ("csv",), workers=1)
+        return read_frame(str(output).replace(".docx", ".arrow"))
+
+    compiled = compile_and_read()
+    assert compiled.columns.tolist() == ["Fund Name", "Market", "Metric", "Value"]
+    assert compiled["Fund Name"].unique().tolist() == ["Global-Equity-Fund", "UK-Listed-Equity-Fund"]
+    assert len(reads) == 2
+
+    compile_and_read()
+    assert len(reads) == 2
+
+    write_report(documents, "UK-Listed-Equity-Fund-UK-2024", [25.0, 2.0])
+    compiled = compile_and_read()
+    assert reads[2:] == ["UK-Listed-Equity-Fund-UK-2024_Analysis_Report.docx"]
+    assert compiled["Value"].tolist() == [10.0, 1.0, 25.0, 2.0]
+
+    os.remove(second)
+    compiled = compile_and_read()
+    assert len(reads) == 3
+    assert compiled["Fund Name"].unique().tolist() == ["Global-Equity-Fund"]
+    assert list(CompileIndex(output).reports) == ["Global-Equity-Fund-Global-2024_Analysis_Report.docx"]
+
+
+def test_index_trusts_unchanged_content_after_a_touch(tmp_path):
+    source = write_report(tmp_path, "Fund-Market-2024", [1.0, 2.0])
+    index = CompileIndex(tmp_path / "compiled.docx")
+    rows = read_frame(source)
+    index.update("report.docx", source, rows)
+    index.save(["report.docx"], ["docx"], [])
+
+    reloaded = CompileIndex(tmp_path / "compiled.docx")
+    assert reloaded.rows["report.docx"].equals(rows)
+    os.utime(source, (0, 0))
+    assert reloaded.is_current("report.docx", source)
+    assert not reloaded.is_current("report.docx", write_report(tmp_path, "Other-Market-2024", [1.0, 2.0]))
+    assert reloaded.prune([]) == ["report.docx"] and not reloaded.rows
+
+
+def test_load_reports_in_a_process_pool_matches_serial(tmp_path):
+    files = [
+        os.path.join(tmp_path, f"Fund-{index}-Market-2024_Analysis_Report.docx")
+        for index in range(3)
+    ]
+    for index, file in enumerate(files):
+        write_frame(pd.DataFrame({"Metric": ["Base Value"], "Value": [float(index)]}), metrics_path_for(file))
+    serial = load_reports(files, workers=1)
+    pooled = load_reports(files, workers=2)
+    assert all(left.equals(right) for left, right in zip(serial, pooled))
@@ -0,0 +1,58 @@
+import os
+
+from misc.document_store import DocumentStore, ProcessedLedger, file_sha256
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return str(path)
+
+
+def test_same_content_under_two_names_is_stored_once(tmp_path):
+    pool = tmp_path / "pool"
+    objects = tmp_path / "objects"
+    first = write(pool / "holdings-june.pdf", b"holdings")
+    second = write(pool / "holdings-june-copy.pdf", b"holdings")
+    other = write(pool / "holdings-december.pdf", b"other holdings")
+
+    store = DocumentStore(str(pool), str(objects))
+    sha256 = store.add(first)
+    assert store.add(second) == sha256 == file_sha256(first)
+    store.add(other)
+    assert os.path.samefile(first, second)
+    assert sum(len(files) for _, _, files in os.walk(objects)) == 2
+    assert store.names_for(sha256) == ["holdings-june-copy.pdf", "holdings-june.pdf"]
+
+    store.save()
+    reloaded = DocumentStore(str(pool), str(objects))
+    assert reloaded.sha256_of(other) == file_sha256(other)
+    write(other, b"changed holdings")
+    assert reloaded.sha256_of(other) == file_sha256(other)
+
+
+def test_ledger_skips_only_hashes_whose_outputs_exist(tmp_path):
+    output = write(tmp_path / "out" / "report.docx", b"report")
+    ledger = ProcessedLedger(str(tmp_path / "ledger.json"))
+    ledger.mark("abc", [output])
+    ledger.save()
+
+    reloaded = ProcessedLedger(str(tmp_path / "ledger.json"))
+    assert reloaded.is_done("abc") and not reloaded.is_done("def")
+    os.remove(output)
+    assert not reloaded.is_done("abc")
+
+
+def test_ledger_entries_only_count_for_the_same_key(tmp_path):
+    output = write(tmp_path / "out" / "report.docx", b"report")
+    ledger = ProcessedLedger(str(tmp_path / "ledger.json"), key={"formats": ["docx"]})
+    ledger.mark("abc", [output])
+    ledger.save()
+
+    assert ProcessedLedger(str(tmp_path / "ledger.json"), key={"formats": ["docx"]}).is_done("abc")
+    assert not ProcessedLedger(str(tmp_path / "ledger.json"), key={"formats": ["html", "json"]}).is_done("abc")
+    # Ledgers written before entries had keys are processed again
+    with open(tmp_path / "ledger.json", "w", encoding="utf-8") as f:
+        f.write('{"abc": ["%s"]}' % output)
+    assert not ProcessedLedger(str(tmp_path / "ledger.json"), key={"formats": ["docx"]}).is_done("abc")
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+from docx import Document
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.oxml.ns import qn
+
+from Data_Analyzer.docx_tables import add_dataframe_table, build_dataframe_table, iter_docx_tables
+
+
+def test_tables_round_trip_through_python_docx_and_the_streaming_reader(tmp_path):
+    metrics = pd.DataFrame({"Metric": ["Sum & <total>", " padded ", "tab\there", "two\nlines"], "Value": [1.5, 2.0, 3.25, None]})
+    doc = Document()
+    doc.add_paragraph("Before")
+    add_dataframe_table(doc, metrics, formats={"Value": "{:,.2f}"}, alignments={"Value": "right"}, autofit=True)
+    doc.add_paragraph("Between")
+    add_dataframe_table(doc, pd.DataFrame([[1, 2]], columns=["A", "A"]), header=False)
+    path = tmp_path / "tables.docx"
+    doc.save(path)
+
+    reopened = Document(path)
+    expected = [
+        [["Metric", "Value"], ["Sum & <total>", "1.50"], ["padded", "2.00"], ["tab\there", "3.25"], ["two\nlines", "nan"]],
+        [["1", "2"]],
+    ]
+    assert [[[cell.text.strip() for cell in row.cells] for row in table.rows] for table in reopened.tables] == expected
+    assert list(iter_docx_tables(path)) == expected
+    assert reopened.tables[0].rows[1].cells[1].paragraphs[0].alignment == WD_ALIGN_PARAGRAPH.RIGHT
+    assert [paragraph.text for paragraph in reopened.paragraphs] == ["Before", "Between"]
+
+
+def test_bulk_writer_matches_python_docx_cell_by_cell():
+    frame = pd.DataFrame({
+        "Fund & <Co>": ["Café Zürich", "日本株式 & Co", "a < b > c"],
+        "Value": [1234.5, np.nan, -0.125],
+    })
+    doc = Document()
+    table = build_dataframe_table(doc, frame, formats={"Value": "{:,.2f}"}, style="Table Grid", autofit=False)
+
+    # Reference: the same table filled through python-docx one cell at a time
+    reference = doc.add_table(rows=len(frame) + 1, cols=2)
+    for row_index, row in enumerate([list(frame.columns), *[[name, f"{value:,.2f}"] for name, value in
+                                                            frame.itertuples(index=False)]]):
+        for column_index, text in enumerate(row):
+            reference.cell(row_index, column_index).text = text
+
+    texts = [[cell.text for cell in row.cells] for row in table.rows]
+    assert texts == [[cell.text for cell in row.cells] for row in reference.rows]
+    assert texts == [["Fund & <Co>", "Value"], ["Café Zürich", "1,234.50"], ["日本株式 & Co", "nan"], ["a < b > c", "-0.12"]]
+
+    # Header row: plain cells, styled through the table style's first-row formatting
+    assert table.style.name == "Table Grid"
+    assert table._tbl.tblPr.find(qn("w:tblLook")).get(qn("w:firstRow")) == "1"
+    assert all(cell.paragraphs[0].alignment is None for cell in table.rows[0].cells)
+    assert table.autofit is False
+
+    # Every column gets an equal share of the page width, like add_table
+    widths = [column.width for column in reference.columns]
+    assert [column.width for column in table.columns] == widths
+    assert all(cell.width == widths[index] for row in table.rows for index, cell in enumerate(row.cells))
+    assert abs(sum(widths) - doc._block_width) < len(widths) * 635
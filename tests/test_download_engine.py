@@ -0,0 +1,163 @@
+import json
+import os
+
+import httpx
+
+from web_scrapers.download_engine import DownloadEngine
+from web_scrapers.download_manifest import DownloadManifest
+from web_scrapers.http_replay import HttpArchive, ReplayServer
+
+URL = "https://example.org/docs/report.pdf"
+BODY = bytes(range(256)) * 40
+ETAG = '"v1"'
+
+
+def engine_with(handler):
+    engine = DownloadEngine(max_workers=2, retries=0)
+    engine._clients["example.org"] = httpx.Client(transport=httpx.MockTransport(handler))
+    return engine
+
+
+def serve_file(requests):
+    def handler(request):
+        requests.append(dict(request.headers))
+        if request.headers.get("If-None-Match") == ETAG:
+            return httpx.Response(304)
+        range_header = request.headers.get("Range")
+        if range_header:
+            start = int(range_header[len("bytes="):-1])
+            if start >= len(BODY) or request.headers.get("If-Range") != ETAG:
+                return httpx.Response(416)
+            return httpx.Response(206, content=BODY[start:], headers={
+                "Content-Range": f"bytes {start}-{len(BODY) - 1}/{len(BODY)}", "ETag": ETAG,
+            })
+        return httpx.Response(200, content=BODY, headers={"ETag": ETAG})
+    return handler
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_manifest_turns_reruns_into_conditional_requests(tmp_path):
+    requests = []
+    manifest = DownloadManifest(str(tmp_path / "manifest.json"))
+    with engine_with(serve_file(requests)) as engine:
+        assert engine.download_files([URL, URL], str(tmp_path)) == [str(tmp_path / "report.pdf")]
+    assert len(requests) == 1
+
+    with engine_with(serve_file(requests)) as engine:
+        engine.download_files([URL], str(tmp_path), manifest)
+    entry = DownloadManifest(str(tmp_path / "manifest.json")).get(URL)
+    assert entry["etag"] == ETAG and entry["size"] == len(BODY)
+
+    with engine_with(serve_file(requests)) as engine:
+        assert engine.download_files([URL], str(tmp_path), manifest) == [str(tmp_path / "report.pdf")]
+    assert requests[-1]["if-none-match"] == ETAG
+    assert read(tmp_path / "report.pdf") == BODY
+
+    # A local copy of the wrong size is fetched in full again
+    with open(tmp_path / "report.pdf", "wb") as f:
+        f.write(b"truncated")
+    assert manifest.conditional_headers(URL, str(tmp_path / "report.pdf")) == {}
+
+
+def test_partial_download_resumes_with_range(tmp_path):
+    target = tmp_path / "report.pdf"
+    with open(f"{target}.part", "wb") as f:
+        f.write(BODY[:1000])
+    with open(f"{target}.part.json", "w", encoding="utf-8") as f:
+        json.dump({"url": URL, "validator": ETAG}, f)
+
+    requests = []
+    manifest = DownloadManifest(str(tmp_path / "manifest.json"))
+    with engine_with(serve_file(requests)) as engine:
+        engine.download_files([URL], str(tmp_path), manifest)
+    assert requests[0]["range"] == "bytes=1000-"
+    assert read(target) == BODY
+    assert not os.path.exists(f"{target}.part") and not os.path.exists(f"{target}.part.json")
+    # The hash covers the resumed bytes too
+    assert manifest.get(URL)["sha256"] == DownloadEngine._hash_existing(str(target)).hexdigest()
+
+
+def test_unsatisfiable_range_restarts_the_download(tmp_path):
+    target = tmp_path / "report.pdf"
+    with open(f"{target}.part", "wb") as f:
+        f.write(b"x" * (len(BODY) + 10))
+    with open(f"{target}.part.json", "w", encoding="utf-8") as f:
+        json.dump({"url": URL, "validator": ETAG}, f)
+
+    requests = []
+    with engine_with(serve_file(requests)) as engine:
+        engine.download_files([URL], str(tmp_path))
+    assert "range" in requests[0] and "range" not in requests[1]
+    assert read(target) == BODY
+
+
+def test_target_paths_keep_same_named_files_apart(tmp_path):
+    links = ["https://a.org/x/report.pdf", "https://a.org/y/report.pdf", "https://a.org/x/report.pdf"]
+    paths = DownloadEngine.target_paths(links, str(tmp_path))
+    assert paths[0] == str(tmp_path / "report.pdf")
+    assert paths[1] != paths[0] and paths[1].endswith(".pdf")
+    assert paths[2] == paths[0]
+
+
+def recorded_archive(tmp_path, count=6):
+    archive = HttpArchive(str(tmp_path / "archive"))
+    bodies = {}
+    for index in range(count):
+        url = f"https://pool{index % 2}.example.org/docs/holdings-{index}.pdf"
+        bodies[url] = bytes([index]) * (50_000 + index)
+        archive.add(url, {"ETag": f'"{index}"', "Content-Type": "application/pdf"}, bodies[url])
+    return archive, bodies
+
+
+def test_retries_recover_from_injected_failures(tmp_path):
+    archive, bodies = recorded_archive(tmp_path)
+    with ReplayServer(archive, error_rate=0.3, seed=1) as server, \
+            DownloadEngine(max_workers=4, retries=8, rewrite_url=server.rewrite_url) as engine:
+        paths = engine.download_files(list(bodies), str(tmp_path / "downloads"))
+        errors_injected = server.errors_injected
+    assert errors_injected > 0
+    assert [read(path) for path in paths] == list(bodies.values())
+
+
+def test_failed_file_does_not_abort_the_batch(tmp_path):
+    archive, bodies = recorded_archive(tmp_path)
+    missing = "https://pool0.example.org/docs/withdrawn.pdf"
+    links = [*list(bodies)[:2], missing, *list(bodies)[2:]]
+    with ReplayServer(archive) as server, \
+            DownloadEngine(max_workers=4, retries=2, rewrite_url=server.rewrite_url) as engine:
+        paths = engine.download_files(links, str(tmp_path / "downloads"))
+        # The 404 is not retried
+        assert server.requests_served == len(links)
+    assert [os.path.basename(path) for path in paths] == [os.path.basename(url) for url in bodies]
+
+
+def test_one_pooled_client_per_host():
+    with DownloadEngine(max_workers=3) as engine:
+        first = engine.client_for("https://pool0.example.org/a.pdf")
+        assert engine.client_for("https://pool0.example.org/b/c.pdf") is first
+        assert engine.client_for("https://pool1.example.org/a.pdf") is not first
+        assert sorted(engine._clients) == ["pool0.example.org", "pool1.example.org"]
+    assert engine._clients == {}
+
+
+def test_get_retries_server_errors_only(tmp_path):
+    statuses = iter([503, 502, 200])
+    attempts = []
+
+    def handler(request):
+        attempts.append(request.url.path)
+        status = next(statuses)
+        return httpx.Response(status, text="listing" if status == 200 else "")
+
+    engine = engine_with(handler)
+    engine.retries = 2
+    assert engine.get("https://example.org/listing").text == "listing"
+    assert len(attempts) == 3
+
+    engine = engine_with(lambda request: httpx.Response(404))
+    engine.retries = 2
+    assert engine.get("https://example.org/missing").status_code == 404
@@ -0,0 +1,96 @@
+import json
+import os
+
+import httpx
+import pytest
+
+from web_scrapers import download_manifest
+from web_scrapers.download_engine import DownloadEngine
+from web_scrapers.download_manifest import DownloadManifest
+
+URL = "https://example.org/docs/holdings.pdf"
+LAST_MODIFIED = "Wed, 01 May 2024 10:00:00 GMT"
+
+
+def saved_file(tmp_path, data=b"holdings"):
+    path = tmp_path / "holdings.pdf"
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_conditional_headers_follow_the_recorded_validators(tmp_path):
+    path = saved_file(tmp_path)
+    manifest = DownloadManifest(str(tmp_path / "manifest.json"))
+    assert manifest.conditional_headers(URL, path) == {}
+
+    manifest.record(URL, path, etag='"abc"', last_modified=None, size=8, sha256="0" * 64)
+    assert manifest.conditional_headers(URL, path) == {"If-None-Match": '"abc"'}
+
+    manifest.record(URL, path, etag=None, last_modified=LAST_MODIFIED, size=8, sha256="0" * 64)
+    assert manifest.conditional_headers(URL, path) == {"If-Modified-Since": LAST_MODIFIED}
+
+    manifest.record(URL, path, etag='"abc"', last_modified=LAST_MODIFIED, size=8, sha256="0" * 64)
+    assert manifest.conditional_headers(URL, path) == {"If-None-Match": '"abc"', "If-Modified-Since": LAST_MODIFIED}
+
+    # No revalidation for a copy saved elsewhere, missing or of another size
+    assert manifest.conditional_headers(URL, str(tmp_path / "elsewhere.pdf")) == {}
+    os.truncate(path, 4)
+    assert manifest.conditional_headers(URL, path) == {}
+    os.remove(path)
+    assert manifest.conditional_headers(URL, path) == {}
+
+
+def test_not_modified_leaves_file_and_manifest_untouched(tmp_path):
+    manifest_path = str(tmp_path / "manifest.json")
+    path = saved_file(tmp_path)
+    manifest = DownloadManifest(manifest_path)
+    manifest.record(URL, path, etag='"abc"', last_modified=None, size=8, sha256="0" * 64)
+    manifest.save()
+    with open(manifest_path, "rb") as f:
+        saved = f.read()
+    mtime = os.stat(path).st_mtime_ns
+
+    requests = []
+
+    def handler(request):
+        requests.append(request.headers.get("If-None-Match"))
+        return httpx.Response(304)
+
+    engine = DownloadEngine(retries=0)
+    engine._clients["example.org"] = httpx.Client(transport=httpx.MockTransport(handler))
+    with engine:
+        assert engine.download_files([URL], str(tmp_path), manifest) == [path]
+
+    assert requests == ['"abc"']
+    assert os.stat(path).st_mtime_ns == mtime
+    assert (tmp_path / "holdings.pdf").read_bytes() == b"holdings"
+    with open(manifest_path, "rb") as f:
+        assert f.read() == saved
+
+
+def test_save_is_atomic(tmp_path, monkeypatch):
+    manifest_path = str(tmp_path / "manifest.json")
+    manifest = DownloadManifest(manifest_path)
+    manifest.record(URL, "holdings.pdf", etag='"abc"', last_modified=None, size=8, sha256="0" * 64)
+    manifest.save()
+
+    manifest.record("https://example.org/other.pdf", "other.pdf", etag=None, last_modified=None, size=1, sha256="1" * 64)
+
+    def failing_dump(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(download_manifest.json, "dump", failing_dump)
+    with pytest.raises(OSError):
+        manifest.save()
+    monkeypatch.undo()
+
+    # The manifest on disk is the complete earlier version
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        assert list(json.load(f)) == [URL]
+    assert list(DownloadManifest(manifest_path).entries) == [URL]
+
+
+def test_unreadable_manifest_starts_empty(tmp_path):
+    manifest_path = tmp_path / "manifest.json"
+    manifest_path.write_text("{not json", encoding="utf-8")
+    assert DownloadManifest(str(manifest_path)).entries == {}
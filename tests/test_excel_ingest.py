@@ -0,0 +1,83 @@
+from openpyxl import Workbook
+
+from Data_Analyzer.excel_ingest import HOLDINGS_COLUMNS, HoldingsWorkbookReader
+from Data_Analyzer.holdings_schema import CategoryDictionary
+from Data_Analyzer.holdings_store import read_frame
+
+HEADER = ["Security Name", " Base Market Value ", "Issue Country Name", "Incorporated Country Name",
+          "Investment Type Name", "Major Industry Name", "Notes"]
+
+
+def write_workbook(path, sheets):
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    for title, rows in sheets.items():
+        worksheet = workbook.create_sheet(title)
+        worksheet.append(HEADER)
+        for row in rows:
+            worksheet.append(row)
+    workbook.save(path)
+
+
+def holdings_workbook(path, equity_value=100.0):
+    write_workbook(path, {
+        "Q1": [["Alpha plc", equity_value, "UK", "UK", "Equity", "Finance", "note"],
+               ["Beta inc", 50.5, "US", "US", "Bond", "Energy", None]],
+        "Q2": [["Gamma ag", 20.0, "DE", "DE", "Equity", "Industrials", "note"]],
+    })
+    return path
+
+
+def reader_for(tmp_path, columns=HOLDINGS_COLUMNS):
+    return HoldingsWorkbookReader(columns=columns, cache_dir=str(tmp_path / "cache"), categories=CategoryDictionary())
+
+
+def read_all(reader, path):
+    return {name: data for name, data in reader.iter_sheets(str(path))}
+
+
+def test_unchanged_workbook_is_read_from_the_cache(tmp_path):
+    path = holdings_workbook(tmp_path / "holdings.xlsx")
+    first = reader_for(tmp_path)
+    parsed = read_all(first, path)
+    assert (first.hits, first.misses) == (0, 2)
+
+    second = reader_for(tmp_path)
+    cached = read_all(second, path)
+    assert (second.hits, second.misses) == (2, 0)
+    assert list(cached) == ["Q1", "Q2"]
+    for name in parsed:
+        assert cached[name]["Base Market Value"].tolist() == parsed[name]["Base Market Value"].tolist()
+        assert cached[name]["Issue Country Name"].astype(str).tolist() == \
+               parsed[name]["Issue Country Name"].astype(str).tolist()
+    assert second.load_sheet(str(path), "Q2")["Major Industry Name"].tolist() == ["Industrials"]
+    assert (second.hits, second.misses) == (3, 0)
+
+
+def test_changed_workbook_is_parsed_again(tmp_path):
+    path = holdings_workbook(tmp_path / "holdings.xlsx")
+    read_all(reader_for(tmp_path), path)
+
+    holdings_workbook(path, equity_value=999.0)
+    reader = reader_for(tmp_path)
+    sheets = read_all(reader, path)
+    assert (reader.hits, reader.misses) == (0, 2)
+    assert sheets["Q1"]["Base Market Value"].tolist() == [999.0, 50.5]
+
+
+def test_only_projected_columns_are_read(tmp_path):
+    path = holdings_workbook(tmp_path / "holdings.xlsx")
+    reader = reader_for(tmp_path)
+    sheets = read_all(reader, path)
+    for data in sheets.values():
+        assert list(data.columns) == list(HOLDINGS_COLUMNS)
+    cached = list((tmp_path / "cache").rglob("*.arrow"))
+    assert len(cached) == 2
+    for arrow_path in cached:
+        assert list(read_frame(str(arrow_path)).columns) == list(HOLDINGS_COLUMNS)
+
+    # A different projection is cached separately and never sees the other columns
+    narrow = reader_for(tmp_path, columns=("Base Market Value", "Major Industry Name"))
+    data = narrow.load_sheet(str(path), "Q1")
+    assert list(data.columns) == ["Base Market Value", "Major Industry Name"]
+    assert (narrow.hits, narrow.misses) == (0, 1)
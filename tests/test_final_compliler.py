@@ -0,0 +1,24 @@
+import os
+
+import pandas as pd
+
+from Data_Analyzer.final_compliler import main
+from Data_Analyzer.holdings_store import write_frame
+
+
+def test_final_report_charts_go_next_to_the_report(tmp_path):
+    input_path = f"{tmp_path}/supporting/"
+    output_path = f"{tmp_path}/output/"
+    organized = pd.DataFrame({
+        "Fund": ["UK-Listed-Equity-Fund", "Sterling-Index-Linked-Bond-Fund", "Private-Market-June"],
+        "Base Value": [300.0, 200.0, 100.0],
+        "Max of Local Price": [1.0, 2.0, 3.0],
+        "Shares/Par": [10.0, 20.0, 30.0],
+    })
+    write_frame(organized, f"{input_path}LGPS_Compiled_Financial_Report_Organized.arrow")
+    main(input_path, output_path)
+
+    assert os.path.exists(f"{output_path}Final_Report.docx")
+    assert sorted(os.listdir(f"{output_path}enhanced_charts")) == [
+        "asset_class_breakdown.png", "base_value_by_fund.png", "direct_vs_indirect.png", "sector_breakdown.png",
+    ]
@@ -0,0 +1,67 @@
+import pytest
+from openpyxl import Workbook
+
+from Data_Analyzer.excel_ingest import HOLDINGS_COLUMNS, HoldingsWorkbookReader
+from Data_Analyzer.fix_LGPS_b_report import BrunelDataAnalyzer
+
+
+def write_workbook(path, sheet_names):
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    for sheet_name in sheet_names:
+        sheet = workbook.create_sheet(sheet_name)
+        sheet.append(list(HOLDINGS_COLUMNS))
+        sheet.append([100.0, "UNITED KINGDOM", "UNITED KINGDOM", "Equity", "Financials"])
+        sheet.append([50.0, "JAPAN", "JAPAN", "Unit Trust Fund", "Energy"])
+    workbook.save(path)
+
+
+def make_analyzer(tmp_path):
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    analyzer = BrunelDataAnalyzer(str(input_dir), str(tmp_path / "output"), str(tmp_path / "supporting"), ("json",))
+    analyzer.reader = HoldingsWorkbookReader(cache_dir=str(tmp_path / "cache"))
+    return analyzer, input_dir
+
+
+def test_failing_sheet_does_not_fail_the_sheets_after_it(tmp_path):
+    analyzer, input_dir = make_analyzer(tmp_path)
+    write_workbook(input_dir / "holdings.xlsx", ["One", "Two", "Three"])
+    parse_sheet = analyzer.reader._parse_sheet
+
+    def failing_parse(workbook, sha256, index, sheet_name):
+        if sheet_name == "Two":
+            raise ValueError("unreadable sheet")
+        return parse_sheet(workbook, sha256, index, sheet_name)
+
+    analyzer.reader._parse_sheet = failing_parse
+    results = analyzer.run_analysis(workers=1)
+
+    assert [(result["sheet_name"], result["error"]) for result in results] == [
+        ("One", None),
+        ("Two", "ValueError: unreadable sheet"),
+        ("Three", None),
+    ]
+    assert all(result["outputs"] for result in results if result["sheet_name"] != "Two")
+
+
+def test_iter_sheets_raises_by_default(tmp_path):
+    path = tmp_path / "holdings.xlsx"
+    write_workbook(path, ["One", "Two"])
+    reader = HoldingsWorkbookReader(cache_dir=None)
+
+    def failing_parse(*args):
+        raise KeyError("bad")
+
+    reader._parse_sheet = failing_parse
+    with pytest.raises(KeyError):
+        next(reader.iter_sheets(str(path)))
+    assert isinstance(next(reader.iter_sheets(str(path), skip_errors=True))[1], KeyError)
+
+
+def test_process_pool_matches_serial_run(tmp_path):
+    analyzer, input_dir = make_analyzer(tmp_path)
+    write_workbook(input_dir / "holdings.xlsx", ["One", "Two"])
+    results = analyzer.run_analysis(workers=2)
+    assert [(result["sheet_name"], result["error"]) for result in results] == [("One", None), ("Two", None)]
+    assert all(result["outputs"] for result in results)
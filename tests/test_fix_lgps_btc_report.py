@@ -0,0 +1,58 @@
+import pandas as pd
+from docx import Document
+
+from Data_Analyzer.docx_tables import add_dataframe_table, iter_docx_tables
+from Data_Analyzer.fix_LGPS_btc_report import COMPILED_COLUMNS, add_table_to_doc, load_pivot_dataframe
+
+
+def test_organized_table_formats_values_to_two_decimals(tmp_path):
+    pivot_df = pd.DataFrame({"Fund": ["Alpha Fund"], "Base Value": [716542281.3800001], "Shares/Par": [float("nan")]})
+    doc = Document()
+    add_table_to_doc(doc, pivot_df, "Summary Table")
+    path = tmp_path / "organized.docx"
+    doc.save(path)
+    assert list(iter_docx_tables(path)) == [[["Fund", "Base Value", "Shares/Par"], ["Alpha Fund", "716542281.38", "nan"]]]
+
+
+def write_compiled_report(path, rows):
+    doc = Document()
+    doc.add_heading("LGPS Compiled Financial Report", level=1)
+    add_dataframe_table(doc, pd.DataFrame(rows, columns=COMPILED_COLUMNS))
+    doc.save(path)
+
+
+def test_fund_without_report_or_fund_in_its_name_pivots_to_one_row(tmp_path):
+    path = tmp_path / "LGPS_Compiled_Financial_Report.docx"
+    write_compiled_report(path, [
+        ["Private-Market-June", "Private", "Base Value", "1,118,202,489.15"],
+        ["Private-Market-June", "Private", "Shares/Par", "12.00"],
+        ["Global-Equity-Alpha-Fund", "Global", "Base Value", "10.50"],
+        ["Global-Equity-Alpha-Fund", "Global", "Shares/Par", "3.00"],
+    ])
+    pivot_df, errors = load_pivot_dataframe(str(path))
+    assert errors.empty
+    assert list(pivot_df.columns) == ["Fund", "Base Value", "Shares/Par"]
+    assert pivot_df.to_dict("list") == {
+        "Fund": ["Global-Equity-Alpha-Fund", "Private-Market-June"],
+        "Base Value": [10.5, 1118202489.15],
+        "Shares/Par": [3.0, 12.0],
+    }
+
+
+def test_unusable_rows_are_reported_not_pivoted(tmp_path):
+    path = tmp_path / "LGPS_Compiled_Financial_Report.docx"
+    write_compiled_report(path, [
+        ["Alpha", "UK", "Base Value", "1.00"],
+        ["Alpha", "UK", "Base Value", "2.00"],
+        ["", "UK", "Base Value", "3.00"],
+        ["Beta", "UK", "Base Value", "n/a"],
+        ["Beta", "UK", "", "4.00"],
+    ])
+    pivot_df, errors = load_pivot_dataframe(str(path))
+    assert pivot_df.to_dict("list") == {"Fund": ["Alpha"], "Base Value": [1.0]}
+    assert errors[["Row", "Error"]].values.tolist() == [
+        [2, "duplicate metric for fund, first value kept"],
+        [3, "missing fund name"],
+        [4, "value is not a number"],
+        [5, "missing metric"],
+    ]
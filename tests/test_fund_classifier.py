@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from Data_Analyzer.fund_classifier import FundClassifier
+
+NAMES = [
+    "UK-Listed-Equity-Alpha-Fund-September-2024-Fund",
+    "Emerging-Markets-Equity-Alpha-Fund-March-2024",
+    "Global-Equity-Alpha-Fund-September-2023",
+    "Sterling-Index-Linked-Bond-Fund-June",
+    "Investment-Grade-Credit",
+    "Private-Market-June",
+    "Private-Markets-December",
+    "Border-to-Coast-Annual-Report-and-Accounts",
+    "Listed-Alternatives-Fund",
+    "Multi-Asset-Credit",
+    "PRIVATE EQUITY uk",
+]
+
+
+def reference_labels(name):
+    """The if/elif chains the rule table replaced."""
+    name = name.lower()
+    asset_rules = [("Public Stocks", ["equity", "stocks", "listed"]), ("Bonds", ["bond", "credit"]),
+                   ("Private Equity", ["private-market", "private equity"]), ("Alternatives", ["alternatives"]),
+                   ("Multi-Asset", ["multi-asset"])]
+    sector_rules = [("Emerging Markets", ["emerging"]), ("Global Equities", ["global"]), ("Public Stocks", ["uk"]),
+                    ("Bonds", ["credit", "bond"]), ("Private Equity", ["private-market"])]
+
+    def first(rules):
+        return next((label for label, keywords in rules if any(keyword in name for keyword in keywords)), "Other")
+
+    return {
+        "Asset Class": first(asset_rules),
+        "Investment Type": "Indirect" if "fund" in name else "Direct",
+        "Sector": first(sector_rules),
+    }
+
+
+def test_config_rules_match_the_replaced_if_elif_chains():
+    classifier = FundClassifier.from_config()
+    classes = classifier.classify(pd.Series(NAMES), ["Asset Class", "Investment Type", "Sector"])
+    assert classes.to_dict("records") == [reference_labels(name) for name in NAMES]
+
+
+def test_classify_keeps_index_and_defaults_missing_names():
+    classifier = FundClassifier({
+        "Kind": {"default": "Other", "rules": [
+            {"label": "Bond", "keywords": ["gilt"], "pattern": r"\bbond\b"},
+            {"label": "Fund", "keywords": ["fund"]},
+        ]},
+    })
+    names = pd.Series(["Gilt Fund", "bond fund", "Bondholder Fund", None, "Gilt Fund"], index=[5, 6, 7, 8, 9],
+                      dtype="category")
+    classes = classifier.classify(names)
+    assert classes.index.tolist() == [5, 6, 7, 8, 9]
+    assert classes["Kind"].tolist() == ["Bond", "Bond", "Fund", "Other", "Bond"]
+    assert classifier.label_hits(np.array(["a fund", "gilt"], dtype=object), "Kind", "Fund").tolist() == [True, False]
+
+
+def test_rule_without_keywords_or_pattern_is_rejected():
+    with pytest.raises(ValueError):
+        FundClassifier({"Kind": {"default": "Other", "rules": [{"label": "Empty"}]}})
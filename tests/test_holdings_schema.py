@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+from Data_Analyzer.holdings_schema import CategoryDictionary, normalise_holdings
+from Data_Analyzer.metrics_engine import HOLDINGS_METRICS
+
+
+def sheet(countries, types, sectors, values):
+    return pd.DataFrame({
+        "Base Market Value": values,
+        "Issue Country Name": countries,
+        "Incorporated Country Name": countries,
+        "Investment Type Name": types,
+        "Major Industry Name": sectors,
+    })
+
+
+def test_codes_are_stable_across_sheets():
+    categories = CategoryDictionary()
+    first = normalise_holdings(sheet(["UNITED KINGDOM", "JAPAN"], ["Equity", "Bond"], ["Energy", "Utilities"],
+                                     [1.0, 2.0]), categories)
+    second = normalise_holdings(sheet(["JAPAN", "UNITED KINGDOM"], ["Bond", "Equity"], ["Utilities", "Energy"],
+                                      [3.0, 4.0]), categories)
+
+    assert first["Issue Country Name"].dtype == second["Issue Country Name"].dtype
+    assert first["Issue Country Name"].cat.codes.tolist() == [1, 0]
+    assert second["Issue Country Name"].cat.codes.tolist() == [0, 1]
+    combined = categories.concat([first, second])
+    assert isinstance(combined["Major Industry Name"].dtype, pd.CategoricalDtype)
+    assert combined["Major Industry Name"].tolist() == ["Energy", "Utilities", "Utilities", "Energy"]
+
+
+def test_unseen_values_are_appended():
+    categories = CategoryDictionary()
+    first = normalise_holdings(sheet(["UNITED KINGDOM", "JAPAN"], ["Equity", "Bond"], ["Energy", "Utilities"],
+                                     [1.0, 2.0]), categories)
+    codes_before = first["Issue Country Name"].cat.codes.tolist()
+    second = normalise_holdings(sheet(["BRAZIL", "JAPAN", None], ["Cash", "Bond", "Equity"],
+                                      ["Energy", "Financials", "Energy"], [3.0, 4.0, 5.0]), categories)
+
+    # Existing codes keep their meaning; new values go on the end, not in sorted position
+    assert categories.categories["Issue Country Name"] == ["JAPAN", "UNITED KINGDOM", "BRAZIL"]
+    assert categories.categories["Major Industry Name"] == ["Energy", "Utilities", "Financials"]
+    assert second["Issue Country Name"].cat.codes.tolist() == [2, 0, -1]
+    assert first["Issue Country Name"].cat.codes.tolist() == codes_before
+
+    # The older frame only needs widening to line up with the newer one
+    combined = categories.concat([first, second])
+    assert combined["Issue Country Name"].dtype == categories.dtype("Issue Country Name")
+    assert combined["Issue Country Name"].tolist()[:4] == ["UNITED KINGDOM", "JAPAN", "BRAZIL", "JAPAN"]
+
+
+def test_metrics_on_categorical_frame_match_object_frame():
+    rng = np.random.default_rng(3)
+    rows = 2000
+    countries = np.array(["UNITED KINGDOM", "UNITED STATES", "JAPAN", None], dtype=object)
+    types = np.array(["Equity", "Bond", "Unit Trust Fund", "Cash", None], dtype=object)
+    sectors = np.array(["Financials", "Energy", "Utilities", None], dtype=object)
+    data = pd.DataFrame({
+        "Base Market Value": rng.uniform(-1e6, 1e8, rows).round(2),
+        "Issue Country Name": rng.choice(countries, rows),
+        "Incorporated Country Name": rng.choice(countries, rows),
+        "Investment Type Name": rng.choice(types, rows),
+        "Major Industry Name": rng.choice(sectors, rows),
+    })
+
+    reference = HOLDINGS_METRICS.compute(data.copy())
+    encoded = HOLDINGS_METRICS.compute(normalise_holdings(data.copy(), CategoryDictionary()))
+
+    for name in ["Total AUM (GBP)", "UK Investment Exposure (GBP)", "Direct Investments (GBP)",
+                 "Indirect Investments (GBP)"]:
+        assert encoded[name] == reference[name]
+    for name in ["Asset Class Breakdown", "Sector Breakdown"]:
+        assert encoded[name].to_dict("list") == reference[name].to_dict("list")
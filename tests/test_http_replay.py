@@ -0,0 +1,74 @@
+import httpx
+
+from web_scrapers.http_replay import HttpArchive, ReplayServer
+
+URL = "https://www.example.org/docs/holdings.pdf?year=2024"
+BODY = b"0123456789" * 100
+HEADERS = {"ETag": '"v1"', "Content-Type": "application/pdf", "X-Other": "dropped"}
+
+
+def recorded(tmp_path):
+    archive = HttpArchive(str(tmp_path / "archive"))
+    archive.add(URL, HEADERS, BODY)
+    archive.save()
+    return HttpArchive(str(tmp_path / "archive"))
+
+
+def test_record_then_replay_round_trip(tmp_path):
+    archive = recorded(tmp_path)
+    entry, body_path = archive.lookup(URL)
+    assert entry["headers"] == {"ETag": '"v1"', "Content-Type": "application/pdf"}
+    assert archive.lookup("www.example.org/docs/holdings.pdf?year=2024")[0] == entry
+    assert archive.lookup("https://www.example.org/other.pdf") == (None, None)
+    with open(body_path, "rb") as f:
+        assert f.read() == BODY
+
+    # Files streamed to disk share the body of identical in-memory responses
+    copy = tmp_path / "copy.pdf"
+    copy.write_bytes(BODY)
+    archive.add_file("https://mirror.example.org/holdings.pdf", HEADERS, str(copy))
+    assert archive.lookup("https://mirror.example.org/holdings.pdf")[1] == body_path
+
+    with ReplayServer(archive) as server, httpx.Client() as client:
+        response = client.get(server.rewrite_url(URL))
+        assert response.status_code == 200
+        assert response.content == BODY
+        assert response.headers["ETag"] == '"v1"'
+        assert client.get(server.rewrite_url(URL), headers={"If-None-Match": '"v1"'}).status_code == 304
+        assert client.get(server.rewrite_url("https://www.example.org/missing.pdf")).status_code == 404
+
+
+def test_range_requests(tmp_path):
+    archive = recorded(tmp_path)
+    with ReplayServer(archive) as server, httpx.Client() as client:
+        url = server.rewrite_url(URL)
+        partial = client.get(url, headers={"Range": "bytes=990-", "If-Range": '"v1"'})
+        assert partial.status_code == 206
+        assert partial.headers["Content-Range"] == f"bytes 990-{len(BODY) - 1}/{len(BODY)}"
+        assert partial.content == BODY[990:]
+
+        # A stale If-Range validator gets the whole, current body
+        stale = client.get(url, headers={"Range": "bytes=990-", "If-Range": '"v0"'})
+        assert stale.status_code == 200 and stale.content == BODY
+
+        assert client.get(url, headers={"Range": f"bytes={len(BODY)}-"}).status_code == 416
+
+
+def outcomes(archive, seed, requests=15):
+    results = []
+    with ReplayServer(archive, error_rate=0.4, seed=seed) as server, httpx.Client() as client:
+        for _ in range(requests):
+            try:
+                results.append(client.get(server.rewrite_url(URL)).status_code)
+            except httpx.TransportError:
+                results.append("truncated")
+        assert server.errors_injected == sum(result != 200 for result in results)
+    return results
+
+
+def test_seeded_error_injection_is_reproducible(tmp_path):
+    archive = recorded(tmp_path)
+    first = outcomes(archive, seed=3)
+    assert first == outcomes(archive, seed=3)
+    assert {503, "truncated", 200} <= set(first)
+    assert first != outcomes(archive, seed=4)
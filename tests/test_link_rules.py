@@ -0,0 +1,42 @@
+import httpx
+
+from web_scrapers.link_rules import POOL_RULES, LinkRules
+
+
+class HeadEngine:
+    max_workers = 2
+
+    def __init__(self, headers):
+        self.headers = headers
+
+    def head(self, url):
+        if url not in self.headers:
+            raise httpx.ConnectError("unreachable")
+        return httpx.Response(200, headers=self.headers[url])
+
+
+def test_name_rules():
+    rules = POOL_RULES["bordertocoast"]
+    assert rules.check_name("https://x.org/docs/UK-Equity-Holdings-2024.pdf") is None
+    assert rules.check_name("https://x.org/docs/Holdings-Annual-Report-2024.pdf") == "excluded keyword 'annual-report'"
+    assert rules.check_name("https://x.org/docs/Stewardship-2024.pdf") == "no include keyword"
+    assert rules.check_name("https://x.org/docs/Holdings.docx") == "unsupported extension"
+    assert rules.check_name("https://x.org/docs/Global%20Holdings.PDF?v=2") is None
+
+
+def test_head_checks_content_type_and_size():
+    rules = LinkRules(content_types=["application/pdf"], max_size=1000)
+    links = ["https://x.org/a.pdf", "https://x.org/b.pdf", "https://x.org/c.pdf", "https://x.org/d.pdf", "https://x.org/e.txt"]
+    engine = HeadEngine({
+        links[0]: {"Content-Type": "application/pdf; charset=binary", "Content-Length": "999"},
+        links[1]: {"Content-Type": "text/html", "Content-Length": "10"},
+        links[2]: {"Content-Type": "application/pdf", "Content-Length": "1001"},
+    })
+    accepted, rejected = rules.classify(links, engine)
+    # A failed HEAD leaves the decision to the download
+    assert accepted == [links[0], links[3]]
+    assert rejected == [
+        (links[4], "unsupported extension"),
+        (links[1], "content type 'text/html'"),
+        (links[2], "size 1001 bytes over limit"),
+    ]
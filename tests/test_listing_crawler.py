@@ -0,0 +1,78 @@
+import threading
+
+import httpx
+
+from web_scrapers.link_rules import POOL_RULES
+from web_scrapers.listing_crawler import ListingCrawler
+
+PAGE_URL = "https://example.org/publications?page={}"
+
+
+class FakeEngine:
+    max_workers = 2
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.fetched = []
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        page = int(url.rsplit("=", 1)[1])
+        with self._lock:
+            self.fetched.append(page)
+        request = httpx.Request("GET", url)
+        if page not in self.pages:
+            return httpx.Response(404, request=request)
+        return httpx.Response(200, text=self.pages[page], request=request)
+
+
+def listing(documents, last_page=None):
+    anchors = [f'<a href="/files/{name}">{name}</a>' for name in documents]
+    if last_page:
+        anchors += [f'<a href="?page={page}">{page}</a>' for page in range(2, last_page + 1)]
+    return "<html><body>" + "".join(anchors) + "</body></html>"
+
+
+def test_crawl_stops_at_first_page_without_new_documents():
+    engine = FakeEngine({
+        1: listing(["a.pdf", "b.xlsx", "notes.html"], last_page=6),
+        2: listing(["c.pdf", "a.pdf"]),
+        3: listing(["c.pdf"]),
+        4: listing(["d.pdf"]),
+        5: listing(["e.pdf"]),
+    })
+    crawler = ListingCrawler(engine, PAGE_URL, r"page=(\d+)", cache_dir=None)
+    assert crawler.crawl() == [
+        "https://example.org/files/a.pdf",
+        "https://example.org/files/b.xlsx",
+        "https://example.org/files/c.pdf",
+    ]
+    # Pages are fetched in batches of max_workers, so nothing beyond the stopping batch is requested
+    assert sorted(engine.fetched) == [1, 2, 3]
+
+
+def test_missing_page_ends_the_crawl_and_pages_are_cached(tmp_path):
+    engine = FakeEngine({1: listing(["a.pdf"], last_page=3), 2: listing(["b.pdf"])})
+    crawler = ListingCrawler(engine, PAGE_URL, r"page=(\d+)", cache_dir=str(tmp_path))
+    expected = ["https://example.org/files/a.pdf", "https://example.org/files/b.pdf"]
+    assert crawler.crawl() == expected
+    fetched = len(engine.fetched)
+    assert crawler.crawl() == expected
+    # Pages 1 and 2 come from the cache; only the missing page 3 is requested again
+    assert engine.fetched[fetched:] == [3]
+
+
+def test_document_links_match_like_the_link_rules():
+    page = (
+        '<a href="/files/UPPER.PDF">a</a><a href="/files/versioned.pdf?v=2">b</a>'
+        '<a href="/files/anchored.xlsx#sheet=1">c</a><a href="/view?file=report.pdf">d</a>'
+        '<a href="/files/page.html">e</a>'
+    )
+    crawler = ListingCrawler(FakeEngine({}), PAGE_URL, r"page=(\d+)", cache_dir=None)
+    links, _ = crawler.parse_page(page, 1)
+    assert links == [
+        "https://example.org/files/UPPER.PDF",
+        "https://example.org/files/versioned.pdf?v=2",
+        "https://example.org/files/anchored.xlsx#sheet=1",
+    ]
+    assert all(POOL_RULES["brunel"].check_name(link) != "unsupported extension" for link in links)
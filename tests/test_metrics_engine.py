@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from Data_Analyzer.fund_classifier import FundClassifier
+from Data_Analyzer.holdings_schema import CategoryDictionary, normalise_holdings
+from Data_Analyzer.metrics_engine import HOLDINGS_METRICS, Breakdown, MetricSet, Sum, TopShare, column_classified
+
+
+def holdings_frame(rows=5000, seed=7):
+    rng = np.random.default_rng(seed)
+    types = np.array(["Equity", "Bond", "Unit Trust Fund", "Cash", None], dtype=object)
+    sectors = np.array(["Financials", "Energy", "Utilities", "Health Care"], dtype=object)
+    countries = np.array(["UNITED KINGDOM", "UNITED STATES", "JAPAN"], dtype=object)
+    values = rng.uniform(-1e6, 1e8, rows).round(2)
+    values[rng.integers(0, rows, 20)] = np.nan
+    return pd.DataFrame({
+        "Base Market Value": values,
+        "Issue Country Name": rng.choice(countries, rows),
+        "Incorporated Country Name": rng.choice(countries, rows),
+        "Investment Type Name": rng.choice(types, rows),
+        "Major Industry Name": rng.choice(sectors, rows),
+    })
+
+
+def test_holdings_metrics_match_groupby_reference():
+    data = holdings_frame()
+    results = HOLDINGS_METRICS.compute(normalise_holdings(data.copy(), CategoryDictionary()))
+
+    value = data["Base Market Value"]
+    uk = (data["Issue Country Name"] == "UNITED KINGDOM") | (data["Incorporated Country Name"] == "UNITED KINGDOM")
+    assert results["Total AUM (GBP)"] == value.sum()
+    assert results["UK Investment Exposure (GBP)"] == value[uk].sum()
+    assert results["Direct Investments (GBP)"] + results["Indirect Investments (GBP)"] == pytest.approx(value.sum(), rel=1e-12)
+
+    for name, column in [("Asset Class Breakdown", "Investment Type Name"), ("Sector Breakdown", "Major Industry Name")]:
+        reference = data.groupby(column)["Base Market Value"].sum().reset_index()
+        # Exact equality: the totals are printed to the last digit in the reports
+        pd.testing.assert_frame_equal(results[name], reference, check_exact=True)
+
+
+def test_metric_set_with_masks_and_top_share():
+    classifier = FundClassifier({"Kind": {"default": "Direct", "rules": [{"label": "Fund", "keywords": ["fund"]}]}})
+    data = pd.DataFrame({"Name": ["A Fund", "B plc", "C Fund", None], "Value": [10.0, 30.0, 60.0, np.nan]})
+    metrics = MetricSet(
+        masks={"fund": column_classified("Name", "Kind", "Fund", classifier=classifier)},
+        metrics=[
+            Sum("Total", "Value"),
+            Sum("Funds", "Value", mask="fund"),
+            Sum("Other", "Value", mask="fund", invert=True),
+            TopShare("Top 1", "Value", n=1),
+            Breakdown("By Name", "Name", "Value"),
+        ],
+    )
+    results = metrics.compute(data)
+    assert metrics.summary(results).to_dict("list") == {
+        "Metric": ["Total", "Funds", "Other", "Top 1"],
+        "Value": [100.0, 70.0, 30.0, 0.6],
+    }
+    assert results["By Name"].to_dict("list") == {"Name": ["A Fund", "B plc", "C Fund"], "Value": [10.0, 30.0, 60.0]}
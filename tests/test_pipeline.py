@@ -0,0 +1,151 @@
+import os
+import time
+
+import pytest
+
+from misc.pipeline import Pipeline, Stage
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+@pytest.fixture
+def tree(tmp_path):
+    source = str(tmp_path / "source.txt")
+    output = str(tmp_path / "out" / "result.txt")
+    write(source, "v1")
+    calls = []
+
+    def build():
+        calls.append("build")
+        with open(source, "r", encoding="utf-8") as f:
+            write(output, f.read().upper())
+
+    def make_pipeline(params=None):
+        return Pipeline([Stage("build", build, inputs=[source], outputs=[output], params=params)],
+                        state_path=str(tmp_path / "state.json"))
+
+    return source, output, calls, make_pipeline
+
+
+def test_stage_is_skipped_until_inputs_params_or_outputs_change(tree):
+    source, output, calls, make_pipeline = tree
+    assert make_pipeline().run() == {"build": "ran"}
+    assert make_pipeline().run() == {"build": "up to date"}
+    assert make_pipeline().status() == {"build": "up to date"}
+
+    write(source, "v2")
+    assert make_pipeline().status() == {"build": "stale"}
+    assert make_pipeline().run() == {"build": "ran"}
+
+    assert make_pipeline({"formats": ["html"]}).run() == {"build": "ran"}
+    os.remove(output)
+    assert make_pipeline({"formats": ["html"]}).run() == {"build": "ran"}
+    assert make_pipeline({"formats": ["html"]}).run(force=True) == {"build": "ran"}
+    assert calls == ["build"] * 5
+
+
+def test_input_edited_during_run_leaves_stage_stale(tmp_path):
+    source = str(tmp_path / "source.txt")
+    write(source, "before")
+
+    def edit_input():
+        write(source, "edited while running")
+
+    stages = [Stage("edit", edit_input, inputs=[source])]
+    assert Pipeline(stages, state_path=str(tmp_path / "state.json")).run() == {"edit": "ran"}
+    assert Pipeline(stages, state_path=str(tmp_path / "state.json")).status() == {"edit": "stale"}
+
+
+def test_stage_rewriting_its_inputs_is_recorded_after_it_runs(tmp_path):
+    folder = str(tmp_path / "raw")
+    write(os.path.join(folder, "keep.pdf"), "keep")
+    write(os.path.join(folder, "drop.txt"), "drop")
+
+    def clean():
+        os.remove(os.path.join(folder, "drop.txt"))
+
+    stages = [Stage("clean", clean, inputs=[folder], rewrites_inputs=True)]
+    assert Pipeline(stages, state_path=str(tmp_path / "state.json")).run() == {"clean": "ran"}
+    assert Pipeline(stages, state_path=str(tmp_path / "state.json")).status() == {"clean": "up to date"}
+
+
+def test_rerun_without_changes_is_up_to_date_despite_sidecar_files(tmp_path):
+    raw, documents, compiled = (str(tmp_path / name) for name in ("raw", "documents", "compiled"))
+    write(os.path.join(raw, "fund.pdf"), "holdings")
+
+    def analyse():
+        # Like the analysis stages: an index in the input folder, a ledger next to the reports
+        write(os.path.join(raw, "document_index.json"), str(time.time_ns()))
+        write(os.path.join(raw, "fund.pdf.part"), "partial")
+        write(os.path.join(documents, "fund_report.arrow"), "metrics")
+        write(os.path.join(documents, "processed_documents.json"), str(time.time_ns()))
+
+    def compile_reports():
+        write(os.path.join(compiled, "report.arrow"), "rows")
+        write(os.path.join(documents, "report.index.json"), str(time.time_ns()))
+
+    stages = [
+        Stage("analysis", analyse, inputs=[raw], outputs=[documents]),
+        Stage("compile", compile_reports, inputs=[documents], outputs=[compiled], after=["analysis"]),
+    ]
+    state_path = str(tmp_path / "state.json")
+    assert Pipeline(stages, state_path=state_path).run() == {"analysis": "ran", "compile": "ran"}
+    assert Pipeline(stages, state_path=state_path).run() == {"analysis": "up to date", "compile": "up to date"}
+
+    write(os.path.join(raw, "fund.pdf"), "new holdings")
+    assert Pipeline(stages, state_path=state_path).status() == {"analysis": "stale", "compile": "up to date"}
+
+
+def test_always_run_and_failures(tmp_path):
+    order = []
+
+    def fail():
+        raise RuntimeError("boom")
+
+    pipeline = Pipeline([
+        Stage("fetch", lambda: order.append("fetch"), always_run=True),
+        Stage("broken", fail, after=["fetch"]),
+        Stage("after_broken", lambda: order.append("after_broken"), after=["broken"]),
+        Stage("independent", lambda: order.append("independent"), after=["fetch"]),
+    ], state_path=str(tmp_path / "state.json"))
+    results = pipeline.run(jobs=2)
+    assert results == {
+        "fetch": "ran",
+        "broken": "failed: RuntimeError: boom",
+        "after_broken": "skipped: broken did not succeed",
+        "independent": "ran",
+    }
+    assert order[0] == "fetch" and "after_broken" not in order
+    assert pipeline.run(["independent"]) == {"fetch": "ran", "independent": "up to date"}
+
+
+def test_select_resolves_groups_upstream_and_exclusions(tmp_path):
+    noop = lambda: None
+    pipeline = Pipeline([
+        Stage("scrape", noop),
+        Stage("analysis", noop, after=["scrape"], groups=["btc"]),
+        Stage("final", noop, after=["analysis"], groups=["btc", "report"]),
+    ], state_path=str(tmp_path / "state.json"))
+    assert pipeline.select(["report"]) == ["scrape", "analysis", "final"]
+    assert pipeline.select(["report"], upstream=False) == ["final"]
+    assert pipeline.select(["btc"], exclude=["scrape"]) == ["analysis", "final"]
+    with pytest.raises(ValueError):
+        pipeline.select(["missing"])
+    # Naming a stage and excluding it is a mistake, not an empty run
+    with pytest.raises(ValueError, match="analysis"):
+        pipeline.select(["analysis"], exclude=["btc"])
+    assert pipeline.select(["analysis"], exclude=["scrape"]) == ["analysis"]
+
+
+def test_invalid_dags_are_rejected(tmp_path):
+    noop = lambda: None
+    with pytest.raises(ValueError, match="cycle"):
+        Pipeline([Stage("a", noop, after=["b"]), Stage("b", noop, after=["a"])], state_path=str(tmp_path / "s.json"))
+    with pytest.raises(ValueError, match="unknown stage"):
+        Pipeline([Stage("a", noop, after=["z"])], state_path=str(tmp_path / "s.json"))
+    with pytest.raises(ValueError, match="Duplicate"):
+        Pipeline([Stage("a", noop), Stage("a", noop)], state_path=str(tmp_path / "s.json"))
@@ -0,0 +1,42 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from Data_Analyzer.report_renderers import ReportRenderer, parse_formats
+from Data_Analyzer.report_templates import heading, table_slot
+
+LAYOUT = [heading("Report {{value:name}}", 1), table_slot("metrics")]
+
+
+def test_json_writes_nan_and_infinity_as_null(tmp_path):
+    renderer = ReportRenderer("test_report", LAYOUT, formats=("json",))
+    metrics = pd.DataFrame({"Metric": ["Sum", "Mean", "Ratio"], "Value": [1.5, np.nan, np.inf]})
+    (path,) = renderer.render(str(tmp_path / "report.docx"),
+                              values={"name": "A", "total": np.float64("nan"), "count": np.int64(3)},
+                              tables={"metrics": metrics})
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    assert "NaN" not in text and "Infinity" not in text
+    document = json.loads(text)
+    assert document["values"] == {"name": "A", "total": None, "count": 3}
+    assert [row["Value"] for row in document["tables"]["metrics"]] == [1.5, None, None]
+
+
+def test_text_formats_share_values_and_tables(tmp_path):
+    renderer = ReportRenderer("test_report", LAYOUT, formats="md,csv,html",
+                              table_options={"default_format": lambda value: f"{value:.2f}" if isinstance(value, float) else str(value)})
+    metrics = pd.DataFrame({"Metric": ["Sum"], "Value": [2.0 / 3.0]})
+    paths = renderer.render(str(tmp_path / "report.docx"), values={"name": "B"}, tables={"metrics": metrics})
+    assert [path.rsplit(".", 1)[1] for path in paths] == ["md", "csv", "html"]
+    with open(paths[0], "r", encoding="utf-8") as f:
+        assert f.read() == "# Report B\n\n| Metric | Value |\n| --- | --- |\n| Sum | 0.67 |\n"
+    # CSV keeps the raw value
+    assert pd.read_csv(paths[1])["Value"].tolist() == [2.0 / 3.0]
+
+
+def test_parse_formats():
+    assert parse_formats(" HTML,markdown,.json,html") == ("html", "md", "json")
+    with pytest.raises(ValueError):
+        parse_formats("pdf")
@@ -0,0 +1,51 @@
+import pandas as pd
+from docx import Document
+
+from Data_Analyzer.docx_tables import iter_docx_tables
+from Data_Analyzer.report_templates import (ReportTemplate, figure_slot, heading, layout_digest, paragraph, table_slot,
+                                            template_digest)
+
+LAYOUT = [
+    heading("{{value:title}}", 1),
+    paragraph("Prepared for {{value:client}}."),
+    table_slot("summary"),
+    figure_slot("chart", 5.5),
+]
+
+
+def test_template_is_built_once_and_filled_per_report(tmp_path):
+    template = ReportTemplate("test_report", LAYOUT, template_dir=str(tmp_path / "templates"))
+    assert (tmp_path / "templates" / "test_report.docx").exists()
+
+    summary = pd.DataFrame({"Metric": ["Total"], "Value": [12.5]})
+    paths = template.render_many([
+        (str(tmp_path / f"report_{name}.docx"), {"values": {"title": f"Fund {name}", "client": "LGPS"},
+                                                 "tables": {"summary": summary}, "figures": {"chart": None}})
+        for name in ("A", "B")
+    ])
+
+    for name, path in zip(("A", "B"), paths):
+        doc = Document(path)
+        assert [para.text for para in doc.paragraphs] == [f"Fund {name}", "Prepared for LGPS."]
+        assert list(iter_docx_tables(path)) == [[["Metric", "Value"], ["Total", "12.5"]]]
+        # The table takes the place of its placeholder, between the paragraph and the end
+        assert doc.element.body[2].tag.endswith("}tbl")
+
+
+def test_template_is_rebuilt_when_the_layout_changes(tmp_path):
+    template_dir = str(tmp_path / "templates")
+    template = ReportTemplate("test_report", LAYOUT, template_dir=template_dir)
+    with open(template.path, "rb") as f:
+        assert template_digest(f.read()) == layout_digest(LAYOUT)
+
+    # Restyling the template in Word keeps it, as long as the layout is unchanged
+    restyled = Document(template.path)
+    restyled.paragraphs[1].runs[0].bold = True
+    restyled.save(template.path)
+    assert ReportTemplate("test_report", LAYOUT, template_dir=template_dir).new_document().paragraphs[1].runs[0].bold
+
+    changed = [heading("{{value:title}}", 1), paragraph("Updated wording for {{value:client}}.")]
+    rebuilt = ReportTemplate("test_report", changed, template_dir=template_dir)
+    assert [para.text for para in rebuilt.new_document().paragraphs] == ["{{value:title}}",
+                                                                         "Updated wording for {{value:client}}."]
+    assert [para.text for para in Document(template.path).paragraphs][1] == "Updated wording for {{value:client}}."
@@ -0,0 +1,40 @@
+import pytest
+
+from misc.text_cache import PageTextCache
+
+
+def test_pages_are_extracted_once_per_content(tmp_path):
+    pdf_path = tmp_path / "holdings.pdf"
+    pdf_path.write_bytes(b"%PDF- pretend")
+    calls = []
+
+    def extractor(path):
+        calls.append(path)
+        yield "page one"
+        yield "page two £"
+
+    cache = PageTextCache("test", cache_dir=str(tmp_path / "cache"))
+    assert list(cache.iter_pages(str(pdf_path), extractor)) == [(0, "page one"), (1, "page two £")]
+    assert list(cache.iter_pages(str(pdf_path), extractor)) == [(0, "page one"), (1, "page two £")]
+    assert len(calls) == 1
+    assert cache.report() == {"hits": 2, "misses": 2}
+
+    # Another extractor has its own entries
+    assert list(PageTextCache("other", cache_dir=str(tmp_path / "cache")).iter_pages(str(pdf_path), extractor))[0] == (0, "page one")
+    assert len(calls) == 2
+
+
+def test_partly_cached_document_is_extracted_again(tmp_path):
+    pdf_path = tmp_path / "holdings.pdf"
+    pdf_path.write_bytes(b"%PDF- pretend")
+    cache = PageTextCache("test", cache_dir=str(tmp_path / "cache"))
+
+    def failing(path):
+        yield "page one"
+        raise RuntimeError("broken page")
+
+    with pytest.raises(RuntimeError):
+        list(cache.iter_pages(str(pdf_path), failing))
+    assert list(cache.iter_pages(str(pdf_path), lambda path: iter(["page one", "page two"]))) == [
+        (0, "page one"), (1, "page two"),
+    ]
@@ -0,0 +1,153 @@
+"""
+Offline record/replay harness and throughput benchmark for the pool scrapers.
+
+    python -m web_scrapers.benchmark record --pool all
+    python -m web_scrapers.benchmark replay --port 8800
+    python -m web_scrapers.benchmark bench --pool all --workers 1 4 8 --latency 0.05 --error-rate 0.02
+
+'record' runs the real scrapers once and stores listing HTML and documents in an
+HttpArchive. 'bench' replays that archive from a local ReplayServer and reports pages/s,
+files/s and MB/s per scraper, so concurrency can be tuned without touching the live sites.
+"""
+import os
+import time
+import argparse
+import tempfile
+
+from web_scrapers.download_engine import DownloadEngine
+from web_scrapers.http_replay import HttpArchive, ReplayServer
+from misc.document_store import DocumentStore
+from web_scrapers.bordercoast_data_webscraping import BorderToCoastScraper
+from web_scrapers.brunel_data_webscraping import BrunelScraper
+
+DEFAULT_ARCHIVE = "Data/cache/http_archive"
+SCRAPERS = {
+    "bordertocoast": BorderToCoastScraper,
+    "brunel": BrunelScraper,
+}
+
+
+def _pools(pool):
+    return list(SCRAPERS) if pool == "all" else [pool]
+
+
+def record(pool, archive_path=DEFAULT_ARCHIVE, workers=8):
+    """
+    Scrapes the live site once, storing every listing page and document in the archive.
+    :param pool: Key of SCRAPERS
+    :param archive_path: Archive folder
+    :param workers: Concurrent downloads
+    """
+    archive = HttpArchive(archive_path)
+    scraper_class = SCRAPERS[pool]
+    with tempfile.TemporaryDirectory() as save_folder:
+        engine = DownloadEngine(headers=scraper_class.HEADERS, max_workers=workers, recorder=archive)
+        scraper = scraper_class(save_folder=save_folder, engine=engine, listing_cache_dir=None)
+        # Keep throwaway downloads out of the shared object store
+        scraper.store = DocumentStore(save_folder, objects_dir=os.path.join(save_folder, "objects"))
+        links = scraper.filter_links(scraper.get_document_links())
+        scraper.download_files(links)
+        scraper.close()
+    archive.save()
+    print(f"💾 Recorded {len(archive.index)} responses to {archive_path}")
+
+
+def benchmark(pool, archive_path=DEFAULT_ARCHIVE, workers=8, latency=0.0, error_rate=0.0, seed=0):
+    """
+    Runs one scraper against a replay of the archive and measures its throughput.
+    :param pool: Key of SCRAPERS
+    :param archive_path: Archive folder created by record()
+    :param workers: Concurrent requests
+    :param latency: Seconds of delay the replay server adds to each response
+    :param error_rate: Probability of an injected 503 or truncated body per request
+    :param seed: Seed for the error injection
+    :return: Dictionary of measurements
+    """
+    archive = HttpArchive(archive_path)
+    scraper_class = SCRAPERS[pool]
+    with ReplayServer(archive, latency=latency, error_rate=error_rate, seed=seed) as server, \
+            tempfile.TemporaryDirectory() as save_folder:
+        engine = DownloadEngine(headers=scraper_class.HEADERS, max_workers=workers, rewrite_url=server.rewrite_url)
+        scraper = scraper_class(save_folder=save_folder, engine=engine, listing_cache_dir=None)
+        # Keep throwaway downloads out of the shared object store
+        scraper.store = DocumentStore(save_folder, objects_dir=os.path.join(save_folder, "objects"))
+
+        start = time.perf_counter()
+        links = scraper.filter_links(scraper.get_document_links())
+        listing_seconds = time.perf_counter() - start
+        pages = server.requests_served
+
+        start = time.perf_counter()
+        files = scraper.download_files(links)
+        download_seconds = time.perf_counter() - start
+        total_bytes = sum(os.path.getsize(path) for path in files)
+        scraper.close()
+        errors_injected = server.errors_injected
+
+    results = {
+        "pool": pool,
+        "workers": workers,
+        "pages": pages,
+        "pages_per_second": pages / max(listing_seconds, 1e-9),
+        "files": len(files),
+        "files_failed": len(links) - len(files),
+        "files_per_second": len(files) / max(download_seconds, 1e-9),
+        "megabytes_per_second": total_bytes / (1024 * 1024) / max(download_seconds, 1e-9),
+        "errors_injected": errors_injected,
+    }
+    print(
+        f"🏁 {pool} (workers={workers}): {results['pages_per_second']:.2f} pages/s, "
+        f"{results['files_per_second']:.2f} files/s, {results['megabytes_per_second']:.2f} MB/s, "
+        f"{results['files_failed']} failed, {errors_injected} errors injected"
+    )
+    return results
+
+
+def replay(archive_path=DEFAULT_ARCHIVE, port=8800, latency=0.0, error_rate=0.0, seed=0):
+    """Serves the archive until interrupted, for manual runs against the replay server."""
+    server = ReplayServer(HttpArchive(archive_path), port=port, latency=latency, error_rate=error_rate, seed=seed)
+    server.start()
+    print(f"🔁 Replaying {archive_path} at {server.base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record, replay and benchmark the LGPS pool scrapers offline.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="Capture listing pages and documents from the live sites")
+    record_parser.add_argument("--pool", choices=[*SCRAPERS, "all"], default="all")
+    record_parser.add_argument("--archive", default=DEFAULT_ARCHIVE)
+    record_parser.add_argument("--workers", type=int, default=8)
+
+    for name, help_text in (("replay", "Serve a recorded archive locally"),
+                            ("bench", "Measure scraper throughput against a replayed archive")):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument("--archive", default=DEFAULT_ARCHIVE)
+        sub.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+        sub.add_argument("--error-rate", type=float, default=0.0, help="Probability of an injected failure")
+        sub.add_argument("--seed", type=int, default=0)
+    subparsers.choices["replay"].add_argument("--port", type=int, default=8800)
+    subparsers.choices["bench"].add_argument("--pool", choices=[*SCRAPERS, "all"], default="all")
+    subparsers.choices["bench"].add_argument("--workers", type=int, nargs="+", default=[8])
+
+    args = parser.parse_args(argv)
+    if args.command == "record":
+        for pool in _pools(args.pool):
+            record(pool, args.archive, args.workers)
+    elif args.command == "replay":
+        replay(args.archive, args.port, args.latency, args.error_rate, args.seed)
+    else:
+        for pool in _pools(args.pool):
+            for workers in args.workers:
+                benchmark(pool, args.archive, workers, args.latency, args.error_rate, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,39 @@
 import os
-import requests
 import pandas as pd
 import pdfplumber
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
+from web_scrapers.download_engine import DownloadEngine
+from web_scrapers.download_manifest import DownloadManifest
+from web_scrapers.link_rules import POOL_RULES, print_dry_run_report
+from web_scrapers.listing_crawler import ListingCrawler
+from misc.document_store import DocumentStore
 
 class BorderToCoastScraper:
     BASE_URL = "https://www.bordertocoast.org.uk/publications/?_sfm_publication_document_type=Fund+Holdings&sf_paged={}"
     DOMAIN = "https://www.bordertocoast.org.uk"
+    PAGE_PATTERN = r"sf_paged=(\d+)"
+    LINK_RULES = POOL_RULES["bordertocoast"]
     HEADERS = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
     }
 
-    def __init__(self, start_page=1, end_page=1, save_folder="Data/raw_data/bordertocoast_data/pdf"):
+    def __init__(self, start_page=1, end_page=None, save_folder="Data/raw_data/bordertocoast_data/pdf", max_workers=8, http2=False, engine=None, listing_cache_dir="Data/cache/listing_pages"):
         """
         Initializes the scraper.
         :param start_page: First page to scrape
-        :param end_page: Last page to scrape
+        :param end_page: Last page to scrape, or None to discover it from the pagination
         :param save_folder: Folder to save downloaded files
+        :param max_workers: Maximum number of concurrent downloads
+        :param http2: Use HTTP/2 when the server supports it
+        :param engine: Existing DownloadEngine to use instead of creating one
+        :param listing_cache_dir: Folder for cached listing pages (None disables the cache)
         """
         self.start_page = start_page
         self.end_page = end_page
         self.save_folder = save_folder
+        self.engine = engine or DownloadEngine(headers=self.HEADERS, max_workers=max_workers, http2=http2)
+        self.listing_cache_dir = listing_cache_dir
+        self.manifest = DownloadManifest(os.path.join(self.save_folder, "download_manifest.json"))
+        self.store = DocumentStore(self.save_folder)
         os.makedirs(self.save_folder, exist_ok=True)
 
     def get_document_links(self):
@@ -29,56 +41,49 @@ class BorderToCoastScraper:
         Scrapes document links from the Border to Coast publications page.
         :return: List of properly formatted document links
         """
-        document_links = []
-
-        for page in range(self.start_page, self.end_page + 1):
-            url = self.BASE_URL.format(page)
-            response = requests.get(url, headers=self.HEADERS)
-            soup = BeautifulSoup(response.text, "html.parser")
-
-            # Find all <a> tags with document links
-            links = soup.find_all("a", href=True)
-            for link in links:
-                href = link["href"].strip()
-
-                # Convert relative URLs to absolute
-                full_url = href if href.startswith("http") else urljoin(self.DOMAIN, href)
-
-                # Only add valid document links
-                if full_url.endswith((".pdf", ".xls", ".xlsx")):
-                    document_links.append(full_url)
-
-            print(f"✅ Scraped page {page}: Found {len(document_links)} documents so far.")
-
-        # Remove duplicates
-        document_links = list(set(document_links))
+        crawler = ListingCrawler(
+            self.engine,
+            self.BASE_URL,
+            self.PAGE_PATTERN,
+            start_page=self.start_page,
+            end_page=self.end_page,
+            cache_dir=self.listing_cache_dir,
+        )
+        document_links = crawler.crawl()
         print(f"✅ Total unique documents found: {len(document_links)}")
         return document_links
 
+    def filter_links(self, links, dry_run=False):
+        """
+        Drops links rejected by the pool's LINK_RULES before anything is downloaded.
+        :param links: List of document URLs
+        :param dry_run: Print the full accept/skip report
+        :return: List of links to download
+        """
+        accepted, rejected = self.LINK_RULES.classify(links, self.engine)
+        if dry_run:
+            print_dry_run_report(accepted, rejected)
+        elif rejected:
+            print(f"🚫 Skipped {len(rejected)} unwanted documents.")
+        return accepted
+
     def download_files(self, links):
         """
-        Downloads files from extracted links.
+        Downloads new or changed files from extracted links and adds them to the
+        content-addressed document store.
         :param links: List of file URLs
-        :return: List of downloaded file paths
+        :return: List of downloaded (or unchanged) file paths
         """
-        file_paths = []
-        for link in links:
-            filename = os.path.join(self.save_folder, os.path.basename(link))
-            try:
-                response = requests.get(link, headers=self.HEADERS, timeout=10)
-                response.raise_for_status()
-
-                with open(filename, "wb") as f:
-                    f.write(response.content)
-
-                file_paths.append(filename)
-                print(f"📥 Downloaded: {filename}")
-
-            except requests.exceptions.RequestException as e:
-                print(f"❌ Failed to download {link}: {e}")
-
+        file_paths = self.engine.download_files(links, self.save_folder, manifest=self.manifest)
+        for path in file_paths:
+            self.store.add(path)
+        self.store.save()
         return file_paths
 
+    def close(self):
+        """Closes the pooled HTTP connections."""
+        self.engine.close()
+
 
 class DataExtractor:
     @staticmethod
@@ -107,11 +112,15 @@ class DataExtractor:
         return df
 
 
-def webscraper(start_page=1,end_page=2):
+def webscraper(start_page=1,end_page=None,dry_run=False):
     # Initialize scraper
     scraper = BorderToCoastScraper(start_page=start_page, end_page=end_page)
-    document_links = scraper.get_document_links()
-    
+    document_links = scraper.filter_links(scraper.get_document_links(), dry_run=dry_run)
+
+    if dry_run:
+        scraper.close()
+        return
+
     if document_links:
         files = scraper.download_files(document_links)
         
@@ -126,6 +135,8 @@ def webscraper(start_page=1,end_page=2):
     else:
         print("❌ No documents found.")
 
+    scraper.close()
+
 # Main Execution
 if __name__ == "__main__":
     webscraper()
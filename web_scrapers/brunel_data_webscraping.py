@@ -1,65 +1,83 @@
 import os
-import requests
 import pandas as pd
 import pdfplumber
-from bs4 import BeautifulSoup
+from web_scrapers.download_engine import DownloadEngine
+from web_scrapers.download_manifest import DownloadManifest
+from web_scrapers.link_rules import POOL_RULES, print_dry_run_report
+from web_scrapers.listing_crawler import ListingCrawler
+from misc.document_store import DocumentStore
 
 class BrunelScraper:
     BASE_URL = "https://www.brunelpensionpartnership.org/document_category/holdings-report/page/{}/?s_year&is_document_search=1&post_type=document"
+    PAGE_PATTERN = r"/page/(\d+)/"
+    LINK_RULES = POOL_RULES["brunel"]
     HEADERS = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
     }
 
-    def __init__(self, pages=1, save_folder="Data/raw_data/brunel_data"):
+    def __init__(self, pages=None, save_folder="Data/raw_data/brunel_data", max_workers=8, http2=False, engine=None, listing_cache_dir="Data/cache/listing_pages"):
         """
         Initializes the scraper.
-        :param pages: Number of pages to scrape
+        :param pages: Number of pages to scrape, or None to discover it from the pagination
         :param save_folder: Folder to save downloaded files
+        :param max_workers: Maximum number of concurrent downloads
+        :param http2: Use HTTP/2 when the server supports it
+        :param engine: Existing DownloadEngine to use instead of creating one
+        :param listing_cache_dir: Folder for cached listing pages (None disables the cache)
         """
         self.pages = pages
         self.save_folder = save_folder
+        self.engine = engine or DownloadEngine(headers=self.HEADERS, max_workers=max_workers, http2=http2)
+        self.listing_cache_dir = listing_cache_dir
+        self.manifest = DownloadManifest(os.path.join(self.save_folder, "download_manifest.json"))
+        self.store = DocumentStore(self.save_folder)
         os.makedirs(self.save_folder, exist_ok=True)
 
     def get_document_links(self):
         """
-        Scrapes document links from the specified number of pages.
+        Scrapes document links from the listing pages.
         :return: List of document links
         """
-        document_links = []
-        for page in range(1, self.pages + 1):
-            url = self.BASE_URL.format(page)
-            response = requests.get(url, headers=self.HEADERS)
-            soup = BeautifulSoup(response.text, "html.parser")
-            links = soup.find_all("a", href=True)
-
-            for link in links:
-                href = link["href"]
-                if href.endswith((".pdf", ".xls", ".xlsx")):
-                    document_links.append(href)
-
-            print(f"✅ Scraped {len(document_links)} documents from page {page}")
-
-        return document_links
+        crawler = ListingCrawler(
+            self.engine,
+            self.BASE_URL,
+            self.PAGE_PATTERN,
+            end_page=self.pages,
+            cache_dir=self.listing_cache_dir,
+        )
+        return crawler.crawl()
+
+    def filter_links(self, links, dry_run=False):
+        """
+        Drops links rejected by the pool's LINK_RULES before anything is downloaded.
+        :param links: List of document URLs
+        :param dry_run: Print the full accept/skip report
+        :return: List of links to download
+        """
+        accepted, rejected = self.LINK_RULES.classify(links, self.engine)
+        if dry_run:
+            print_dry_run_report(accepted, rejected)
+        elif rejected:
+            print(f"🚫 Skipped {len(rejected)} unwanted documents.")
+        return accepted
 
     def download_files(self, links):
         """
-        Downloads files from extracted links.
+        Downloads new or changed files from extracted links and adds them to the
+        content-addressed document store.
         :param links: List of file URLs
-        :return: List of downloaded file paths
+        :return: List of downloaded (or unchanged) file paths
         """
-        file_paths = []
-        for link in links:
-            filename = os.path.join(self.save_folder, os.path.basename(link))
-            response = requests.get(link, headers=self.HEADERS)
-
-            with open(filename, "wb") as f:
-                f.write(response.content)
-
-            file_paths.append(filename)
-            print(f"📥 Downloaded: {filename}")
-
+        file_paths = self.engine.download_files(links, self.save_folder, manifest=self.manifest)
+        for path in file_paths:
+            self.store.add(path)
+        self.store.save()
         return file_paths
 
+    def close(self):
+        """Closes the pooled HTTP connections."""
+        self.engine.close()
+
 
 class DataExtractor:
     @staticmethod
@@ -88,11 +106,15 @@ class DataExtractor:
         return df
 
 
-def webscraper(num_pages=1):
+def webscraper(num_pages=None, dry_run=False):
     # Initialize scraper
     scraper = BrunelScraper(pages=num_pages)
-    document_links = scraper.get_document_links()
-    
+    document_links = scraper.filter_links(scraper.get_document_links(), dry_run=dry_run)
+
+    if dry_run:
+        scraper.close()
+        return
+
     if document_links:
         files = scraper.download_files(document_links)
         
@@ -111,6 +133,8 @@ def webscraper(num_pages=1):
     else:
         print(" No documents found.")
 
+    scraper.close()
+
 
 # Main Execution
 if __name__ == "__main__":
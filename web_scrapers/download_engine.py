@@ -0,0 +1,319 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import httpx
+
+
+class DownloadEngine:
+    """
+    Shared download engine used by the pool web scrapers.
+
+    Files are fetched by a bounded pool of worker threads and every host gets a single
+    pooled keep-alive client, so repeated requests to the same site reuse connections
+    instead of opening a new one per file.
+    """
+
+    CHUNK_SIZE = 256 * 1024
+
+    def __init__(self, headers=None, max_workers=8, http2=False, timeout=30, retries=2, rewrite_url=None, recorder=None):
+        """
+        Initializes the engine.
+        :param headers: Default headers sent with every request
+        :param max_workers: Maximum number of concurrent downloads
+        :param http2: Negotiate HTTP/2 when the server supports it (needs the h2 package)
+        :param timeout: Per-request timeout in seconds
+        :param retries: Extra attempts after a network error or 5xx response; file
+                        downloads resume from the bytes already on disk
+        :param rewrite_url: Optional callable mapping a URL to the one actually requested
+                            (used to point the scrapers at a local replay server)
+        :param recorder: Optional HttpArchive that stores every successful response
+        """
+        self.headers = dict(headers or {})
+        self.max_workers = max(1, int(max_workers))
+        self.http2 = http2 and self._http2_available()
+        self.timeout = timeout
+        self.retries = max(0, int(retries))
+        self.rewrite_url = rewrite_url
+        self.recorder = recorder
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _http2_available():
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            print("⚠️ h2 is not installed, falling back to HTTP/1.1")
+            return False
+        return True
+
+    def client_for(self, url):
+        """
+        Returns the pooled client for the host of a URL, creating it on first use.
+        :param url: Any URL on the host
+        :return: httpx.Client shared by all requests to that host
+        """
+        host = urlparse(url).netloc
+        with self._lock:
+            client = self._clients.get(host)
+            if client is None:
+                client = httpx.Client(
+                    headers=self.headers,
+                    http2=self.http2,
+                    timeout=self.timeout,
+                    follow_redirects=True,
+                    limits=httpx.Limits(
+                        max_connections=self.max_workers,
+                        max_keepalive_connections=self.max_workers,
+                    ),
+                )
+                self._clients[host] = client
+        return client
+
+    def _resolve(self, url):
+        return self.rewrite_url(url) if self.rewrite_url else url
+
+    def get(self, url, **kwargs):
+        """
+        Sends a GET request through the pooled client for the URL's host, retrying
+        transport errors and 5xx responses.
+        :param url: URL to fetch
+        :return: httpx.Response
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.client_for(url).get(self._resolve(url), **kwargs)
+            except httpx.TransportError:
+                if attempt == self.retries:
+                    raise
+                continue
+            if response.status_code < 500:
+                break
+
+        if self.recorder and response.status_code == 200:
+            self.recorder.add(url, response.headers, response.content)
+        return response
+
+    def head(self, url, **kwargs):
+        """
+        Sends a HEAD request through the pooled client for the URL's host.
+        :param url: URL to check
+        :return: httpx.Response
+        """
+        return self.client_for(url).head(self._resolve(url), **kwargs)
+
+    @staticmethod
+    def _expected_size(response, offset):
+        """
+        Works out the final file size from Content-Range / Content-Length.
+        Returns None when the server does not say, or when the body is content-encoded
+        and Content-Length describes the compressed stream.
+        """
+        content_range = response.headers.get("Content-Range", "")
+        if response.status_code == 206 and "/" in content_range:
+            total = content_range.rsplit("/", 1)[1]
+            return int(total) if total.isdigit() else None
+        length = response.headers.get("Content-Length")
+        if length and length.isdigit() and not response.headers.get("Content-Encoding"):
+            return offset + int(length)
+        return None
+
+    @staticmethod
+    def _hash_existing(path):
+        sha256 = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(DownloadEngine.CHUNK_SIZE), b""):
+                sha256.update(chunk)
+        return sha256
+
+    def _stream_to_file(self, link, filename, manifest=None):
+        """
+        Streams one file to '<filename>.part' and renames it into place once complete.
+        A leftover .part file is resumed with a Range request; If-Range makes the server
+        send the whole file again if it changed since the partial download started.
+        :return: (bytes transferred, changed) where changed is False for a 304
+        """
+        part_path = f"{filename}.part"
+        meta_path = f"{part_path}.json"
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        validator = None
+        if offset and os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                validator = json.load(f).get("validator")
+
+        if offset and validator:
+            headers = {"Range": f"bytes={offset}-", "If-Range": validator}
+        else:
+            offset = 0
+            headers = manifest.conditional_headers(link, filename) if manifest else {}
+
+        with self.client_for(link).stream("GET", self._resolve(link), headers=headers) as response:
+            if response.status_code == 304:
+                return 0, False
+            if response.status_code == 416:
+                # The partial file no longer lines up with the remote one; start over
+                os.remove(part_path)
+                return self._stream_to_file(link, filename, manifest)
+            response.raise_for_status()
+
+            if response.status_code == 206:
+                sha256 = self._hash_existing(part_path)
+                mode = "ab"
+                print(f"↪️ Resuming {filename} from byte {offset}")
+            else:
+                offset = 0
+                sha256 = hashlib.sha256()
+                mode = "wb"
+                validator = response.headers.get("ETag") or response.headers.get("Last-Modified")
+                if validator:
+                    with open(meta_path, "w", encoding="utf-8") as f:
+                        json.dump({"url": link, "validator": validator}, f)
+
+            expected_size = self._expected_size(response, offset)
+            transferred = 0
+            with open(part_path, mode) as f:
+                for chunk in response.iter_bytes(self.CHUNK_SIZE):
+                    f.write(chunk)
+                    sha256.update(chunk)
+                    transferred += len(chunk)
+
+            size = offset + transferred
+            if expected_size is not None and size != expected_size:
+                raise IOError(f"Incomplete download: got {size} of {expected_size} bytes")
+
+            os.replace(part_path, filename)
+            if os.path.exists(meta_path):
+                os.remove(meta_path)
+            if self.recorder:
+                self.recorder.add_file(link, response.headers, filename)
+
+            if manifest:
+                manifest.record(
+                    link,
+                    filename,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                    size=size,
+                    sha256=sha256.hexdigest(),
+                )
+        return transferred, True
+
+    @staticmethod
+    def target_paths(links, save_folder, manifest=None):
+        """
+        Maps each link to the path it is saved under.
+        Links sharing a basename with a different URL (in this batch or in the manifest)
+        get a short URL hash appended, so they never overwrite each other.
+        :return: List of paths, in the same order as the links
+        """
+        owners = {}
+        if manifest:
+            owners = {entry["path"]: url for url, entry in manifest.entries.items()}
+        paths = []
+        for link in links:
+            path = os.path.join(save_folder, os.path.basename(link))
+            owner = owners.get(path)
+            if owner is not None and owner != link:
+                stem, ext = os.path.splitext(os.path.basename(link))
+                url_hash = hashlib.sha1(link.encode("utf-8")).hexdigest()[:8]
+                path = os.path.join(save_folder, f"{stem}-{url_hash}{ext}")
+            owners.setdefault(path, link)
+            paths.append(path)
+        return paths
+
+    def _download_one(self, link, filename, manifest=None):
+        for attempt in range(self.retries + 1):
+            try:
+                size, changed = self._stream_to_file(link, filename, manifest)
+                break
+            except (httpx.TransportError, httpx.HTTPStatusError, IOError) as e:
+                server_error = not isinstance(e, httpx.HTTPStatusError) or e.response.status_code >= 500
+                if attempt == self.retries or not server_error:
+                    raise
+                print(f"⚠️ Retrying {link} after error: {e}")
+        if not changed:
+            print(f"⏭️ Unchanged: {filename}")
+            return filename, 0, False
+
+        print(f"📥 Downloaded: {filename}")
+        return filename, size, True
+
+    def download_files(self, links, save_folder, manifest=None):
+        """
+        Downloads files concurrently into a folder.
+        :param links: List of file URLs
+        :param save_folder: Folder to save downloaded files
+        :param manifest: Optional DownloadManifest; known files are fetched conditionally
+                         and only re-downloaded when the server reports a change
+        :return: List of downloaded (or unchanged) file paths, in the same order as the links
+        """
+        os.makedirs(save_folder, exist_ok=True)
+        # Duplicate links would race on the same target file
+        links = list(dict.fromkeys(links))
+        results = [None] * len(links)
+        total_bytes = 0
+        downloaded = 0
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [
+                executor.submit(self._download_one, link, filename, manifest)
+                for link, filename in zip(links, self.target_paths(links, save_folder, manifest))
+            ]
+            for index, (link, future) in enumerate(zip(links, futures)):
+                try:
+                    filename, size, changed = future.result()
+                except (httpx.HTTPError, OSError) as e:
+                    print(f"❌ Failed to download {link}: {e}")
+                    continue
+                results[index] = filename
+                total_bytes += size
+                downloaded += changed
+
+        if manifest:
+            manifest.save()
+
+        file_paths = [path for path in results if path is not None]
+        if len(file_paths) > downloaded:
+            print(f"⏭️ {len(file_paths) - downloaded} files unchanged since the last run")
+        self.report_throughput(downloaded, total_bytes, time.perf_counter() - start)
+        return file_paths
+
+    @staticmethod
+    def report_throughput(files, total_bytes, elapsed):
+        """
+        Prints download throughput in files/s and MB/s.
+        :return: Dictionary with the computed figures
+        """
+        elapsed = max(elapsed, 1e-9)
+        megabytes = total_bytes / (1024 * 1024)
+        stats = {
+            "files": files,
+            "megabytes": megabytes,
+            "seconds": elapsed,
+            "files_per_second": files / elapsed,
+            "megabytes_per_second": megabytes / elapsed,
+        }
+        print(
+            f"📊 Downloaded {files} files ({megabytes:.2f} MB) in {elapsed:.2f}s: "
+            f"{stats['files_per_second']:.2f} files/s, {stats['megabytes_per_second']:.2f} MB/s"
+        )
+        return stats
+
+    def close(self):
+        """Closes every pooled client."""
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,76 @@
+import os
+import json
+import threading
+from datetime import datetime, timezone
+
+
+class DownloadManifest:
+    """
+    Persistent record of every file a scraper has downloaded.
+
+    Each URL maps to the local path, ETag, Last-Modified, size and sha256 of the copy on
+    disk. Re-runs use it to send conditional requests so unchanged documents come back as
+    304 Not Modified instead of being downloaded again.
+    """
+
+    def __init__(self, path):
+        """
+        Loads the manifest, starting empty if the file does not exist yet.
+        :param path: JSON file the manifest is stored in
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Ignoring unreadable manifest {path}: {e}")
+
+    def get(self, url):
+        with self._lock:
+            return self.entries.get(url)
+
+    def conditional_headers(self, url, filename):
+        """
+        Builds If-None-Match / If-Modified-Since headers for a URL.
+        Headers are only sent while the local copy still exists with the recorded size,
+        otherwise a 304 would leave us without a usable file.
+        :param url: File URL
+        :param filename: Local path the file is saved to
+        :return: Dictionary of request headers (empty for new or missing files)
+        """
+        entry = self.get(url)
+        if not entry or entry.get("path") != filename or not os.path.exists(filename):
+            return {}
+        if os.path.getsize(filename) != entry.get("size"):
+            return {}
+
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def record(self, url, filename, etag, last_modified, size, sha256):
+        """Stores the metadata of a freshly downloaded file."""
+        with self._lock:
+            self.entries[url] = {
+                "path": filename,
+                "etag": etag,
+                "last_modified": last_modified,
+                "size": size,
+                "sha256": sha256,
+                "downloaded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            }
+
+    def save(self):
+        """Writes the manifest to disk atomically."""
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
@@ -0,0 +1,242 @@
+import os
+import json
+import time
+import random
+import shutil
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+RECORDED_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+class HttpArchive:
+    """
+    Local archive of recorded HTTP responses (listing HTML and documents).
+
+    Bodies are stored once under 'bodies/<sha256>' and 'index.json' maps each URL to its
+    body and the headers the scrapers care about. A DownloadEngine created with
+    recorder=HttpArchive(...) fills it; ReplayServer serves it back.
+    """
+
+    def __init__(self, path):
+        """
+        Opens (or creates) an archive folder.
+        :param path: Folder holding index.json and the bodies/ directory
+        """
+        self.path = path
+        self.bodies_dir = os.path.join(path, "bodies")
+        self.index_path = os.path.join(path, "index.json")
+        self._lock = threading.Lock()
+        self.index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self.index = json.load(f)
+
+    @staticmethod
+    def _key(url):
+        # Scheme is dropped so the archive can be replayed over plain HTTP
+        parsed = urlparse(url)
+        return parsed.netloc + parsed.path + (f"?{parsed.query}" if parsed.query else "")
+
+    def _store(self, url, headers, sha256, size):
+        with self._lock:
+            self.index[self._key(url)] = {
+                "url": url,
+                "sha256": sha256,
+                "size": size,
+                "headers": {name: headers[name] for name in RECORDED_HEADERS if headers.get(name)},
+            }
+
+    def add(self, url, headers, body):
+        """Records an in-memory response body."""
+        os.makedirs(self.bodies_dir, exist_ok=True)
+        sha256 = hashlib.sha256(body).hexdigest()
+        body_path = os.path.join(self.bodies_dir, sha256)
+        if not os.path.exists(body_path):
+            with open(body_path, "wb") as f:
+                f.write(body)
+        self._store(url, headers, sha256, len(body))
+
+    def add_file(self, url, headers, file_path):
+        """Records a response that was streamed to a file."""
+        os.makedirs(self.bodies_dir, exist_ok=True)
+        sha256 = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                sha256.update(chunk)
+        sha256 = sha256.hexdigest()
+        body_path = os.path.join(self.bodies_dir, sha256)
+        if not os.path.exists(body_path):
+            shutil.copyfile(file_path, body_path)
+        self._store(url, headers, sha256, os.path.getsize(file_path))
+
+    def lookup(self, key):
+        """
+        Finds a recorded response.
+        :param key: Archive key ('host/path?query') or full URL
+        :return: (index entry, body path) or (None, None)
+        """
+        entry = self.index.get(key) or self.index.get(self._key(key))
+        if entry is None:
+            return None, None
+        return entry, os.path.join(self.bodies_dir, entry["sha256"])
+
+    def save(self):
+        """Writes the index to disk."""
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.index, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.index_path)
+
+
+class ReplayServer:
+    """
+    Local stand-in HTTP server that replays an HttpArchive.
+
+    A recorded URL 'https://host/path?query' is served at 'http://127.0.0.1:<port>/host/path?query';
+    pass ReplayServer.rewrite_url to DownloadEngine(rewrite_url=...) to point the scrapers at
+    it. Range requests and ETag/Last-Modified revalidation behave like the real sites, and
+    latency and errors can be injected to exercise the download engine.
+    """
+
+    def __init__(self, archive, host="127.0.0.1", port=0, latency=0.0, error_rate=0.0, seed=None):
+        """
+        Initializes the server (call start() to begin serving).
+        :param archive: HttpArchive to serve
+        :param port: Port to bind, 0 picks a free one
+        :param latency: Seconds of delay added before every response
+        :param error_rate: Probability (0-1) of injecting a 503 or a truncated body
+        :param seed: Seed for the error injection, for reproducible runs
+        """
+        self.archive = archive
+        self.latency = latency
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.requests_served = 0
+        self.bytes_served = 0
+        self.errors_injected = 0
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def rewrite_url(self, url):
+        """Maps a recorded URL onto this server."""
+        return f"{self.base_url}/{HttpArchive._key(url)}"
+
+    def _roll_error(self):
+        with self._random_lock:
+            if self._random.random() >= self.error_rate:
+                return None
+            return self._random.choice(("status", "truncate"))
+
+    def _count(self, nbytes, injected=False):
+        with self._stats_lock:
+            self.requests_served += 1
+            self.bytes_served += nbytes
+            self.errors_injected += injected
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_HEAD(self):
+                self._respond(send_body=False)
+
+            def do_GET(self):
+                self._respond(send_body=True)
+
+            def _respond(self, send_body):
+                if server.latency:
+                    time.sleep(server.latency)
+
+                entry, body_path = server.archive.lookup(self.path.lstrip("/"))
+                if entry is None:
+                    self._send_empty(404)
+                    return
+
+                error = server._roll_error() if send_body else None
+                if error == "status":
+                    self._send_empty(503, injected=True)
+                    return
+
+                headers = entry["headers"]
+                etag = headers.get("ETag")
+                last_modified = headers.get("Last-Modified")
+                if (etag and self.headers.get("If-None-Match") == etag) or (
+                        not etag and last_modified and self.headers.get("If-Modified-Since") == last_modified):
+                    self._send_empty(304)
+                    return
+
+                size = entry["size"]
+                start = 0
+                range_header = self.headers.get("Range", "")
+                if_range = self.headers.get("If-Range")
+                range_valid = if_range is None or if_range in (etag, last_modified)
+                if range_header.startswith("bytes=") and range_valid:
+                    start = int(range_header[len("bytes="):].split("-")[0] or 0)
+                    if start >= size:
+                        self._send_empty(416)
+                        return
+                    self.send_response(206)
+                    self.send_header("Content-Range", f"bytes {start}-{size - 1}/{size}")
+                else:
+                    self.send_response(200)
+                    self.send_header("Accept-Ranges", "bytes")
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(size - start))
+                self.end_headers()
+                if not send_body:
+                    server._count(0)
+                    return
+
+                with open(body_path, "rb") as f:
+                    f.seek(start)
+                    body = f.read()
+                if error == "truncate":
+                    # Drop the connection half way through the body
+                    body = body[:len(body) // 2]
+                    self.close_connection = True
+                self.wfile.write(body)
+                server._count(len(body), injected=error == "truncate")
+
+            def _send_empty(self, status, injected=False):
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                server._count(0, injected)
+
+        return Handler
+
+    def start(self):
+        """Starts serving in a background thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops the server and releases the port."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
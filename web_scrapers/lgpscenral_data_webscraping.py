@@ -0,0 +1,147 @@
+import os
+import pandas as pd
+import pdfplumber
+from bs4 import BeautifulSoup
+from urllib.parse import urljoin
+from web_scrapers.download_engine import DownloadEngine
+from web_scrapers.download_manifest import DownloadManifest
+from web_scrapers.link_rules import POOL_RULES, print_dry_run_report
+from misc.document_store import DocumentStore
+
+class LGPSCentralScraper:
+    BASE_URL = "https://www.lgpscentral.co.uk/news/acs-sub-fund-investments.html"
+    DOMAIN = "https://www.lgpscentral.co.uk"
+    LINK_RULES = POOL_RULES["lgpscentral"]
+    HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+    }
+
+    def __init__(self, save_folder="Data/raw_data/lgpscentral_data/pdf", max_workers=8, http2=False, engine=None):
+        """
+        Initializes the scraper.
+        :param save_folder: Folder to save downloaded files
+        :param max_workers: Maximum number of concurrent downloads
+        :param http2: Use HTTP/2 when the server supports it
+        :param engine: Existing DownloadEngine to use instead of creating one
+        """
+        self.save_folder = save_folder
+        self.engine = engine or DownloadEngine(headers=self.HEADERS, max_workers=max_workers, http2=http2)
+        self.manifest = DownloadManifest(os.path.join(self.save_folder, "download_manifest.json"))
+        self.store = DocumentStore(self.save_folder)
+        os.makedirs(self.save_folder, exist_ok=True)
+
+    def get_document_links(self):
+        """
+        Scrapes document links from the LGPS Central page.
+        :return: List of properly formatted document links
+        """
+        document_links = []
+        response = self.engine.get(self.BASE_URL)
+        soup = BeautifulSoup(response.text, "html.parser")
+
+        # Find all links
+        links = soup.find_all("a", href=True)
+        for link in links:
+            href = link["href"].strip()
+
+            # Fix broken/malformed URLs
+            if href.startswith("http"):  
+                full_url = href  # Absolute URL, use as is
+            else:
+                full_url = urljoin(self.DOMAIN, href)  # Convert relative URL to absolute
+
+            # Only add valid document links
+            if full_url.endswith((".pdf", ".xls", ".xlsx")):
+                document_links.append(full_url)
+
+        print(f"✅ Found {len(document_links)} valid documents.")
+        return document_links
+
+    def filter_links(self, links, dry_run=False):
+        """
+        Drops links rejected by the pool's LINK_RULES before anything is downloaded.
+        :param links: List of document URLs
+        :param dry_run: Print the full accept/skip report
+        :return: List of links to download
+        """
+        accepted, rejected = self.LINK_RULES.classify(links, self.engine)
+        if dry_run:
+            print_dry_run_report(accepted, rejected)
+        elif rejected:
+            print(f"🚫 Skipped {len(rejected)} unwanted documents.")
+        return accepted
+
+    def download_files(self, links):
+        """
+        Downloads new or changed files from extracted links and adds them to the
+        content-addressed document store.
+        :param links: List of file URLs
+        :return: List of downloaded (or unchanged) file paths
+        """
+        file_paths = self.engine.download_files(links, self.save_folder, manifest=self.manifest)
+        for path in file_paths:
+            self.store.add(path)
+        self.store.save()
+        return file_paths
+
+    def close(self):
+        """Closes the pooled HTTP connections."""
+        self.engine.close()
+
+
+class DataExtractor:
+    @staticmethod
+    def extract_pdf_data(pdf_path):
+        """
+        Extracts tables from a PDF file.
+        :param pdf_path: Path to the PDF file
+        :return: List of extracted tables
+        """
+        with pdfplumber.open(pdf_path) as pdf:
+            all_tables = []
+            for page in pdf.pages:
+                tables = page.extract_tables()
+                all_tables.extend(tables)
+
+        return all_tables
+
+    @staticmethod
+    def extract_excel_data(excel_path):
+        """
+        Extracts data from an Excel file.
+        :param excel_path: Path to the Excel file
+        :return: Pandas DataFrame
+        """
+        df = pd.read_excel(excel_path, engine="openpyxl")
+        return df
+
+
+def webscraper(dry_run=False):
+    # Initialize scraper
+    scraper = LGPSCentralScraper()
+    document_links = scraper.filter_links(scraper.get_document_links(), dry_run=dry_run)
+
+    if dry_run:
+        scraper.close()
+        return
+
+    if document_links:
+        files = scraper.download_files(document_links)
+        
+        #extractor = DataExtractor()
+        for file in files:
+            if file.endswith(".pdf"):
+                print(f"Extracting data from {file}...")
+
+            elif file.endswith((".xls", ".xlsx")):
+                print(f"Extracting Excel data from {file}...")
+
+    else:
+        print("No documents found.")
+
+    scraper.close()
+
+
+# Main Execution
+if __name__ == "__main__":
+    webscraper()
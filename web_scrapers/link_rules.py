@@ -0,0 +1,127 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, unquote
+
+import httpx
+
+DOCUMENT_EXTENSIONS = (".pdf", ".xls", ".xlsx")
+DOCUMENT_CONTENT_TYPES = (
+    "application/pdf",
+    "application/vnd.ms-excel",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "application/octet-stream",
+)
+
+
+def link_filename(url):
+    """Returns the unquoted, lower-cased file name of a URL's path (query and fragment dropped)."""
+    return unquote(os.path.basename(urlparse(url).path)).lower()
+
+
+def is_document_link(url, extensions=DOCUMENT_EXTENSIONS):
+    """True if the URL's file name has one of the (lower-case) extensions."""
+    return link_filename(url).endswith(tuple(extensions))
+
+
+class LinkRules:
+    """
+    Declarative include/exclude rules deciding which documents a pool scraper fetches.
+
+    Rules are checked against the file name of each link before anything is downloaded.
+    When content types or a size limit are given, the remaining links are also checked
+    with a HEAD request so oversized or non-document responses are never fetched.
+    """
+
+    def __init__(self, include=(), exclude=(), extensions=DOCUMENT_EXTENSIONS, content_types=None, max_size=None):
+        """
+        Initializes the rule set.
+        :param include: Keywords of which at least one must appear in the file name (empty keeps everything)
+        :param exclude: Keywords that reject a file name when any of them appears
+        :param extensions: Accepted file extensions
+        :param content_types: Accepted Content-Type values for the HEAD check (None skips the check)
+        :param max_size: Largest accepted Content-Length in bytes for the HEAD check (None skips the check)
+        """
+        self.include = [keyword.lower() for keyword in include]
+        self.exclude = [keyword.lower() for keyword in exclude]
+        self.extensions = tuple(extension.lower() for extension in extensions)
+        self.content_types = tuple(content_types) if content_types else None
+        self.max_size = max_size
+
+    def check_name(self, name):
+        """
+        Checks a URL or file name against the extension and keyword rules.
+        :return: None if accepted, otherwise the reason for rejecting it
+        """
+        filename = link_filename(name)
+        if not is_document_link(name, self.extensions):
+            return "unsupported extension"
+        for keyword in self.exclude:
+            if keyword in filename:
+                return f"excluded keyword '{keyword}'"
+        if self.include and not any(keyword in filename for keyword in self.include):
+            return "no include keyword"
+        return None
+
+    def check_metadata(self, content_type, size):
+        """
+        Checks HEAD metadata against the content type and size rules.
+        :return: None if accepted, otherwise the reason for rejecting it
+        """
+        if self.content_types and content_type:
+            if content_type.split(";")[0].strip().lower() not in self.content_types:
+                return f"content type '{content_type}'"
+        if self.max_size is not None and size is not None and size > self.max_size:
+            return f"size {size} bytes over limit"
+        return None
+
+    def _check_head(self, engine, link):
+        try:
+            response = engine.head(link)
+        except httpx.HTTPError as e:
+            # Leave the decision to the download itself
+            print(f"⚠️ HEAD failed for {link}: {e}")
+            return None
+        length = response.headers.get("Content-Length")
+        size = int(length) if length and length.isdigit() else None
+        return self.check_metadata(response.headers.get("Content-Type"), size)
+
+    def classify(self, links, engine=None):
+        """
+        Splits links into the ones to download and the ones to skip.
+        :param links: List of document URLs
+        :param engine: DownloadEngine used for HEAD checks (required when metadata rules are set)
+        :return: (accepted links, list of (rejected link, reason))
+        """
+        accepted = []
+        rejected = []
+        for link in links:
+            reason = self.check_name(link)
+            if reason:
+                rejected.append((link, reason))
+            else:
+                accepted.append(link)
+
+        if engine is not None and (self.content_types or self.max_size is not None):
+            with ThreadPoolExecutor(max_workers=engine.max_workers) as executor:
+                reasons = list(executor.map(lambda link: self._check_head(engine, link), accepted))
+            rejected.extend((link, reason) for link, reason in zip(accepted, reasons) if reason)
+            accepted = [link for link, reason in zip(accepted, reasons) if not reason]
+
+        return accepted, rejected
+
+
+def print_dry_run_report(accepted, rejected):
+    """Prints which links would be downloaded and why the others are skipped."""
+    print(f"📝 Dry run: {len(accepted)} documents would be downloaded, {len(rejected)} skipped.")
+    for link in accepted:
+        print(f"  ✅ {link}")
+    for link, reason in rejected:
+        print(f"  🚫 {link} ({reason})")
+
+
+# Per-pool rule sets shared by the scrapers and misc.complete_file_del
+POOL_RULES = {
+    "brunel": LinkRules(include=["Equities", "Portfolio", "Emerging"]),
+    "bordertocoast": LinkRules(include=["Holdings"], exclude=["Annual-Report"]),
+    "lgpscentral": LinkRules(include=["Equities", "Portfolio", "Emerging", "Equity"]),
+}
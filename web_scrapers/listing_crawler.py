@@ -0,0 +1,140 @@
+import os
+import re
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup, SoupStrainer
+from web_scrapers.link_rules import is_document_link
+
+
+class ListingCrawler:
+    """
+    Crawls a paginated publications listing and collects document links.
+
+    The last page is discovered from the pagination links on the first page, the
+    remaining pages are fetched concurrently through the scraper's DownloadEngine and
+    crawling stops at the first page that yields no unseen document links. Only <a> tags
+    are parsed (lxml + SoupStrainer) and listing HTML is cached on disk with a TTL.
+    """
+
+    def __init__(self, engine, page_url, page_pattern, start_page=1, end_page=None,
+                 cache_dir="Data/cache/listing_pages", cache_ttl=6 * 3600, max_pages=100):
+        """
+        Initializes the crawler.
+        :param engine: DownloadEngine used for the HTTP requests
+        :param page_url: Listing URL with a '{}' placeholder for the page number
+        :param page_pattern: Regex with one group capturing the page number in pagination hrefs
+        :param start_page: First page to crawl
+        :param end_page: Last page to crawl, or None to discover it from the pagination
+        :param cache_dir: Folder for cached listing HTML (None disables the cache)
+        :param cache_ttl: Seconds a cached listing page stays fresh
+        :param max_pages: Safety cap when the last page cannot be discovered
+        """
+        self.engine = engine
+        self.page_url = page_url
+        self.page_pattern = re.compile(page_pattern)
+        self.start_page = start_page
+        self.end_page = end_page
+        self.cache_dir = cache_dir
+        self.cache_ttl = cache_ttl
+        self.max_pages = max_pages
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _cache_path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".html")
+
+    def fetch_page(self, page):
+        """
+        Returns the HTML of a listing page, from the cache when it is still fresh.
+        :param page: Page number
+        :return: Page HTML, or None if the page does not exist
+        """
+        url = self.page_url.format(page)
+        cache_path = self._cache_path(url) if self.cache_dir else None
+        if cache_path and os.path.exists(cache_path):
+            if time.time() - os.path.getmtime(cache_path) < self.cache_ttl:
+                with open(cache_path, "r", encoding="utf-8") as f:
+                    return f.read()
+
+        response = self.engine.get(url)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        html = response.text
+
+        if cache_path:
+            tmp_path = f"{cache_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(html)
+            os.replace(tmp_path, cache_path)
+        return html
+
+    def parse_page(self, html, page):
+        """
+        Parses the <a> tags of a listing page.
+        :return: (document links in page order, highest page number linked from the page)
+        """
+        url = self.page_url.format(page)
+        soup = BeautifulSoup(html, "lxml", parse_only=SoupStrainer("a", href=True))
+        links = []
+        last_page = None
+        for anchor in soup.find_all("a", href=True):
+            href = anchor["href"].strip()
+            full_url = href if href.startswith("http") else urljoin(url, href)
+            if is_document_link(full_url):
+                links.append(full_url)
+                continue
+            match = self.page_pattern.search(href)
+            if match:
+                last_page = max(last_page or 0, int(match.group(1)))
+        return links, last_page
+
+    def _fetch_and_parse(self, page):
+        html = self.fetch_page(page)
+        if html is None:
+            return None, None
+        return self.parse_page(html, page)
+
+    def crawl(self):
+        """
+        Crawls the listing.
+        :return: List of unique document links in page order
+        """
+        seen = set()
+        document_links = []
+
+        def add_links(page, links):
+            new_links = [link for link in links if link not in seen]
+            seen.update(new_links)
+            document_links.extend(new_links)
+            print(f"✅ Scraped page {page}: Found {len(document_links)} documents so far.")
+            return bool(new_links)
+
+        links, discovered_last = self._fetch_and_parse(self.start_page)
+        if links is None or not add_links(self.start_page, links):
+            return document_links
+
+        last_page = self.end_page or discovered_last or self.start_page + self.max_pages - 1
+        if self.end_page is None and discovered_last:
+            print(f"🔎 Discovered {discovered_last} listing pages")
+
+        page = self.start_page + 1
+        with ThreadPoolExecutor(max_workers=self.engine.max_workers) as executor:
+            while page <= last_page:
+                batch = list(range(page, min(page + self.engine.max_workers, last_page + 1)))
+                results = executor.map(self._fetch_and_parse, batch)
+                for batch_page, (links, linked_last) in zip(batch, results):
+                    # Pages are consumed in order, so the early stop is deterministic
+                    if links is None or not add_links(batch_page, links):
+                        print(f"⏹️ Page {batch_page} has no new documents, stopping.")
+                        return document_links
+                    # Truncated pagination ("1 2 3 ... next") reveals later pages as we go
+                    if self.end_page is None and linked_last and linked_last > last_page:
+                        last_page = linked_last
+                page = batch[-1] + 1
+
+        return document_links
+